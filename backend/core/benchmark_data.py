@@ -0,0 +1,303 @@
+# core/benchmark_data.py
+"""
+Deterministic synthetic dataset used by the query budget suite and the
+benchmark commands. Everything is written with bulk_create, so seeding a few
+thousand rows per table takes a couple of seconds even on SQLite.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
+
+from .models import (
+    CustomUser, UserType, PlotListing, JointOwner, Booking, EcommerceProduct, Order, OrderItem,
+    RealEstateAgentProfile, PlotInquiry, ReferralCommission, SQLFTProject, SubPlotUnit, BankDetail,
+    KYCDocument, FAQ, SupportTicket, Inquiry, ShortlistCart, ShortlistCartItem, CallRequest,
+    B2BVendorProfile, VerifiedPlot, CommercialProperty, Payment,
+)
+from .referrals import rebuild_referral_paths
+from .search import rebuild_search_index
+from .stats import rebuild_dashboard_stats
+from .stock import create_shards
+
+
+# Row counts at scale=1.0.
+DATASET_SIZES = {
+    'clients': 1700,
+    'vendors': 150,
+    'agents': 100,
+    'admins': 50,
+    'plots': 600,
+    'bookings': 2000,
+    'products': 400,
+    'orders': 1000,
+    'carts': 500,
+    'cart_items': 1500,
+    'payments': 2000,
+    'kyc_documents': 800,
+    'projects': 100,
+    'sub_plots_per_project': 20,
+}
+
+# One account per role that owns a slice of every table, so user-scoped
+# endpoints return realistic payloads when requested as that user.
+PROBE_USERNAMES = {
+    UserType.CLIENT: 'probe_client',
+    UserType.ADMIN: 'probe_admin',
+    UserType.B2B_VENDOR: 'probe_vendor',
+    UserType.REAL_ESTATE_AGENT: 'probe_agent',
+}
+
+
+def _size(name, scale):
+    return max(1, int(DATASET_SIZES[name] * scale))
+
+
+def seed_benchmark_dataset(scale=1.0, seed=20240101):
+    """
+    Populate the database and return a dict of probe users keyed by UserType.
+    """
+    rng = random.Random(seed)
+    # Separate stream, so adding coordinates left the rest of the dataset unchanged.
+    geo_rng = random.Random(seed + 1)
+    now = timezone.now()
+    password = make_password(None)
+
+    # Users
+    users = []
+    for user_type, count_key in (
+        (UserType.CLIENT, 'clients'),
+        (UserType.B2B_VENDOR, 'vendors'),
+        (UserType.REAL_ESTATE_AGENT, 'agents'),
+        (UserType.ADMIN, 'admins'),
+    ):
+        for i in range(_size(count_key, scale)):
+            username = PROBE_USERNAMES[user_type] if i == 0 else f"{user_type}_{i}"
+            n = len(users)
+            users.append(CustomUser(
+                username=username,
+                email=f"{username}@bench.local",
+                mobile_number=f"9{n:09d}",
+                country_code='+91',
+                first_name=f"First{n}",
+                last_name=f"Last{n}",
+                city=rng.choice(['Chennai', 'Bengaluru', 'Hyderabad', 'Pune']),
+                user_type=user_type,
+                user_code=f"U{n:09d}",
+                referral_code=f"CBF{n:07d}",
+                is_active=True,
+                is_staff=user_type == UserType.ADMIN,
+                password=password,
+            ))
+    CustomUser.objects.bulk_create(users, batch_size=500)
+    users = list(CustomUser.objects.order_by('id'))
+    by_type = {}
+    for user in users:
+        by_type.setdefault(user.user_type, []).append(user)
+    probes = {user_type: CustomUser.objects.get(username=name) for user_type, name in PROBE_USERNAMES.items()}
+
+    # Referral chains: each client was referred by an earlier client.
+    clients = by_type[UserType.CLIENT]
+    referred = []
+    for index, user in enumerate(clients[1:], start=1):
+        user.referred_by_id = clients[rng.randrange(0, index)].id
+        referred.append(user)
+    CustomUser.objects.bulk_update(referred, ['referred_by'], batch_size=500)
+    rebuild_referral_paths()
+
+    agents = by_type[UserType.REAL_ESTATE_AGENT]
+    vendors = by_type[UserType.B2B_VENDOR]
+    RealEstateAgentProfile.objects.bulk_create([
+        RealEstateAgentProfile(
+            user=agent, first_name=agent.first_name, company_name=f"Realty {agent.id}",
+            phone_number=agent.mobile_number, email=agent.email,
+        ) for agent in agents
+    ])
+    B2BVendorProfile.objects.bulk_create([
+        B2BVendorProfile(user=vendor, company_name=f"Supplies {vendor.id}") for vendor in vendors
+    ])
+
+    # Plots
+    plots = []
+    for i in range(_size('plots', scale)):
+        owner = probes[UserType.CLIENT] if i % 50 == 0 else rng.choice(clients)
+        agent = probes[UserType.REAL_ESTATE_AGENT] if i % 10 == 0 else rng.choice(agents + [None])
+        area = Decimal(rng.randrange(600, 5000))
+        plots.append(PlotListing(
+            owner=owner, title=f"Plot {i}", location=rng.choice(['Chennai', 'OMR', 'ECR', 'Tambaram']),
+            total_area_sqft=area, price_per_sqft=Decimal(rng.randrange(500, 5000)),
+            available_sqft_for_investment=area, is_verified=i % 3 == 0, listed_by_agent=agent,
+            latitude=13.08 + geo_rng.uniform(-0.5, 0.5), longitude=80.27 + geo_rng.uniform(-0.5, 0.5),
+        ))
+    PlotListing.objects.bulk_create(plots, batch_size=500)
+    plots = list(PlotListing.objects.order_by('id'))
+    JointOwner.objects.bulk_create([
+        JointOwner(plot_listing=plot, owner=rng.choice(clients), share_percentage=Decimal('25.00'))
+        for plot in plots
+    ], batch_size=500)
+
+    bookings = []
+    for i in range(_size('bookings', scale)):
+        plot = rng.choice(plots)
+        client = probes[UserType.CLIENT] if i % 100 == 0 else rng.choice(clients)
+        sqft = Decimal(rng.randrange(10, 200))
+        bookings.append(Booking(
+            plot_listing=plot, client=client,
+            booking_type='square_feet' if i % 4 else 'full_plot',
+            booked_area_sqft=sqft if i % 4 else None,
+            total_price=sqft * plot.price_per_sqft,
+            status=rng.choice(['pending', 'confirmed', 'cancelled']),
+        ))
+    Booking.objects.bulk_create(bookings, batch_size=500)
+    # booking_date is auto_now_add; spread it over the last two years.
+    bookings = list(Booking.objects.order_by('id'))
+    for booking in bookings:
+        booking.booking_date = now - timedelta(days=rng.randrange(0, 730))
+    Booking.objects.bulk_update(bookings, ['booking_date'], batch_size=500)
+
+    # Products, orders
+    products = []
+    for i in range(_size('products', scale)):
+        vendor = probes[UserType.B2B_VENDOR] if i % 20 == 0 else rng.choice(vendors)
+        products.append(EcommerceProduct(
+            vendor=vendor, name=f"Product {i}", description='Bench product',
+            price=Decimal(rng.randrange(100, 10000)), stock_quantity=rng.randrange(0, 1000),
+            category='material' if i % 3 else 'service', moq=1, is_active=i % 10 != 0,
+        ))
+    EcommerceProduct.objects.bulk_create(products, batch_size=500)
+    products = list(EcommerceProduct.objects.order_by('id'))
+    create_shards(products)
+
+    orders = []
+    for i in range(_size('orders', scale)):
+        client = probes[UserType.CLIENT] if i % 50 == 0 else rng.choice(clients + vendors)
+        orders.append(Order(
+            client=client, order_id=f"BENCH{i:07d}", total_amount=Decimal(0),
+            status=rng.choice(['pending', 'CONFIRMED', 'DISPATCHED', 'DELIVERED']),
+        ))
+    Order.objects.bulk_create(orders, batch_size=500)
+    orders = list(Order.objects.order_by('id'))
+    order_items = []
+    for order in orders:
+        for _ in range(rng.randrange(1, 4)):
+            product = rng.choice(products)
+            order_items.append(OrderItem(
+                order=order, product=product, quantity=rng.randrange(1, 10), price_at_purchase=product.price,
+            ))
+    OrderItem.objects.bulk_create(order_items, batch_size=1000)
+
+    # Shortlist carts
+    plot_ct = ContentType.objects.get_for_model(PlotListing)
+    product_ct = ContentType.objects.get_for_model(EcommerceProduct)
+    project_ct = ContentType.objects.get_for_model(SQLFTProject)
+    cart_users = [probes[user_type] for user_type in PROBE_USERNAMES] + rng.sample(
+        clients[1:], min(len(clients) - 1, _size('carts', scale))
+    )
+    ShortlistCart.objects.bulk_create([ShortlistCart(user=user) for user in cart_users])
+    carts = list(ShortlistCart.objects.order_by('id'))
+
+    # Micro-plot projects
+    projects = SQLFTProject.objects.bulk_create([
+        SQLFTProject(
+            user=probes[UserType.REAL_ESTATE_AGENT] if i % 10 == 0 else rng.choice(agents),
+            project_name=f"Project {i}", location='Chennai', description='Bench project',
+            plot_type='Residential', unit='sqft', price=Decimal(rng.randrange(1000, 9000)),
+            latitude=13.08 + geo_rng.uniform(-0.5, 0.5), longitude=80.27 + geo_rng.uniform(-0.5, 0.5),
+        ) for i in range(_size('projects', scale))
+    ])
+    projects = list(SQLFTProject.objects.order_by('id'))
+    SubPlotUnit.objects.bulk_create([
+        SubPlotUnit(
+            project=project, plot_number=f"{project.id}-{n}", dimensions='30x40', area=Decimal(1200),
+            total_price=Decimal(1200) * project.price, status=rng.choice(['Available', 'Booked', 'Sold']),
+        ) for project in projects for n in range(DATASET_SIZES['sub_plots_per_project'])
+    ], batch_size=1000)
+
+    cart_items = []
+    for i in range(_size('cart_items', scale)):
+        cart = carts[i % len(carts)]
+        kind = i % 3
+        if kind == 0:
+            plot_id = rng.choice(plots).id
+            cart_items.append(ShortlistCartItem(cart=cart, content_type=plot_ct, object_id=plot_id, plot_listing_id=plot_id))
+        elif kind == 1:
+            cart_items.append(ShortlistCartItem(
+                cart=cart, content_type=product_ct, object_id=rng.choice(products).id, quantity=rng.randrange(1, 20),
+            ))
+        else:
+            cart_items.append(ShortlistCartItem(cart=cart, content_type=project_ct, object_id=rng.choice(projects).id))
+    ShortlistCartItem.objects.bulk_create(cart_items, batch_size=1000)
+
+    # Payments
+    payments = []
+    for i in range(_size('payments', scale)):
+        user = probes[UserType.CLIENT] if i % 100 == 0 else rng.choice(clients)
+        payments.append(Payment(
+            user=user, plot_id=rng.choice(plots).id, razorpay_order_id=f"order_bench{i:08d}",
+            razorpay_payment_id=f"pay_bench{i:08d}" if i % 3 else None,
+            amount=Decimal(rng.randrange(1000, 500000)), status='paid' if i % 3 else 'created',
+        ))
+    Payment.objects.bulk_create(payments, batch_size=1000)
+
+    KYCDocument.objects.bulk_create([
+        KYCDocument(
+            user=probes[UserType.CLIENT] if i == 0 else rng.choice(clients),
+            document_type=rng.choice(['aadhaar_card', 'pan_card']), file=f"kyc_documents/bench_{i}.pdf",
+            status=rng.choice(['submitted', 'approved', 'rejected']),
+        ) for i in range(_size('kyc_documents', scale))
+    ], batch_size=1000)
+
+    ReferralCommission.objects.bulk_create([
+        ReferralCommission(
+            user=user.referred_by if user.referred_by_id else probes[UserType.CLIENT],
+            referred_user=user, level=1, commission_percent=Decimal('2.00'), status='Active',
+        ) for user in referred[:_size('clients', scale) // 2]
+    ], batch_size=1000)
+
+    FAQ.objects.bulk_create([FAQ(question=f"Question {i}?", answer=f"Answer {i}.") for i in range(30)])
+    VerifiedPlot.objects.bulk_create([
+        VerifiedPlot(
+            title=f"Verified {i}", location='Chennai', area=Decimal(2400), price=Decimal(4800000),
+            sqft_price=Decimal(2000), is_flagship=i % 5 != 0,
+        ) for i in range(50)
+    ])
+    CommercialProperty.objects.bulk_create([
+        CommercialProperty(
+            user=probes[UserType.ADMIN], property_name=f"Commercial {i}", commercial_type='Shop',
+            locality='T Nagar', city='Chennai', area_sqft=Decimal(900), contact_person='Desk',
+            contact_number='9000000000',
+        ) for i in range(100)
+    ])
+    PlotInquiry.objects.bulk_create([
+        PlotInquiry(lead_name=f"Lead {i}", contact='9000000000', plot=rng.choice(plots), inquiry='Interested')
+        for i in range(300)
+    ])
+    Inquiry.objects.bulk_create([
+        Inquiry(user=rng.choice(clients), type='plot', plot=rng.choice(plots), message='Call me')
+        for i in range(200)
+    ])
+    SupportTicket.objects.bulk_create([
+        SupportTicket(
+            user=probes[UserType.CLIENT] if i % 10 == 0 else rng.choice(clients),
+            subject=f"Ticket {i}", message='Help',
+        ) for i in range(300)
+    ])
+    CallRequest.objects.bulk_create([
+        CallRequest(
+            user=rng.choice(clients), material=rng.choice(products), name='Caller', email='caller@bench.local',
+            phone='9000000000', city='Chennai',
+        ) for i in range(300)
+    ])
+    BankDetail.objects.bulk_create([
+        BankDetail(
+            user=probes[UserType.CLIENT] if i == 0 else rng.choice(clients), account_holder_name='Holder',
+            account_number=f"{i:012d}", ifsc='HDFC0000001', bank_name='HDFC',
+        ) for i in range(300)
+    ])
+    rebuild_dashboard_stats()
+    rebuild_search_index()
+
+    return probes
@@ -0,0 +1,141 @@
+# core/cache.py
+import functools
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+
+PUBLIC_PLOTS_NAMESPACE = 'public_plots'
+PUBLIC_PRODUCTS_NAMESPACE = 'public_products'
+PUBLIC_MICRO_PLOTS_NAMESPACE = 'public_micro_plots'
+FAQS_NAMESPACE = 'faqs'
+VERIFIED_PLOTS_NAMESPACE = 'verified_plots'
+
+# Response headers stored with a cached body (pagination links).
+CACHED_HEADERS = ('Link',)
+
+CACHED_NAMESPACES = (
+    PUBLIC_PLOTS_NAMESPACE,
+    PUBLIC_PRODUCTS_NAMESPACE,
+    PUBLIC_MICRO_PLOTS_NAMESPACE,
+    FAQS_NAMESPACE,
+    VERIFIED_PLOTS_NAMESPACE,
+)
+
+
+def _version_key(namespace):
+    return f"{namespace}:version"
+
+
+def get_namespace_version(namespace):
+    """
+    Current generation number of a cache namespace. Every cached entry of the
+    namespace is keyed by this number, so bumping it invalidates all of them
+    at once without having to track or delete individual keys.
+    """
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        cache.add(_version_key(namespace), 1, timeout=None)
+        version = cache.get(_version_key(namespace), 1)
+    return version
+
+
+def bump_namespace_version(namespace):
+    try:
+        return cache.incr(_version_key(namespace))
+    except ValueError:
+        # Key was evicted or never set; start a fresh generation.
+        cache.set(_version_key(namespace), 2, timeout=None)
+        return 2
+
+
+def bump_namespace_version_on_commit(namespace):
+    """
+    Bump `namespace` once the current transaction commits (at once outside
+    one). Bumping earlier would let a reader cache the pre-commit rows under
+    the new version and keep serving them.
+    """
+    transaction.on_commit(lambda: bump_namespace_version(namespace))
+
+
+def build_cache_key(namespace, request):
+    """
+    Key for a cached response: namespace, namespace version and a digest of
+    the absolute URL (host, path and query string, with parameters sorted).
+    """
+    query = '&'.join(sorted(request.GET.urlencode().split('&')))
+    raw = f"{request.get_host()}{request.path}?{query}"
+    digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+    return f"{namespace}:{get_namespace_version(namespace)}:{digest}"
+
+
+def get_cache_timeout():
+    return getattr(settings, 'PUBLIC_CATALOG_CACHE_TIMEOUT', 300)
+
+
+def _stats_key(namespace, kind):
+    return f"{namespace}:stats:{kind}"
+
+
+def _count(namespace, kind):
+    key = _stats_key(namespace, kind)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def get_cache_stats():
+    """
+    Hit/miss counters per cached namespace. They live in the cache itself,
+    so with a shared backend they cover every worker process.
+    """
+    keys = [_stats_key(ns, kind) for ns in CACHED_NAMESPACES for kind in ('hits', 'misses')]
+    values = cache.get_many(keys)
+    stats = {}
+    for namespace in CACHED_NAMESPACES:
+        hits = values.get(_stats_key(namespace, 'hits'), 0)
+        misses = values.get(_stats_key(namespace, 'misses'), 0)
+        total = hits + misses
+        stats[namespace] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else None,
+        }
+    return stats
+
+
+def cached_response(namespace, timeout=None):
+    """
+    Cache the data of successful responses from a view handler (`get`,
+    `list`, `retrieve`, ...) under `namespace`. Permission checks run before
+    the handler, so they still apply on a hit. Entries are dropped in bulk by
+    bump_namespace_version(), which core/signals.py runs when a write to the
+    namespace's models commits.
+
+    The key is resolved before the handler reads the database, and the
+    version is bumped only after the write has committed. A request that
+    read the old rows cached them under the version the commit retires, so
+    the stale page is never served once the write is visible.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            cache_key = build_cache_key(namespace, request)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                _count(namespace, 'hits')
+                data, headers = cached
+                return Response(data, status=200, headers=headers)
+            _count(namespace, 'misses')
+            response = handler(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                headers = {name: response[name] for name in CACHED_HEADERS if response.has_header(name)}
+                cache.set(cache_key, (response.data, headers), timeout if timeout is not None else get_cache_timeout())
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,145 @@
+# core/commissions.py
+"""
+Multi-level referral commission engine.
+
+Paid payments and confirmed bookings are read in primary-key order, in
+batches. A booking paid through a Payment earns commission once, from the
+payment; only bookings with no linked payment count as sources themselves. For each batch the buyers' uplines come from one ReferralPath
+query (the closure table over referred_by), and a ReferralCommission row
+per upline level is bulk-inserted. Rows are keyed by (source_type,
+source_id, level), so reprocessing a transaction never pays twice.
+
+Each source has a BatchCheckpoint holding the last primary key processed.
+It advances in the same transaction as the batch's inserts, so an
+interrupted run resumes where it stopped. A transaction that becomes
+paid/confirmed after the checkpoint has passed it rewinds the checkpoint
+(see rewind_checkpoint), and the next run picks it up.
+"""
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import BatchCheckpoint, Booking, Payment, ReferralCommission, ReferralPath
+
+
+CENT = Decimal('0.01')
+
+# source_type -> (model, eligible status, buyer field, amount field, rows to skip)
+SOURCES = {
+    'payment': (Payment, 'paid', 'user_id', 'amount', None),
+    # mark_paid() confirms a payment's booking too; the payment already pays for it.
+    'booking': (
+        Booking, 'confirmed', 'client_id', 'total_price',
+        Exists(Payment.objects.filter(booking=OuterRef('pk'))),
+    ),
+}
+
+
+def get_level_percents():
+    """
+    {level: percent} from settings.REFERRAL_COMMISSION_PERCENTS, level 1
+    first. A blank entry pays nothing at its level ("2,,0.5").
+    """
+    percents = {}
+    for level, value in enumerate(settings.REFERRAL_COMMISSION_PERCENTS, start=1):
+        value = str(value).strip()
+        try:
+            percent = Decimal(value or '0')
+        except InvalidOperation:
+            percent = None
+        if percent is None or not percent.is_finite() or percent < 0:
+            raise ImproperlyConfigured(
+                f"REFERRAL_COMMISSION_PERCENTS level {level} must be a non-negative number, not {value!r}."
+            )
+        percents[level] = percent
+    return percents
+
+
+def checkpoint_name(source_type):
+    return f"referral_commissions:{source_type}"
+
+
+def get_checkpoint(source_type):
+    checkpoint, _ = BatchCheckpoint.objects.get_or_create(name=checkpoint_name(source_type))
+    return checkpoint.position
+
+
+def reset_checkpoint(source_type):
+    BatchCheckpoint.objects.update_or_create(name=checkpoint_name(source_type), defaults={'position': 0})
+
+
+def rewind_checkpoint(source_type, pk):
+    """Make the next run revisit `pk`, if the checkpoint has already passed it."""
+    BatchCheckpoint.objects.filter(name=checkpoint_name(source_type), position__gte=pk).update(
+        position=pk - 1, updated_at=timezone.now()
+    )
+
+
+def build_commissions(source_type, rows, percents):
+    """
+    ReferralCommission objects for `rows` of (source pk, buyer id, amount),
+    one per upline member within the configured levels.
+    """
+    if not any(percents.values()):
+        return []
+    uplines = defaultdict(list)
+    paths = ReferralPath.objects.filter(
+        descendant_id__in={buyer_id for _, buyer_id, _ in rows}, depth__gte=1, depth__lte=max(percents),
+    ).values_list('descendant_id', 'ancestor_id', 'depth')
+    for buyer_id, ancestor_id, depth in paths:
+        uplines[buyer_id].append((ancestor_id, depth))
+
+    commissions = []
+    for pk, buyer_id, amount in rows:
+        base = Decimal(str(amount)).quantize(CENT)
+        for ancestor_id, level in uplines[buyer_id]:
+            percent = percents[level]
+            if not percent:
+                continue
+            commissions.append(ReferralCommission(
+                user_id=ancestor_id,
+                referred_user_id=buyer_id,
+                level=level,
+                commission_percent=percent,
+                base_amount=base,
+                amount=(base * percent / 100).quantize(CENT),
+                status='Active',
+                source_type=source_type,
+                source_id=pk,
+            ))
+    return commissions
+
+
+def process_batch(source_type, batch_size=None, percents=None):
+    """
+    Process the next batch after the checkpoint. Returns (transactions read,
+    commission rows submitted), or None when there is nothing left.
+    """
+    model, status, buyer_field, amount_field, skip = SOURCES[source_type]
+    batch_size = batch_size or settings.REFERRAL_COMMISSION_BATCH_SIZE
+    percents = percents or get_level_percents()
+    position = get_checkpoint(source_type)
+
+    queryset = model.objects.filter(status=status, pk__gt=position)
+    if skip is not None:
+        queryset = queryset.exclude(skip)
+    rows = list(
+        queryset.order_by('pk').values_list('pk', buyer_field, amount_field)[:batch_size]
+    )
+    if not rows:
+        return None
+
+    commissions = build_commissions(source_type, rows, percents)
+    with transaction.atomic():
+        ReferralCommission.objects.bulk_create(commissions, batch_size=1000, ignore_conflicts=True)
+        # Only advance from the position this batch started at: if a rewind
+        # landed meanwhile, keep it so the next batch revisits those rows.
+        BatchCheckpoint.objects.filter(name=checkpoint_name(source_type), position=position).update(
+            position=rows[-1][0], updated_at=timezone.now()
+        )
+    return len(rows), len(commissions)
@@ -0,0 +1,183 @@
+# core/exports.py
+"""
+Admin data exports (GET /api/admin/export/<entity>/).
+
+An export is a flat list of columns. They are read with values_list() in
+primary-key order through .iterator(), which uses a server-side cursor on
+Postgres. A worker therefore holds one chunk of rows at a time, however
+many rows the export has, and each chunk is written out before the next
+is fetched:
+
+- CSV goes through csv.writer, and through a gzip stream when the client
+  accepts one.
+- Parquet is written with pyarrow, one row group per chunk. Its columns
+  are compressed with zstd, so the file is not gzipped again. pyarrow is
+  imported on first use, since only this format needs it.
+
+Column types come from the model fields, so a Parquet file keeps
+decimals, timestamps and integers typed.
+"""
+import csv
+import io
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import GeneratedField
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.text import compress_sequence
+
+from .models import Booking, CustomUser, Order, Payment
+from .streaming import _batches
+
+
+class Export:
+    def __init__(self, model, date_field, fields):
+        self.model = model
+        self.date_field = date_field
+        self.fields = fields
+        self.columns = [field.replace('__', '_') for field in fields]
+
+    def model_field(self, lookup):
+        model = self.model
+        *path, name = lookup.split('__')
+        for part in path:
+            model = model._meta.get_field(part).related_model
+        field = model._meta.get_field(name)
+        if field.is_relation:
+            field = field.target_field
+        if isinstance(field, GeneratedField):
+            field = field.output_field
+        return field
+
+    def rows(self, start=None, end=None, chunk_size=None):
+        """Value tuples between the dates `start` and `end` (inclusive), in pk order."""
+        queryset = self.model.objects.all()
+        if start:
+            queryset = queryset.filter(**{f'{self.date_field}__gte': _start_of(start)})
+        if end:
+            queryset = queryset.filter(**{f'{self.date_field}__lt': _start_of(end + timedelta(days=1))})
+        return queryset.order_by('pk').values_list(*self.fields).iterator(
+            chunk_size=chunk_size or settings.EXPORT_CHUNK_SIZE,
+        )
+
+
+EXPORTS = {
+    'bookings': Export(Booking, 'booking_date', (
+        'id', 'client_id', 'client__username', 'plot_listing_id', 'plot_listing__title', 'booking_type',
+        'booked_area_sqft', 'total_price', 'status', 'booking_date',
+    )),
+    'payments': Export(Payment, 'created_at', (
+        'id', 'user_id', 'user__username', 'plot_id', 'booking_id', 'razorpay_order_id', 'razorpay_payment_id',
+        'amount', 'amount_paise', 'status', 'created_at',
+    )),
+    'orders': Export(Order, 'order_date', (
+        'id', 'order_id', 'client_id', 'client__username', 'product_name', 'category', 'qty', 'unit_price',
+        'total_amount', 'customer_type', 'status', 'expected_delivery_date', 'order_date',
+    )),
+    # No KYC numbers or password hashes.
+    'users': Export(CustomUser, 'date_joined', (
+        'id', 'username', 'email', 'first_name', 'last_name', 'mobile_number', 'user_type', 'city', 'state',
+        'kyc_status', 'referred_by_id', 'is_active', 'date_joined',
+    )),
+}
+
+# format -> (content type, file extension)
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def _start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def csv_chunks(export, rows, chunk_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(export.columns)
+    for batch in _batches(rows, chunk_size):
+        writer.writerows(batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _Sink(io.RawIOBase):
+    """A write-only file that keeps what pyarrow writes until it is drained."""
+
+    def __init__(self):
+        self.parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def _arrow_type(pa, field):
+    kind = field.get_internal_type()
+    if kind == 'DecimalField':
+        return pa.decimal128(field.max_digits, field.decimal_places)
+    if kind in ('AutoField', 'BigAutoField', 'IntegerField', 'BigIntegerField', 'SmallIntegerField',
+                'PositiveIntegerField', 'PositiveBigIntegerField', 'PositiveSmallIntegerField'):
+        return pa.int64()
+    return {
+        'DateTimeField': pa.timestamp('us', tz='UTC'),
+        'DateField': pa.date32(),
+        'BooleanField': pa.bool_(),
+        'FloatField': pa.float64(),
+    }.get(kind, pa.string())
+
+
+def parquet_chunks(export, rows, chunk_size):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        (column, _arrow_type(pa, export.model_field(field))) for column, field in zip(export.columns, export.fields)
+    ])
+    sink = _Sink()
+    with pq.ParquetWriter(sink, schema, compression='zstd') as writer:
+        for batch in _batches(rows, chunk_size):
+            columns = zip(*batch)
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=column.type) for values, column in zip(columns, schema)], schema=schema,
+            ))
+            yield sink.drain()
+    yield sink.drain()
+
+
+WRITERS = {'csv': csv_chunks, 'parquet': parquet_chunks}
+
+
+def stream_export(entity, file_format='csv', start=None, end=None, gzip=False, chunk_size=None):
+    """
+    StreamingHttpResponse with the export `entity` as a `file_format`
+    attachment. Only CSV is gzipped; Parquet compresses its own columns.
+    """
+    export = EXPORTS[entity]
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    content_type, extension = FORMATS[file_format]
+    chunks = WRITERS[file_format](export, export.rows(start, end, chunk_size), chunk_size)
+    gzip = gzip and file_format == 'csv'
+    if gzip:
+        chunks = compress_sequence(chunks)
+
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    suffix = ''.join(f"-{day.isoformat()}" for day in (start, end) if day)
+    response['Content-Disposition'] = f'attachment; filename="{entity}{suffix}.{extension}"'
+    response['Vary'] = 'Accept-Encoding'
+    if gzip:
+        response['Content-Encoding'] = 'gzip'
+    return response
@@ -0,0 +1,116 @@
+# core/geo.py
+"""
+Coordinates and radius search for plots, micro-plot projects and commercial
+properties, without PostGIS.
+
+Listings carry latitude/longitude columns with a composite B-tree index.
+When a listing has a Google Maps link, save fills the coordinates from it
+offline (see parse_map_link). Short links such as maps.app.goo.gl only
+resolve over the network, so those listings need coordinates set directly.
+
+A radius query first narrows to the bounding box of the circle, which the
+(latitude, longitude) index serves. It then computes the haversine distance
+in SQL for the rows inside the box only, and orders and limits by it. SQLite
+gets the trigonometric functions from Django's connection setup, so the
+same query runs in tests.
+"""
+import math
+import re
+from urllib.parse import parse_qs, unquote, urlparse
+
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LATITUDE = math.pi * EARTH_RADIUS_KM / 180
+
+_NUMBER = r'(-?\d{1,3}(?:\.\d+)?)'
+# !3d<lat>!4d<lng> is the dropped pin of a place link; @<lat>,<lng> is the
+# map centre and only used when there is no pin.
+_PIN_PATTERN = re.compile(rf'!3d{_NUMBER}!4d{_NUMBER}')
+_CENTRE_PATTERN = re.compile(rf'@{_NUMBER},{_NUMBER}')
+_PAIR_PATTERN = re.compile(rf'^\s*{_NUMBER}\s*,\s*{_NUMBER}\s*$')
+_COORDINATE_PARAMS = ('q', 'query', 'll', 'sll', 'center', 'destination', 'daddr')
+
+
+def _valid(latitude, longitude):
+    latitude, longitude = float(latitude), float(longitude)
+    if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+        return latitude, longitude
+    return None
+
+
+def parse_map_link(url):
+    """
+    (latitude, longitude) from a Google Maps URL, or None when the link does
+    not contain coordinates. Understands place pins (!3d..!4d..), map
+    centres (/@lat,lng,15z) and lat,lng query parameters (?q=, ?ll=,
+    ?query=, ?destination=, ...).
+    """
+    if not url:
+        return None
+    text = unquote(url)
+    match = _PIN_PATTERN.search(text)
+    if match:
+        return _valid(*match.groups())
+    params = parse_qs(urlparse(text).query)
+    for name in _COORDINATE_PARAMS:
+        for value in params.get(name, []):
+            match = _PAIR_PATTERN.match(value)
+            if match:
+                return _valid(*match.groups())
+    match = _CENTRE_PATTERN.search(text)
+    if match:
+        return _valid(*match.groups())
+    return None
+
+
+def fill_coordinates(instance):
+    """pre_save hook: take the coordinates from the instance's map link when it has them."""
+    coordinates = parse_map_link(getattr(instance, 'google_map_link', None))
+    if coordinates:
+        instance.latitude, instance.longitude = coordinates
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """(min_lat, max_lat, min_lng, max_lng) of the square around the circle."""
+    lat_delta = radius_km / KM_PER_DEGREE_LATITUDE
+    min_lat, max_lat = latitude - lat_delta, latitude + lat_delta
+    if min_lat <= -90 or max_lat >= 90:
+        # The circle covers a pole: every longitude is in range.
+        return max(min_lat, -90), min(max_lat, 90), -180, 180
+    lng_delta = math.degrees(math.asin(min(math.sin(math.radians(lat_delta)) / math.cos(math.radians(latitude)), 1)))
+    return min_lat, max_lat, longitude - lng_delta, longitude + lng_delta
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(math.sqrt(a), 1))
+
+
+def _distance_expression(latitude, longitude):
+    origin_lat = math.radians(latitude)
+    lat = Radians(F('latitude'))
+    half_dlat = (lat - Value(origin_lat)) / Value(2.0)
+    half_dlng = (Radians(F('longitude')) - Value(math.radians(longitude))) / Value(2.0)
+    a = Power(Sin(half_dlat), 2) + Value(math.cos(origin_lat)) * Cos(lat) * Power(Sin(half_dlng), 2)
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Least(Sqrt(a), Value(1.0)), output_field=FloatField())
+
+
+def nearby(queryset, latitude, longitude, radius_km):
+    """
+    Rows of `queryset` within `radius_km` of the point, nearest first, each
+    annotated with `distance_km`. Slice the result to limit it.
+    """
+    min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_km)
+    in_box = queryset.filter(latitude__gte=min_lat, latitude__lte=max_lat)
+    # A box crossing the antimeridian leaves longitude to the distance filter.
+    if min_lng >= -180 and max_lng <= 180:
+        in_box = in_box.filter(longitude__gte=min_lng, longitude__lte=max_lng)
+    return (
+        in_box.annotate(distance_km=_distance_expression(latitude, longitude))
+        .filter(distance_km__lte=radius_km)
+        .order_by('distance_km', 'pk')
+    )
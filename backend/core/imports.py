@@ -0,0 +1,312 @@
+# core/imports.py
+"""
+Bulk CSV/XLSX import of plots, sub-plots and materials.
+
+POST /api/imports/<entity>/ and `manage.py import_rows` read the file
+one row at a time: csv.reader, or openpyxl in read-only mode for .xlsx
+(imported on first use, since only .xlsx files need it). Rows are
+handled IMPORT_CHUNK_SIZE at a time:
+
+- Every row goes through the entity's API serializer, so an import
+  enforces the same field rules and validate() checks as the API does.
+  One serializer is built per chunk. Related objects named in the chunk
+  are loaded in one query, not looked up row by row.
+- A row with an `id` updates that object, provided the user may edit it.
+  Any other row creates a new object. Blank cells are left out, so they
+  take the model default on create and keep the stored value on update.
+- The chunk is written with bulk_create and bulk_update. The work the
+  post_save signals would have done is then applied for the whole chunk:
+  map coordinates, the search index, dashboard stats and stock shards.
+
+An import is all or nothing. The whole file is validated, and if any row
+fails, nothing is written and every failure is reported with its row
+number (the header is row 1). A dry run validates and reports without
+writing anything.
+"""
+import csv
+import io
+import zipfile
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import serializers
+
+from . import geo, search, stats, stock
+from .cache import PUBLIC_PLOTS_NAMESPACE, PUBLIC_PRODUCTS_NAMESPACE, bump_namespace_version_on_commit
+from .models import EcommerceProduct, PlotListing, SubPlotUnit, UserType
+from .serializers import EcommerceProductSerializer, PlotListingSerializer, SubPlotUnitSerializer
+
+
+class ImportSpec:
+    def __init__(self, model, serializer_class, editable, fixed=None, can_import=None, cache_namespace=None):
+        self.model = model
+        self.serializer_class = serializer_class
+        # user -> queryset of objects the user may update
+        self.editable = editable
+        # user -> values set on every created object, whatever the file says
+        self.fixed = fixed or (lambda user: {})
+        self.can_import = can_import or (lambda user: True)
+        self.cache_namespace = cache_namespace
+
+
+def _is_admin(user):
+    return user.user_type == UserType.ADMIN
+
+
+IMPORTS = {
+    'plots': ImportSpec(
+        PlotListing, PlotListingSerializer,
+        editable=lambda user: PlotListing.objects.all() if _is_admin(user)
+        else PlotListing.objects.filter(Q(owner=user) | Q(listed_by_agent=user)),
+        fixed=lambda user: {'owner': user},
+        cache_namespace=PUBLIC_PLOTS_NAMESPACE,
+    ),
+    'subplots': ImportSpec(
+        SubPlotUnit, SubPlotUnitSerializer,
+        editable=lambda user: SubPlotUnit.objects.all(),
+    ),
+    'materials': ImportSpec(
+        EcommerceProduct, EcommerceProductSerializer,
+        editable=lambda user: EcommerceProduct.objects.filter(category='material') if _is_admin(user)
+        else EcommerceProduct.objects.filter(category='material', vendor=user),
+        fixed=lambda user: {'vendor': user, 'category': 'material'},
+        can_import=lambda user: user.user_type in (UserType.B2B_VENDOR, UserType.ADMIN),
+        cache_namespace=PUBLIC_PRODUCTS_NAMESPACE,
+    ),
+}
+
+
+class UnreadableFile(Exception):
+    pass
+
+
+class ImportReport:
+    def __init__(self, entity, dry_run, max_errors):
+        self.entity = entity
+        self.dry_run = dry_run
+        self.max_errors = max_errors
+        self.rows = self.created = self.updated = self.error_count = 0
+        self.errors = []
+
+    def add_error(self, row, errors):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'row': row, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'entity': self.entity, 'dry_run': self.dry_run, 'rows': self.rows,
+            'created': self.created, 'updated': self.updated,
+            'error_count': self.error_count, 'errors': self.errors,
+        }
+
+
+# --- Reading files ---
+
+def _clean(header, values):
+    row = {}
+    for name, value in zip(header, values):
+        if isinstance(value, str):
+            value = value.strip()
+        if name and value not in (None, ''):
+            row[name] = value
+    return row
+
+
+def _header(values):
+    return [str(name).strip().lower() if name is not None else '' for name in values]
+
+
+def _csv_rows(binary_file):
+    reader = csv.reader(io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline=''))
+    header = _header(next(reader, []))
+    for number, values in enumerate(reader, start=2):
+        if any(values):
+            yield number, _clean(header, values)
+
+
+def _xlsx_rows(binary_file):
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(binary_file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = _header(next(rows, ()))
+        for number, values in enumerate(rows, start=2):
+            if any(value not in (None, '') for value in values):
+                yield number, _clean(header, values)
+    finally:
+        workbook.close()
+
+
+def read_rows(binary_file, filename):
+    """
+    (row number, {column: value}) for each non-empty data row of a .csv
+    (UTF-8) or .xlsx file. Raises UnreadableFile when the file is neither.
+    """
+    reader = _xlsx_rows if filename.lower().endswith('.xlsx') else _csv_rows
+    try:
+        yield from reader(binary_file)
+    except (UnicodeDecodeError, csv.Error, zipfile.BadZipFile) as e:
+        raise UnreadableFile(f"Could not read {filename}: {e}") from e
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# --- Validating ---
+
+class _LoadedPrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField that reads from objects loaded once for the chunk."""
+
+    def __init__(self, objects, **kwargs):
+        self.objects = objects
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if pk not in self.objects:
+            self.fail('does_not_exist', pk_value=data)
+        return self.objects[pk]
+
+
+def _as_pk(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _chunk_serializer(spec, rows, partial, loaded):
+    """A serializer for validating the chunk's rows one by one, relations preloaded into `loaded`."""
+    serializer = spec.serializer_class(partial=partial)
+    for name, field in list(serializer.fields.items()):
+        if not isinstance(field, serializers.PrimaryKeyRelatedField) or field.read_only:
+            continue
+        if name not in loaded:
+            pks = {_as_pk(row[name]) for _, row in rows if name in row} - {None}
+            loaded[name] = field.get_queryset().in_bulk(pks) if pks else {}
+        options = {'source': field.source} if field.source != name else {}
+        serializer.fields[name] = _LoadedPrimaryKeyField(
+            loaded[name], queryset=field.get_queryset(), required=field.required, allow_null=field.allow_null,
+            **options,
+        )
+    return serializer
+
+
+def _validate_chunk(spec, user, rows, report):
+    """([attrs to create], [(object, attrs to update)]) for the chunk's valid rows."""
+    ids = {_as_pk(row['id']) for _, row in rows if 'id' in row} - {None}
+    existing = spec.editable(user).in_bulk(ids) if ids else {}
+    loaded = {}
+    creating = _chunk_serializer(spec, rows, partial=False, loaded=loaded)
+    updating = _chunk_serializer(spec, rows, partial=True, loaded=loaded)
+
+    creates, updates = [], []
+    for number, row in rows:
+        report.rows += 1
+        obj = None
+        if 'id' in row:
+            obj = existing.get(_as_pk(row['id']))
+            if obj is None:
+                report.add_error(number, {'id': [f"No {spec.model._meta.verbose_name} {row['id']} that you can edit."]})
+                continue
+        serializer = updating if obj else creating
+        serializer.instance = obj
+        try:
+            attrs = serializer.run_validation(row)
+        except serializers.ValidationError as e:
+            report.add_error(number, e.detail)
+            continue
+        if obj:
+            updates.append((obj, attrs))
+        else:
+            creates.append(attrs)
+    return creates, updates
+
+
+# --- Writing ---
+
+def _write_chunk(spec, user, creates, updates, report):
+    model = spec.model
+    fixed = spec.fixed(user)
+    created = [model(**{**attrs, **fixed}) for attrs in creates]
+    for obj in created:
+        geo.fill_coordinates(obj)
+    model.objects.bulk_create(created, batch_size=settings.IMPORT_CHUNK_SIZE)
+
+    updated = [obj for obj, _ in updates]
+    tracked = model in stats.TRACKED_MODELS
+    previous = stats.snapshot(updated) if tracked else None
+    stock_before = {obj.pk: obj.stock_quantity for obj in updated} if model is EcommerceProduct else {}
+    fields = set()
+    for obj, attrs in updates:
+        for name, value in attrs.items():
+            setattr(obj, name, value)
+        fields.update(attrs)
+        if 'google_map_link' in attrs:
+            geo.fill_coordinates(obj)
+            fields.update(('latitude', 'longitude'))
+    if updated and fields:
+        # bulk_update() does not touch auto_now fields itself.
+        now = timezone.now()
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False):
+                for obj in updated:
+                    setattr(obj, field.attname, now)
+                fields.add(field.name)
+        model.objects.bulk_update(updated, sorted(fields), batch_size=1000)
+
+    if tracked:
+        stats.record_created(created)
+        stats.record_updated(updated, previous)
+    if search.is_indexed(model):
+        search.index_objects(created + updated)
+    if model is EcommerceProduct:
+        stock.create_shards(created)
+        for product in updated:
+            if stock.is_stocked(product) and product.stock_quantity != stock_before[product.pk]:
+                stock.set_stock(product, product.stock_quantity)
+    report.created += len(created)
+    report.updated += len(updated)
+
+
+def run_import(entity, rows, user, dry_run=False, chunk_size=None):
+    """
+    Validate and (unless `dry_run`) write `rows` of (row number, {column:
+    value}), e.g. from read_rows(). Returns an ImportReport; a dry run's
+    counts are what the import would create and update. Nothing is
+    written when any row is invalid.
+    """
+    spec = IMPORTS[entity]
+    report = ImportReport(entity, dry_run, settings.IMPORT_MAX_ERRORS)
+    with transaction.atomic():
+        for chunk in _chunks(rows, chunk_size or settings.IMPORT_CHUNK_SIZE):
+            creates, updates = _validate_chunk(spec, user, chunk, report)
+            # After the first invalid row, only validate to complete the report.
+            if report.error_count:
+                continue
+            if dry_run:
+                report.created += len(creates)
+                report.updated += len(updates)
+            else:
+                _write_chunk(spec, user, creates, updates, report)
+        if report.error_count:
+            transaction.set_rollback(True)
+            report.created = report.updated = 0
+        elif spec.cache_namespace and not dry_run:
+            bump_namespace_version_on_commit(spec.cache_namespace)
+    return report
@@ -0,0 +1,177 @@
+# core/inventory.py
+"""
+Square-feet inventory for fractional ('square_feet') plot bookings.
+
+PlotListing.available_sqft_for_investment is the stock. A booking takes a
+SqftReservation hold, which decrements it with a single conditional UPDATE
+per request:
+
+    WITH v(id, area) AS (VALUES ...)
+    UPDATE plot SET available = available - v.area
+    FROM v WHERE plot.id = v.id AND available >= v.area RETURNING plot.id
+
+The database evaluates the condition against the row it locks, so two
+concurrent bookings for the last square feet cannot both succeed, and a
+checkout with many plots still costs one statement. If any plot lacks the
+area, the hold raises InsufficientSqft and its savepoint undoes the other
+decrements.
+
+A hold expires after settings.SQFT_HOLD_MINUTES unless the payment is
+verified (confirm_payment_holds). release_expired_holds(), run by
+`manage.py release_sqft_holds`, returns expired area to the plots and
+cancels the pending bookings. Cancelling or deleting a booking releases
+its hold too (core/signals.py).
+
+These raw updates send no post_save, so they bump the public plot catalog
+cache themselves once they commit.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .cache import PUBLIC_PLOTS_NAMESPACE, bump_namespace_version_on_commit
+from .models import Booking, PlotListing, SqftReservation
+
+
+class InsufficientSqft(Exception):
+    def __init__(self, plot_ids):
+        self.plot_ids = sorted(plot_ids)
+        super().__init__(f"Not enough square feet available on plot(s) {', '.join(map(str, self.plot_ids))}.")
+
+
+def hold_expiry():
+    return timezone.now() + timedelta(minutes=settings.SQFT_HOLD_MINUTES)
+
+
+def _adjust_available(areas, take):
+    """
+    Add (take=False) or conditionally subtract (take=True) `areas`
+    ({plot_id: sqft}) in one statement. Returns the ids of the plots updated.
+    """
+    if not areas:
+        return set()
+    quote = connection.ops.quote_name
+    table = quote(PlotListing._meta.db_table)
+    column = quote('available_sqft_for_investment')
+    values = ', '.join(['(CAST(%s AS INTEGER), CAST(%s AS NUMERIC))'] * len(areas))
+    params = [value for plot_id, area in areas.items() for value in (plot_id, area)]
+    if take:
+        assignment = f"{column} = {table}.{column} - v.area"
+        condition = f" AND {table}.{column} >= v.area"
+    else:
+        assignment = f"{column} = {table}.{column} + v.area"
+        condition = ''
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH v(id, area) AS (VALUES {values}) "
+            f"UPDATE {table} SET {assignment} FROM v WHERE {table}.id = v.id{condition} RETURNING {table}.id",
+            params,
+        )
+        updated = {row[0] for row in cursor.fetchall()}
+    if updated:
+        bump_namespace_version_on_commit(PUBLIC_PLOTS_NAMESPACE)
+    return updated
+
+
+def _areas_by_plot(rows):
+    areas = defaultdict(int)
+    for plot_id, area in rows:
+        areas[plot_id] += area
+    return dict(areas)
+
+
+def hold_sqft(bookings, payment=None):
+    """
+    Take holds for the 'square_feet' bookings among `bookings` (already
+    saved). Returns the SqftReservation rows, or raises InsufficientSqft
+    without changing anything.
+    """
+    bookings = [
+        booking for booking in bookings
+        if booking.booking_type == 'square_feet' and booking.booked_area_sqft
+    ]
+    if not bookings:
+        return []
+    areas = _areas_by_plot((booking.plot_listing_id, booking.booked_area_sqft) for booking in bookings)
+    expires_at = hold_expiry()
+    with transaction.atomic():
+        taken = _adjust_available(areas, take=True)
+        if taken != set(areas):
+            raise InsufficientSqft(set(areas) - taken)
+        return SqftReservation.objects.bulk_create([
+            SqftReservation(
+                plot_id=booking.plot_listing_id, booking=booking, payment=payment,
+                area_sqft=booking.booked_area_sqft, expires_at=expires_at,
+            ) for booking in bookings
+        ])
+
+
+def _release(holds):
+    """Return the area of `holds` (held or confirmed reservations) to their plots."""
+    holds = list(holds.values_list('pk', 'plot_id', 'area_sqft', 'booking_id'))
+    if not holds:
+        return []
+    SqftReservation.objects.filter(pk__in=[pk for pk, _, _, _ in holds]).update(
+        status=SqftReservation.STATUS_RELEASED, updated_at=timezone.now(),
+    )
+    _adjust_available(_areas_by_plot((plot_id, area) for _, plot_id, area, _ in holds), take=False)
+    return [booking_id for _, _, _, booking_id in holds]
+
+
+def release_booking_hold(booking):
+    """Give back the square feet of a cancelled or deleted booking."""
+    with transaction.atomic():
+        _release(
+            SqftReservation.objects.select_for_update().filter(
+                booking_id=booking.pk,
+                status__in=[SqftReservation.STATUS_HELD, SqftReservation.STATUS_CONFIRMED],
+            )
+        )
+
+
+def release_expired_holds(batch_size=500, now=None):
+    """
+    Release one batch of holds past their expiry and cancel their still
+    pending bookings. Returns the number released. Rows locked by another
+    sweeper are skipped, so several can run at once.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        expired = SqftReservation.objects.select_for_update(skip_locked=True).filter(
+            status=SqftReservation.STATUS_HELD, expires_at__lte=now,
+        ).order_by('expires_at')[:batch_size]
+        booking_ids = _release(SqftReservation.objects.filter(pk__in=list(expired.values_list('pk', flat=True))))
+        Booking.objects.filter(pk__in=booking_ids, status='pending').update(status='cancelled')
+    return len(booking_ids)
+
+
+def confirm_payment_holds(payment):
+    """
+    Make the holds taken for `payment` permanent once it is verified. A hold
+    that already expired is taken again if the plot still has the area, and
+    its booking goes back to pending. Returns the number of holds that could
+    not be confirmed.
+    """
+    holds = SqftReservation.objects.filter(payment=payment)
+    with transaction.atomic():
+        holds.filter(status=SqftReservation.STATUS_HELD).update(
+            status=SqftReservation.STATUS_CONFIRMED, updated_at=timezone.now(),
+        )
+        lost = list(
+            holds.select_for_update().filter(status=SqftReservation.STATUS_RELEASED)
+            .values_list('pk', 'plot_id', 'area_sqft', 'booking_id')
+        )
+        # One plot at a time, so a plot that sold out meanwhile does not undo the others.
+        retaken = [(pk, booking_id) for pk, plot_id, area, booking_id in lost
+                   if _adjust_available({plot_id: area}, take=True)]
+        if retaken:
+            SqftReservation.objects.filter(pk__in=[pk for pk, _ in retaken]).update(
+                status=SqftReservation.STATUS_CONFIRMED, updated_at=timezone.now(),
+            )
+            Booking.objects.filter(pk__in=[booking_id for _, booking_id in retaken], status='cancelled').update(
+                status='pending',
+            )
+    return len(lost) - len(retaken)
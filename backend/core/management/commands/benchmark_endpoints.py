@@ -0,0 +1,94 @@
+# core/management/commands/benchmark_endpoints.py
+"""
+Load-test a running server over HTTP and report requests/sec and latency
+per endpoint. Used to compare database connection modes, e.g.:
+
+    CONN_MAX_AGE=0 gunicorn greenheap.wsgi -w 4        # connect per request
+    CONN_MAX_AGE=60 gunicorn greenheap.wsgi -w 4       # persistent connections
+    DATABASE_POOL=true gunicorn greenheap.wsgi -w 4    # psycopg pool
+
+    python manage.py benchmark_endpoints --seed   # once, against the same database
+    python manage.py benchmark_endpoints --cold
+
+The command authenticates as the benchmark client probe by minting a JWT
+directly, so it must point at the same database as the server.
+"""
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.benchmark_data import PROBE_USERNAMES, seed_benchmark_dataset
+from core.models import CustomUser, UserType
+
+
+DEFAULT_PATHS = ['/api/public/plots/', '/api/cart/']
+
+
+class Command(BaseCommand):
+    help = "Measure requests/sec and latency of API endpoints on a running server."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--path', action='append', dest='paths', help="Endpoint to hit (repeatable).")
+        parser.add_argument('--requests', type=int, default=500, help="Requests per endpoint.")
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--cold', action='store_true',
+                            help="Add a unique query parameter to each request so response caches never hit.")
+        parser.add_argument('--seed', action='store_true', help="Seed the benchmark dataset first.")
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            seed_benchmark_dataset()
+        try:
+            user = CustomUser.objects.get(username=PROBE_USERNAMES[UserType.CLIENT])
+        except CustomUser.DoesNotExist:
+            raise CommandError("Benchmark users not found; run with --seed first.")
+        token = str(RefreshToken.for_user(user).access_token)
+
+        for path in options['paths'] or DEFAULT_PATHS:
+            try:
+                result = self.run_endpoint(
+                    options['base_url'].rstrip('/') + path, token,
+                    options['requests'], options['concurrency'], options['cold'],
+                )
+            except requests.ConnectionError as e:
+                raise CommandError(f"Could not reach {options['base_url']}: {e}")
+            self.stdout.write(
+                f"{path:<28} {result['rps']:>8.1f} req/s   p50 {result['p50']:>6.1f} ms   "
+                f"p95 {result['p95']:>6.1f} ms   errors {result['errors']}"
+            )
+
+    def run_endpoint(self, url, token, total, concurrency, cold):
+        # One keep-alive session per client thread, so client-side connects
+        # don't blur the server-side difference being measured.
+        local = threading.local()
+        headers = {'Authorization': f"Bearer {token}"}
+
+        def fetch(i):
+            session = getattr(local, 'session', None)
+            if session is None:
+                session = local.session = requests.Session()
+            params = {'_bench': i} if cold else None
+            started = time.perf_counter()
+            response = session.get(url, headers=headers, params=params, timeout=30)
+            return (time.perf_counter() - started) * 1000, response.status_code
+
+        # Warm up worker processes and caches before timing.
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(fetch, range(-concurrency * 2, 0)))
+            started = time.perf_counter()
+            results = list(pool.map(fetch, range(total)))
+            elapsed = time.perf_counter() - started
+
+        latencies = sorted(ms for ms, _ in results)
+        return {
+            'rps': total / elapsed,
+            'p50': statistics.median(latencies),
+            'p95': latencies[int(len(latencies) * 0.95) - 1],
+            'errors': sum(1 for _, code in results if code != 200),
+        }
@@ -0,0 +1,102 @@
+# core/management/commands/benchmark_payment_orders.py
+"""
+Load-test payment order creation offline, against the fake gateway:
+
+    python manage.py benchmark_payment_orders --orders 1000 --retries 1 --concurrency 32 --latency-ms 150
+
+Each worker thread has its own database connection and runs what
+CreateOrderView does: payments.create_plot_order() with an
+Idempotency-Key. Every order is also sent again `--retries` times with the
+same key, shuffled among the others, the way a client retries after a
+timeout. The command reports requests/sec and checks that every key
+produced exactly one Payment. --latency-ms sets the fake gateway's
+simulated network time. A throwaway plot and user are created and deleted
+afterwards. Run it against Postgres; SQLite serializes writers.
+"""
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.db.models import Count
+from django.test.utils import override_settings
+
+from core import payments
+from core.models import Booking, CustomUser, Payment, PlotListing
+
+
+class Command(BaseCommand):
+    help = "Measure idempotent payment order creation throughput against the fake gateway."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1000)
+        parser.add_argument('--retries', type=int, default=1, help="Extra sends of each order with the same key.")
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--latency-ms', type=int, default=0, help="Simulated gateway round trip.")
+
+    def handle(self, *args, **options):
+        with override_settings(PAYMENT_GATEWAY='fake', PAYMENT_FAKE_LATENCY_MS=options['latency_ms']):
+            self.run(options['orders'], options['retries'], options['concurrency'])
+
+    def run(self, orders, retries, workers):
+        user = CustomUser.objects.create_user(username='payment-benchmark', email='payment-benchmark@bench.local')
+        plot = PlotListing.objects.create(
+            owner=user, title='Payment benchmark plot', location='Bench', total_area_sqft=Decimal('1200.00'),
+            price_per_sqft=Decimal('1000.00'),
+        )
+        keys = [uuid.uuid4().hex for _ in range(orders)]
+        sends = keys * (retries + 1)
+        random.shuffle(sends)
+        try:
+            started = time.perf_counter()
+            shares = [sends[i::workers] for i in range(workers)]
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                outcomes = [
+                    outcome for share in pool.map(lambda share: self.worker(plot, user, share), shares)
+                    for outcome in share
+                ]
+            elapsed = time.perf_counter() - started
+            self.report(user, orders, outcomes, elapsed)
+        finally:
+            Booking.objects.filter(client=user).delete()
+            Payment.objects.filter(user=user).delete()
+            plot.delete()
+            user.delete()
+
+    def worker(self, plot, user, keys):
+        try:
+            return [self.send(plot, user, key) for key in keys]
+        finally:
+            connection.close()
+
+    def send(self, plot, user, key):
+        try:
+            status, _, replayed = payments.create_plot_order(
+                user, plot, 120000, 'full_plot', None, 1200000.0, idempotency_key=key,
+            )
+        except payments.IdempotencyKeyInUse:
+            return 'in use'
+        except (payments.PaymentGatewayError, OperationalError):
+            return 'error'
+        if status != 200:
+            return 'error'
+        return 'replayed' if replayed else 'created'
+
+    def report(self, user, orders, outcomes, elapsed):
+        counts = {outcome: outcomes.count(outcome) for outcome in ('created', 'replayed', 'in use', 'error')}
+        payments_made = Payment.objects.filter(user=user).count()
+        duplicated = (
+            Payment.objects.filter(user=user, idempotency_keys__isnull=False)
+            .values('idempotency_keys__key').annotate(count=Count('pk')).filter(count__gt=1).count()
+        )
+        self.stdout.write(
+            f"{len(outcomes)} requests in {elapsed:.2f}s ({len(outcomes) / elapsed:.0f} requests/sec): "
+            f"{counts['created']} created, {counts['replayed']} replayed, {counts['in use']} in use, "
+            f"{counts['error']} errors"
+        )
+        self.stdout.write(f"{orders} keys, {payments_made} payments, {duplicated} keys with duplicate payments")
+        if payments_made != counts['created'] or duplicated:
+            raise CommandError("A retried request created a second payment.")
@@ -0,0 +1,97 @@
+# core/management/commands/benchmark_sqft_bookings.py
+"""
+Fire concurrent 'square_feet' bookings at one plot and check that it is
+never oversold:
+
+    python manage.py benchmark_sqft_bookings --bookings 500 --concurrency 32
+
+Each worker thread has its own database connection and runs the same
+transaction as the booking views: it creates a Booking and calls
+inventory.hold_sqft(). The plot offers fewer square feet than are
+requested in total, so many bookings must be refused. The command reports
+bookings/sec and compares the area held with the plot's remaining stock. A
+throwaway plot and user are created and deleted afterwards. Run it against
+Postgres; SQLite serializes writers and reports "database is locked" under
+concurrency.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+from django.db.models import Sum
+
+from core import inventory
+from core.models import Booking, CustomUser, PlotListing, SqftReservation
+
+
+class Command(BaseCommand):
+    help = "Measure concurrent sqft booking throughput and verify no plot is oversold."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--sqft-per-booking', type=int, default=10)
+        parser.add_argument('--available', type=int, default=None,
+                            help="Square feet on offer (default: enough for 60%% of the bookings).")
+
+    def handle(self, *args, **options):
+        bookings, area = options['bookings'], Decimal(options['sqft_per_booking'])
+        available = Decimal(options['available'] if options['available'] is not None
+                            else int(bookings * 0.6) * options['sqft_per_booking'])
+        user = CustomUser.objects.create_user(username='sqft-benchmark', email='sqft-benchmark@bench.local')
+        plot = PlotListing.objects.create(
+            owner=user, title='Sqft benchmark plot', location='Bench', total_area_sqft=available,
+            price_per_sqft=Decimal('1000.00'), available_sqft_for_investment=available,
+        )
+        try:
+            started = time.perf_counter()
+            workers = options['concurrency']
+            shares = [bookings // workers + (1 if i < bookings % workers else 0) for i in range(workers)]
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                outcomes = [
+                    outcome for share in pool.map(lambda count: self.worker(plot, user, area, count), shares)
+                    for outcome in share
+                ]
+            elapsed = time.perf_counter() - started
+            self.report(plot, available, outcomes, elapsed)
+        finally:
+            plot.delete()
+            user.delete()
+
+    def worker(self, plot, user, area, count):
+        try:
+            return [self.book(plot, user, area) for _ in range(count)]
+        finally:
+            connection.close()
+
+    def book(self, plot, user, area):
+        try:
+            with transaction.atomic():
+                booking = Booking.objects.create(
+                    plot_listing=plot, client=user, booking_type='square_feet', booked_area_sqft=area,
+                    total_price=area * plot.price_per_sqft,
+                )
+                inventory.hold_sqft([booking])
+            return 'held'
+        except inventory.InsufficientSqft:
+            return 'refused'
+        except OperationalError:
+            return 'error'
+
+    def report(self, plot, available, outcomes, elapsed):
+        plot.refresh_from_db()
+        held = SqftReservation.objects.filter(plot=plot).aggregate(total=Sum('area_sqft'))['total'] or 0
+        counts = {outcome: outcomes.count(outcome) for outcome in ('held', 'refused', 'error')}
+        oversold = held - available if held > available else 0
+        self.stdout.write(
+            f"{len(outcomes)} bookings in {elapsed:.2f}s ({len(outcomes) / elapsed:.0f} bookings/sec): "
+            f"{counts['held']} held, {counts['refused']} refused, {counts['error']} errors"
+        )
+        self.stdout.write(
+            f"Offered {available} sqft, held {held} sqft, {plot.available_sqft_for_investment} left, "
+            f"oversold {oversold} sqft"
+        )
+        if oversold or held + plot.available_sqft_for_investment != available:
+            raise CommandError("Inventory is inconsistent: the plot was oversold.")
@@ -0,0 +1,100 @@
+# core/management/commands/benchmark_stock_reservations.py
+"""
+Flash sale on one material product: fire concurrent orders at it and check
+that it is never oversold.
+
+    python manage.py benchmark_stock_reservations --orders 1000 --concurrency 32 --shards 8
+
+Each worker thread has its own database connection and runs the same
+transaction as MaterialPurchaseCreateView: it creates an Order and calls
+stock.reserve(). The product has fewer units than are ordered in total,
+so many orders must be refused. Run it with --shards 1 and again with the
+default to see what splitting the hot counter buys. A throwaway product and
+users are created and deleted afterwards. Run it against Postgres; SQLite
+serializes writers.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+from django.db.models import Sum
+from django.test.utils import override_settings
+
+from core import stock
+from core.models import CustomUser, EcommerceProduct, Order, StockReservation
+
+
+class Command(BaseCommand):
+    help = "Measure concurrent material order throughput and verify no product is oversold."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--units-per-order', type=int, default=2)
+        parser.add_argument('--shards', type=int, default=None,
+                            help="Shards for the product (default: settings.STOCK_SHARD_COUNT).")
+        parser.add_argument('--available', type=int, default=None,
+                            help="Units on offer (default: enough for 60%% of the orders).")
+
+    def handle(self, *args, **options):
+        orders, units = options['orders'], options['units_per_order']
+        available = (options['available'] if options['available'] is not None
+                     else int(orders * 0.6) * units)
+        shards = options['shards'] or settings.STOCK_SHARD_COUNT
+        with override_settings(STOCK_SHARD_COUNT=shards):
+            self.run(orders, units, available, shards, options['concurrency'])
+
+    def run(self, orders, units, available, shards, workers):
+        user = CustomUser.objects.create_user(username='stock-benchmark', email='stock-benchmark@bench.local')
+        product = EcommerceProduct.objects.create(
+            vendor=user, name='Stock benchmark cement', price=Decimal('400.00'), category='material',
+            stock_quantity=available,
+        )
+        try:
+            started = time.perf_counter()
+            shares = [orders // workers + (1 if i < orders % workers else 0) for i in range(workers)]
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                outcomes = [
+                    outcome for share in pool.map(lambda count: self.worker(product, user, units, count), shares)
+                    for outcome in share
+                ]
+            elapsed = time.perf_counter() - started
+            self.report(product, available, shards, outcomes, elapsed)
+        finally:
+            Order.objects.filter(client=user).delete()
+            product.delete()
+            user.delete()
+
+    def worker(self, product, user, units, count):
+        try:
+            return [self.order(product, user, units) for _ in range(count)]
+        finally:
+            connection.close()
+
+    def order(self, product, user, units):
+        try:
+            with transaction.atomic():
+                order = Order.objects.create(client=user, total_amount=product.price * units)
+                stock.reserve([(order, product, units)])
+            return 'held'
+        except stock.InsufficientStock:
+            return 'refused'
+        except OperationalError:
+            return 'error'
+
+    def report(self, product, available, shards, outcomes, elapsed):
+        held = StockReservation.objects.filter(product=product).aggregate(total=Sum('quantity'))['total'] or 0
+        left = stock.available_stock(product)
+        counts = {outcome: outcomes.count(outcome) for outcome in ('held', 'refused', 'error')}
+        oversold = max(held - available, 0)
+        self.stdout.write(
+            f"{len(outcomes)} orders over {shards} shards in {elapsed:.2f}s "
+            f"({len(outcomes) / elapsed:.0f} orders/sec): "
+            f"{counts['held']} held, {counts['refused']} refused, {counts['error']} errors"
+        )
+        self.stdout.write(f"Offered {available} units, held {held}, {left} left, oversold {oversold}")
+        if oversold or held + left != available:
+            raise CommandError("Stock is inconsistent: the product was oversold.")
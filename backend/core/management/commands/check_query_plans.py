@@ -0,0 +1,172 @@
+# core/management/commands/check_query_plans.py
+"""
+EXPLAIN the hot filter queries behind the API views and fail if any of them
+reads its table with a sequential scan. Run it against the seeded benchmark
+dataset (`manage.py benchmark_endpoints --seed`, or seed_benchmark_dataset()),
+after migrating:
+
+    python manage.py check_query_plans
+
+Each entry in HOT_QUERIES builds the queryset the way its view does, sliced
+to the page size the view serves. On Postgres the involved tables are
+ANALYZEd first, and by default the plans are taken with enable_seqscan off.
+The planner then only falls back to a sequential scan when no index can
+serve the query, so the check does not depend on the tables being large.
+Pass --natural to check the planner's unforced choice instead, which is
+only meaningful on production-sized data. On SQLite the check reads
+EXPLAIN QUERY PLAN.
+"""
+import json
+import re
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core import geo
+from core.benchmark_data import PROBE_USERNAMES
+from core.models import (
+    Booking, CustomUser, EcommerceProduct, KYCDocument, Order, Payment, PlotListing, ShortlistCartItem,
+    SubPlotUnit, UserType,
+)
+
+
+PAGE = 100
+
+
+def _probe(user_type):
+    return CustomUser.objects.get(username=PROBE_USERNAMES[user_type])
+
+
+def _recent_checkpoint(model):
+    # A resumed commission run only reads rows past its checkpoint.
+    last = model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+    return max(last - 200, 0)
+
+
+def _verify_payment():
+    order_id = Payment.objects.order_by('pk').values_list('razorpay_order_id', flat=True).first()
+    return Payment.objects.filter(razorpay_order_id=order_id)
+
+
+def _owner_payments():
+    owner_plot_ids = PlotListing.objects.filter(owner=_probe(UserType.CLIENT)).values_list('id', flat=True)
+    return Payment.objects.filter(plot_id__in=owner_plot_ids).order_by('-created_at')[:PAGE]
+
+
+def _paid_payments_batch():
+    return Payment.objects.filter(status='paid', pk__gt=_recent_checkpoint(Payment)).order_by('pk')[:2000]
+
+
+def _client_bookings():
+    return Booking.objects.filter(client=_probe(UserType.CLIENT)).order_by('-booking_date')
+
+
+def _admin_bookings_page():
+    return Booking.objects.order_by('-booking_date')[:PAGE]
+
+
+def _confirmed_bookings_batch():
+    return Booking.objects.filter(status='confirmed', pk__gt=_recent_checkpoint(Booking)).order_by('pk')[:2000]
+
+
+def _vendor_delivered_orders():
+    return Order.objects.filter(client=_probe(UserType.B2B_VENDOR), status__iexact='DELIVERED')
+
+
+def _active_materials():
+    return EcommerceProduct.objects.filter(category='material', is_active=True).order_by('-pk')[:PAGE]
+
+
+def _project_sub_plots():
+    project_id = SubPlotUnit.objects.order_by('pk').values_list('project_id', flat=True).first()
+    return SubPlotUnit.objects.filter(project_id=project_id, status='Available')
+
+
+def _kyc_page():
+    return KYCDocument.objects.order_by('-upload_date')[:PAGE]
+
+
+def _cart_items_for_plot():
+    plot_id = PlotListing.objects.order_by('pk').values_list('pk', flat=True).first()
+    return ShortlistCartItem.objects.filter(
+        content_type=ContentType.objects.get_for_model(PlotListing), object_id=plot_id,
+    )
+
+
+def _plots_nearby():
+    return geo.nearby(PlotListing.objects.all(), 13.08, 80.27, 5)[:20]
+
+
+# name -> (queryset builder, table that must not be sequentially scanned)
+HOT_QUERIES = {
+    'verify payment by order id': (_verify_payment, Payment),
+    'owner payments by plot': (_owner_payments, Payment),
+    'paid payments after checkpoint': (_paid_payments_batch, Payment),
+    'client bookings': (_client_bookings, Booking),
+    'admin bookings page': (_admin_bookings_page, Booking),
+    'confirmed bookings after checkpoint': (_confirmed_bookings_batch, Booking),
+    'vendor delivered orders (iexact)': (_vendor_delivered_orders, Order),
+    'active materials': (_active_materials, EcommerceProduct),
+    'project sub-plots by status': (_project_sub_plots, SubPlotUnit),
+    'KYC documents page': (_kyc_page, KYCDocument),
+    'cart items for a plot': (_cart_items_for_plot, ShortlistCartItem),
+    'plots within 5 km': (_plots_nearby, PlotListing),
+}
+
+
+def _postgres_seq_scans(queryset):
+    plan = json.loads(queryset.explain(format='json'))
+    scans, nodes = set(), [plan[0]['Plan']]
+    while nodes:
+        node = nodes.pop()
+        if node['Node Type'] == 'Seq Scan':
+            scans.add(node['Relation Name'])
+        nodes.extend(node.get('Plans', []))
+    return scans
+
+
+def _sqlite_seq_scans(queryset):
+    # "SCAN core_payment" is a full table scan; "SCAN ... USING INDEX" and
+    # "SEARCH ..." are index reads.
+    return {
+        match.group(1)
+        for match in re.finditer(r'\bSCAN (?:TABLE )?(\w+)(?! USING)(?:\s|$)', queryset.explain())
+    }
+
+
+class Command(BaseCommand):
+    help = "Fail if a hot API filter query is planned as a sequential scan on the benchmark dataset."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--natural', action='store_true',
+                            help="Postgres: keep sequential scans enabled and check the planner's own choice.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.check_plans(options['natural'])
+
+    def check_plans(self, natural):
+        if not CustomUser.objects.filter(username__in=PROBE_USERNAMES.values()).exists():
+            raise CommandError("Benchmark dataset not found; seed it first (benchmark_endpoints --seed).")
+
+        if connection.vendor == 'postgresql':
+            tables = {model._meta.db_table for _, model in HOT_QUERIES.values()}
+            with connection.cursor() as cursor:
+                for table in sorted(tables):
+                    cursor.execute(f'ANALYZE {connection.ops.quote_name(table)}')
+                if not natural:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            seq_scans = _postgres_seq_scans
+        else:
+            seq_scans = _sqlite_seq_scans
+
+        failures = []
+        for name, (build, model) in HOT_QUERIES.items():
+            scanned = model._meta.db_table in seq_scans(build())
+            self.stdout.write(f"{'SEQ SCAN' if scanned else 'ok':<9} {name}")
+            if scanned:
+                failures.append(name)
+
+        if failures:
+            raise CommandError(f"Sequential scans in hot queries: {', '.join(failures)}")
@@ -0,0 +1,50 @@
+# core/management/commands/compute_referral_commissions.py
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.commissions import SOURCES, get_level_percents, process_batch, reset_checkpoint
+
+
+class Command(BaseCommand):
+    help = (
+        "Create level 1-3 referral commissions for paid payments and confirmed bookings. "
+        "Resumes from the last checkpoint; safe to interrupt and re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', choices=sorted(SOURCES), action='append', dest='sources',
+                            help="Only process this source (repeatable). Default: all.")
+        parser.add_argument('--batch-size', type=int, default=None, help="Transactions read per batch.")
+        parser.add_argument('--restart', action='store_true',
+                            help="Reset the checkpoint and rescan from the first transaction.")
+
+    def handle(self, *args, **options):
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        percents = get_level_percents()
+
+        for source_type in options['sources'] or sorted(SOURCES):
+            if options['restart']:
+                reset_checkpoint(source_type)
+            started = time.perf_counter()
+            read = written = 0
+            while not self._stopping:
+                result = process_batch(source_type, options['batch_size'], percents)
+                if result is None:
+                    break
+                read += result[0]
+                written += result[1]
+            self.stdout.write(
+                f"{source_type}: {read} transactions, {written} commission rows "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+            if self._stopping:
+                self.stdout.write("Stopped; the next run resumes from the checkpoint.")
+                break
+
+    def _stop(self, signum, frame):
+        # Finish the batch in flight, then exit.
+        self._stopping = True
@@ -0,0 +1,60 @@
+# core/management/commands/import_rows.py
+"""
+Bulk import of plots, sub-plots or materials from a CSV or XLSX file, as
+POST /api/imports/<entity>/ does it (see core/imports.py):
+
+    python manage.py import_rows subplots layout.xlsx --user admin --dry-run
+    python manage.py import_rows materials catalog.csv --user vendor1
+
+--user is the account the rows are imported as: it owns created plots,
+sells created materials, and limits which existing rows (by `id`) may be
+updated. Nothing is written when any row is invalid; the failing rows
+are listed and the command exits with an error.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core import imports
+
+
+class Command(BaseCommand):
+    help = "Create or update plots, sub-plots or materials from a CSV/XLSX file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('entity', choices=sorted(imports.IMPORTS))
+        parser.add_argument('path', help="A .csv (UTF-8) or .xlsx file; the first row names the columns.")
+        parser.add_argument('--user', required=True, help="Username to import as.")
+        parser.add_argument('--dry-run', action='store_true', help="Validate and report only; write nothing.")
+        parser.add_argument('--chunk-size', type=int, default=None, help="Rows per step (default: IMPORT_CHUNK_SIZE).")
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user {options['user']}.")
+        entity = options['entity']
+        if not imports.IMPORTS[entity].can_import(user):
+            raise CommandError(f"{user.username} cannot import {entity}.")
+
+        started = time.perf_counter()
+        try:
+            with open(options['path'], 'rb') as upload:
+                report = imports.run_import(
+                    entity, imports.read_rows(upload, options['path']), user,
+                    dry_run=options['dry_run'], chunk_size=options['chunk_size'],
+                )
+        except (OSError, imports.UnreadableFile) as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+
+        for error in report.errors:
+            self.stdout.write(f"row {error['row']}: {error['errors']}")
+        would = 'would be ' if report.dry_run else ''
+        self.stdout.write(
+            f"{report.rows} rows in {elapsed:.1f}s ({report.rows / max(elapsed, 1e-9):,.0f} rows/s): "
+            f"{report.created} {would}created, {report.updated} {would}updated, {report.error_count} invalid"
+        )
+        if report.error_count:
+            raise CommandError(f"{report.error_count} invalid rows; nothing was written.")
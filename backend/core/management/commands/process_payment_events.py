@@ -0,0 +1,38 @@
+# core/management/commands/process_payment_events.py
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.webhooks import process_payment_events
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply stored Razorpay webhook events to payments and bookings in batches. "
+        "Resumes from the last checkpoint; safe to interrupt and re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Apply the pending events once and exit.")
+        parser.add_argument('--batch-size', type=int, default=None, help="Events applied per transaction.")
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help="Seconds to sleep when no events are pending.")
+
+    def handle(self, *args, **options):
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        while not self._stopping:
+            read, paid = process_payment_events(options['batch_size'])
+            if read:
+                self.stdout.write(f"Applied {read} payment events, {paid} payments marked paid")
+            else:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+
+    def _stop(self, signum, frame):
+        # Finish the batch in flight, then exit.
+        self._stopping = True
@@ -0,0 +1,18 @@
+# core/management/commands/rebuild_referral_tree.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.referrals import rebuild_referral_paths
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the referral closure table from CustomUser.referred_by. "
+        "Signals keep it current; run this after bulk-loading users."
+    )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rows = rebuild_referral_paths()
+        self.stdout.write(f"Referral tree rebuilt: {rows} paths in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,18 @@
+# core/management/commands/rebuild_search_index.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the search index from plots, projects, products and commercial properties. "
+        "Signals keep it current; run this after bulk imports or queryset.update()."
+    )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        entries = rebuild_search_index()
+        self.stdout.write(f"Search index rebuilt: {entries} entries in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,93 @@
+# core/management/commands/reconcile_payments.py
+"""
+Nightly check of local payments against the gateway's settlement report:
+
+    python manage.py reconcile_payments                     # yesterday's settlements, from Razorpay
+    python manage.py reconcile_payments --date 2025-06-30 --export settlements.csv --dry-run
+
+Every payment Razorpay settled should exist locally as a paid Payment for
+the same amount. A settled payment that is still unpaid here is marked paid
+through payments.mark_paid(), the same path as the webhook, unless
+--dry-run is given. A settled order that is unknown here, or whose amount
+differs, needs a person to look at it: those are listed and the command
+exits with an error, so a cron job reports them. --export reads a
+downloaded settlement CSV instead of calling the gateway; with
+PAYMENT_GATEWAY=fake the report comes from PAYMENT_FAKE_SETTLEMENT_FILE.
+"""
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core import payments
+from core.models import Payment
+
+
+CHUNK = 1000
+
+
+class Command(BaseCommand):
+    help = "Diff local payments against the gateway settlement report and mark settled payments paid."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=date.fromisoformat, default=None,
+                            help="Settlement date, YYYY-MM-DD (default: yesterday).")
+        parser.add_argument('--export', default=None, help="Settlement CSV to use instead of the gateway.")
+        parser.add_argument('--dry-run', action='store_true', help="Report only; change nothing.")
+
+    def handle(self, *args, **options):
+        day = options['date'] or timezone.localdate() - timedelta(days=1)
+        if options['export']:
+            rows = [row for row in payments.read_settlement_csv(options['export'])
+                    if row['settled_on'] in (None, day)]
+        else:
+            try:
+                rows = payments.get_gateway().settlement_report(day)
+            except payments.PaymentGatewayError as e:
+                raise CommandError(f"Could not fetch the settlement report: {e}")
+
+        local = {}
+        order_ids = [row['order_id'] for row in rows if row['order_id']]
+        for start in range(0, len(order_ids), CHUNK):
+            for order_id, status, amount in Payment.objects.filter(
+                razorpay_order_id__in=order_ids[start:start + CHUNK],
+            ).values_list('razorpay_order_id', 'status', 'amount_paise'):
+                local[order_id] = (status, amount)
+
+        unknown, wrong_amount, unpaid = [], [], {}
+        matched = 0
+        for row in rows:
+            if row['order_id'] not in local:
+                unknown.append(row)
+                continue
+            status, amount = local[row['order_id']]
+            if amount != row['amount']:
+                wrong_amount.append((row, amount))
+                continue
+            if status != 'paid':
+                unpaid[row['order_id']] = row['payment_id']
+                continue
+            matched += 1
+
+        marked = 0
+        if unpaid and not options['dry_run']:
+            for start in range(0, len(unpaid), CHUNK):
+                chunk = dict(list(unpaid.items())[start:start + CHUNK])
+                marked += len(payments.mark_paid(chunk)[0])
+
+        for row in unknown:
+            self.stdout.write(f"UNKNOWN   {row['payment_id']} order {row['order_id']}: settled, no local payment")
+        for row, amount in wrong_amount:
+            self.stdout.write(
+                f"AMOUNT    {row['payment_id']} order {row['order_id']}: settled {row['amount']} paise, "
+                f"local {amount} paise"
+            )
+        for order_id, payment_id in unpaid.items():
+            action = 'would mark paid' if options['dry_run'] else 'marked paid'
+            self.stdout.write(f"UNPAID    {payment_id} order {order_id}: settled, {action}")
+        self.stdout.write(
+            f"{day}: {len(rows)} settled payments, {matched} matched, {len(unpaid)} unpaid locally ({marked} marked paid), {len(unknown)} unknown, "
+            f"{len(wrong_amount)} amount mismatches"
+        )
+        if unknown or wrong_amount:
+            raise CommandError("Settlement report does not match local payments.")
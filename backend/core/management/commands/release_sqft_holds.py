@@ -0,0 +1,37 @@
+# core/management/commands/release_sqft_holds.py
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.inventory import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = "Return the square feet of expired, unpaid booking holds to their plots."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Release the expired holds once and exit.")
+        parser.add_argument('--batch-size', type=int, default=None, help="Holds released per transaction.")
+        parser.add_argument('--interval', type=float, default=30.0,
+                            help="Seconds to sleep when nothing has expired.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size'] or settings.SQFT_HOLD_SWEEP_BATCH_SIZE
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        while not self._stopping:
+            released = release_expired_holds(batch_size)
+            if released:
+                self.stdout.write(f"Released {released} expired sqft holds")
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['interval'])
+
+    def _stop(self, signum, frame):
+        # Finish the batch in flight, then exit.
+        self._stopping = True
@@ -0,0 +1,41 @@
+# core/management/commands/release_stock_holds.py
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.stock import release_expired_stock, sync_stock_quantities
+
+
+class Command(BaseCommand):
+    help = (
+        "Return the stock of expired material order holds to their products and "
+        "refresh EcommerceProduct.stock_quantity from the stock ledger."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Release the expired holds once and exit.")
+        parser.add_argument('--batch-size', type=int, default=None, help="Holds released per transaction.")
+        parser.add_argument('--interval', type=float, default=10.0,
+                            help="Seconds to sleep when nothing has expired.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size'] or settings.STOCK_HOLD_SWEEP_BATCH_SIZE
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        while not self._stopping:
+            released = release_expired_stock(batch_size)
+            synced = sync_stock_quantities()
+            if released or synced:
+                self.stdout.write(f"Released {released} expired stock holds, refreshed {synced} products")
+            if not released:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+
+    def _stop(self, signum, frame):
+        # Finish the batch in flight, then exit.
+        self._stopping = True
@@ -0,0 +1,36 @@
+# core/management/commands/run_outbox.py
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.outbox import process_outbox
+from utils.messaging import close_transports
+
+
+class Command(BaseCommand):
+    help = "Deliver queued email, SMS and WhatsApp notifications from the outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Drain due messages once and exit.")
+        parser.add_argument('--batch-size', type=int, default=None, help="Messages claimed per pass.")
+        parser.add_argument('--interval', type=float, default=2.0, help="Seconds to sleep when the outbox is empty.")
+
+    def handle(self, *args, **options):
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        while not self._stopping:
+            sent, failed = process_outbox(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(f"Outbox: {sent} sent, {failed} failed")
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['interval'])
+        close_transports()
+
+    def _stop(self, signum, frame):
+        # Finish the batch in flight, then exit.
+        self._stopping = True
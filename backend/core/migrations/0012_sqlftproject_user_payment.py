@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-17 18:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_verifiedplot_customuser_company_name_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sqlftproject',
+            name='user',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sqlft_projects', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.CreateModel(
+            name='Payment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('plot_id', models.IntegerField()),
+                ('razorpay_order_id', models.CharField(max_length=100)),
+                ('razorpay_payment_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('amount', models.FloatField()),
+                ('status', models.CharField(max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
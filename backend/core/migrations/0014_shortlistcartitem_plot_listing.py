@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_plot_listing(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    PlotListing = apps.get_model('core', 'PlotListing')
+    ShortlistCartItem = apps.get_model('core', 'ShortlistCartItem')
+    plot_ct = ContentType.objects.filter(app_label='core', model='plotlisting').first()
+    if plot_ct is None:
+        return
+    # Items pointing at deleted plots stay unlinked.
+    ShortlistCartItem.objects.filter(
+        content_type=plot_ct,
+        object_id__in=PlotListing.objects.values('id'),
+    ).update(plot_listing_id=models.F('object_id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0013_notificationoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shortlistcartitem',
+            name='plot_listing',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='shortlist_items', to='core.plotlisting'),
+        ),
+        migrations.AddIndex(
+            model_name='shortlistcartitem',
+            index=models.Index(fields=['plot_listing', '-added_at'], name='cartitem_plot_added_idx'),
+        ),
+        migrations.RunPython(backfill_plot_listing, migrations.RunPython.noop),
+    ]
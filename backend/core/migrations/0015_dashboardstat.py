@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_shortlistcartitem_plot_listing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=50)),
+                ('period', models.CharField(choices=[('total', 'Total'), ('day', 'Day'), ('month', 'Month')], max_length=10)),
+                ('bucket', models.DateField(help_text='Start of the day or month; a fixed date for totals.')),
+                ('value', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('metric', 'period', 'bucket'), name='dashboard_stat_unique_bucket')],
+            },
+        ),
+    ]
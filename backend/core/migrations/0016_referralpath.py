@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_referral_paths(apps, schema_editor):
+    from core.referrals import rebuild_referral_paths
+    rebuild_referral_paths(apps.get_model('core', 'ReferralPath'), apps.get_model('core', 'CustomUser'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_dashboardstat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReferralPath',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='downline_paths', to=settings.AUTH_USER_MODEL)),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upline_paths', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ancestor', 'depth', 'descendant'], name='referral_path_downline_idx'), models.Index(fields=['descendant', 'depth'], name='referral_path_upline_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='referral_path_unique_pair')],
+            },
+        ),
+        migrations.RunPython(build_referral_paths, migrations.RunPython.noop),
+    ]
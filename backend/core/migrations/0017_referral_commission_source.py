@@ -0,0 +1,46 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_referralpath'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BatchCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('position', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='referralcommission',
+            name='amount',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True),
+        ),
+        migrations.AddField(
+            model_name='referralcommission',
+            name='base_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True),
+        ),
+        migrations.AddField(
+            model_name='referralcommission',
+            name='source_id',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='referralcommission',
+            name='source_type',
+            field=models.CharField(blank=True, choices=[('payment', 'Payment'), ('booking', 'Booking')], max_length=20, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='referralcommission',
+            constraint=models.UniqueConstraint(fields=('source_type', 'source_id', 'level'), name='referral_commission_unique_source'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:24
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0017_referral_commission_source'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['client', '-booking_date'], name='booking_client_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['-booking_date'], name='booking_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'id'], name='booking_status_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ecommerceproduct',
+            index=models.Index(fields=['category', 'is_active'], name='product_category_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kycdocument',
+            index=models.Index(fields=['-upload_date'], name='kyc_upload_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(models.F('client'), django.db.models.functions.text.Upper('status'), name='order_client_upper_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['razorpay_order_id'], name='payment_order_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['plot_id', '-created_at'], name='payment_plot_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', 'id'], name='payment_status_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shortlistcartitem',
+            index=models.Index(fields=['content_type', 'object_id'], name='cartitem_object_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subplotunit',
+            index=models.Index(fields=['project', 'status'], name='subplot_project_status_idx'),
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:27
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+POSTGRES_FORWARDS = [
+    """
+    CREATE OR REPLACE FUNCTION core_searchentry_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.location, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.body, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER core_searchentry_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, location, body ON core_searchentry
+    FOR EACH ROW EXECUTE FUNCTION core_searchentry_vector_update()
+    """,
+    "CREATE INDEX searchentry_vector_gin ON core_searchentry USING gin (search_vector)",
+]
+
+# Typo-tolerant location matching; skipped where the contrib package is not installed.
+TRIGRAM_FORWARDS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX searchentry_location_trgm ON core_searchentry USING gin (location gin_trgm_ops)",
+]
+
+POSTGRES_BACKWARDS = [
+    "DROP INDEX IF EXISTS searchentry_location_trgm",
+    "DROP INDEX IF EXISTS searchentry_vector_gin",
+    "DROP TRIGGER IF EXISTS core_searchentry_vector_trigger ON core_searchentry",
+    "DROP FUNCTION IF EXISTS core_searchentry_vector_update()",
+]
+
+
+def _run_on_postgres(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            for statement in statements:
+                schema_editor.execute(statement)
+    return run
+
+
+def install_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+    for statement in TRIGRAM_FORWARDS:
+        schema_editor.execute(statement)
+
+
+def build_search_index(apps, schema_editor):
+    from core.search import rebuild_search_index
+    rebuild_search_index(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0018_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('kind', models.CharField(choices=[('plot', 'Plot'), ('project', 'Micro-plot project'), ('material', 'Material'), ('service', 'Service'), ('product', 'Other product'), ('commercial', 'Commercial property')], max_length=20)),
+                ('title', models.CharField(max_length=255)),
+                ('location', models.CharField(blank=True, max_length=255)),
+                ('body', models.TextField(blank=True)),
+                ('is_public', models.BooleanField(default=True, help_text='Listed in the public /search/ endpoint.')),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(editable=False, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('content_type', 'object_id'), name='search_entry_unique_object')],
+            },
+        ),
+        migrations.RunPython(_run_on_postgres(POSTGRES_FORWARDS), _run_on_postgres(POSTGRES_BACKWARDS)),
+        migrations.RunPython(install_trigram_index, migrations.RunPython.noop),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:31
+
+from django.db import migrations, models
+
+
+def fill_project_coordinates(apps, schema_editor):
+    # Only micro-plot projects had map links before this migration.
+    from core.geo import parse_map_link
+    SQLFTProject = apps.get_model('core', 'SQLFTProject')
+    projects = []
+    for project in SQLFTProject.objects.exclude(google_map_link__isnull=True).exclude(google_map_link='').iterator():
+        coordinates = parse_map_link(project.google_map_link)
+        if coordinates:
+            project.latitude, project.longitude = coordinates
+            projects.append(project)
+    SQLFTProject.objects.bulk_update(projects, ['latitude', 'longitude'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_searchentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='commercialproperty',
+            name='google_map_link',
+            field=models.URLField(blank=True, max_length=500, null=True),
+        ),
+        migrations.AddField(
+            model_name='commercialproperty',
+            name='latitude',
+            field=models.FloatField(blank=True, help_text='Filled from google_map_link on save when the link has coordinates.', null=True),
+        ),
+        migrations.AddField(
+            model_name='commercialproperty',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='plotlisting',
+            name='google_map_link',
+            field=models.URLField(blank=True, max_length=500, null=True),
+        ),
+        migrations.AddField(
+            model_name='plotlisting',
+            name='latitude',
+            field=models.FloatField(blank=True, help_text='Filled from google_map_link on save when the link has coordinates.', null=True),
+        ),
+        migrations.AddField(
+            model_name='plotlisting',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='sqlftproject',
+            name='latitude',
+            field=models.FloatField(blank=True, help_text='Filled from google_map_link on save when the link has coordinates.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sqlftproject',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='commercialproperty',
+            index=models.Index(fields=['latitude', 'longitude'], name='commercial_lat_lng_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='plotlisting',
+            index=models.Index(fields=['latitude', 'longitude'], name='plot_lat_lng_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sqlftproject',
+            index=models.Index(fields=['latitude', 'longitude'], name='project_lat_lng_idx'),
+        ),
+        migrations.RunPython(fill_project_coordinates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_listing_coordinates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SqftReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('area_sqft', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('status', models.CharField(choices=[('held', 'Held'), ('confirmed', 'Confirmed'), ('released', 'Released')], default='held', max_length=10)),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('booking', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='sqft_reservation', to='core.booking')),
+                ('payment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sqft_reservations', to='core.payment')),
+                ('plot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sqft_reservations', to='core.plotlisting')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'expires_at'], name='sqft_hold_due_idx')],
+            },
+        ),
+    ]
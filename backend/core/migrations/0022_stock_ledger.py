@@ -0,0 +1,55 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_stock_shards(apps, schema_editor):
+    from core.stock import create_shards
+    create_shards(apps.get_model('core', 'EcommerceProduct').objects.iterator(), apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_sqft_reservation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('available', models.IntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_shards', to='core.ecommerceproduct')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('held', 'Held'), ('committed', 'Committed'), ('released', 'Released')], default='held', max_length=10)),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_reservations', to='core.order')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_reservations', to='core.ecommerceproduct')),
+                ('shard', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='core.stockshard')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='stockshard',
+            constraint=models.UniqueConstraint(fields=('product', 'shard'), name='stock_shard_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='stockshard',
+            constraint=models.CheckConstraint(condition=models.Q(('available__gte', 0)), name='stock_shard_not_negative'),
+        ),
+        migrations.AddIndex(
+            model_name='stockreservation',
+            index=models.Index(fields=['status', 'expires_at'], name='stock_hold_due_idx'),
+        ),
+        migrations.RunPython(create_stock_shards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_payment_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReceiptSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(unique=True)),
+                ('last_number', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PaymentReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.CharField(max_length=40, unique=True)),
+                ('base_amount', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('service_tax', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('sgst', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('cgst', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('pdf', models.FileField(upload_to='receipts/%Y/%m/')),
+                ('etag', models.CharField(max_length=64)),
+                ('issued_at', models.DateTimeField(auto_now_add=True)),
+                ('payment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='receipt', to='core.payment')),
+            ],
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:59
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+import django.db.models.functions.math
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_payment_receipts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='payment',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='amount_paise',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Cast(django.db.models.functions.math.Round(django.db.models.expressions.CombinedExpression(models.F('amount'), '*', models.Value(100))), models.BigIntegerField()), output_field=models.BigIntegerField()),
+        ),
+    ]
@@ -1,15 +1,17 @@
 # core/models.py
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Cast, Round, Upper
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
 import random
 import string
 import datetime
 from django.utils import timezone
-from django.core.mail import EmailMessage
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.postgres.search import SearchVectorField
 import uuid
 
 
@@ -144,20 +146,15 @@ class CustomUser(AbstractUser):
     def send_otp_email(self, otp):
         try:
             if self.email:
-                # smtp_user = "azeema224143@gmail.com"
-                # smtp_pass = "buwqswksuljoxjvm"
-                smtp_user = settings.EMAIL_HOST_USER
-                smtp_pass = settings.EMAIL_HOST_PASSWORD
-
-                email_msg = EmailMessage(
+                # Delivered by `manage.py run_outbox`.
+                NotificationOutbox.enqueue_email(
+                    to=self.email,
                     subject="Your OTP Code",
                     body=f"Your OTP code is: {otp}",
-                    from_email=smtp_user,
-                    to=[self.email],
+                    from_email=settings.EMAIL_HOST_USER,
                 )
-                email_msg.send(fail_silently=False)
         except Exception as e:
-            print(f"Error sending OTP email: {e}")
+            print(f"Error queueing OTP email: {e}")
 
     def verify_otp(self, otp_code):
         try:
@@ -174,6 +171,11 @@ class CustomUser(AbstractUser):
             print(f"Error verifying OTP: {e}")
             return False
 
+    def clean(self):
+        super().clean()
+        from .referrals import check_referrer  # referrals imports this module
+        check_referrer(self, self.referred_by_id)
+
     def save(self, *args, **kwargs):
         try:
             if not self.user_code:
@@ -211,6 +213,10 @@ class PlotListing(models.Model):
     owner_name = models.CharField(max_length=255)  # <-- Add this line
     title = models.CharField(max_length=255)
     location = models.CharField(max_length=255)
+    google_map_link = models.URLField(max_length=500, blank=True, null=True)
+    latitude = models.FloatField(null=True, blank=True,
+                                 help_text="Filled from google_map_link on save when the link has coordinates.")
+    longitude = models.FloatField(null=True, blank=True)
     total_area_sqft = models.DecimalField(max_digits=10, decimal_places=2)
     price_per_sqft = models.DecimalField(max_digits=10, decimal_places=2)
     is_available_full = models.BooleanField(default=True)
@@ -233,6 +239,12 @@ class PlotListing(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Radius search: bounding-box range on latitude, then longitude (core/geo.py).
+            models.Index(fields=['latitude', 'longitude'], name='plot_lat_lng_idx'),
+        ]
+
     @property
     def owner_name(self):
         return self.owner.get_full_name() or self.owner.username or self.owner.email
@@ -276,6 +288,16 @@ class Booking(models.Model):
     booking_date = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=50, default='pending') # e.g., pending, confirmed, cancelled
 
+    class Meta:
+        indexes = [
+            # Client booking lists, newest first.
+            models.Index(fields=['client', '-booking_date'], name='booking_client_date_idx'),
+            # Admin booking lists, keyset-paginated on booking_date.
+            models.Index(fields=['-booking_date'], name='booking_date_idx'),
+            # Commission engine: status = 'confirmed' AND id > checkpoint ORDER BY id.
+            models.Index(fields=['status', 'id'], name='booking_status_id_idx'),
+        ]
+
     def __str__(self):
         try:
             return f"{self.client.username} - {self.booking_type} for {self.plot_listing.title}"
@@ -300,6 +322,12 @@ class EcommerceProduct(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Public material/service catalogs: category = ? AND is_active.
+            models.Index(fields=['category', 'is_active'], name='product_category_active_idx'),
+        ]
+
     def __str__(self):
         try:
             return self.name
@@ -327,6 +355,13 @@ class Order(models.Model):
     order_date = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=50, default='pending')
 
+    class Meta:
+        indexes = [
+            # Vendor earnings/history filter on client and status__iexact, which
+            # Postgres compiles to UPPER(status) = UPPER(...).
+            models.Index(F('client'), Upper('status'), name='order_client_upper_status_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.order_id:
             self.order_id = generate_order_id()
@@ -399,12 +434,67 @@ class PlotInquiry(models.Model):
 
 
 class ReferralCommission(models.Model):
+    SOURCE_CHOICES = [
+        ('payment', 'Payment'),
+        ('booking', 'Booking'),
+    ]
+
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='earned_commissions')
     referred_user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='given_commissions')
     level = models.PositiveSmallIntegerField()  # 1, 2, or 3
     commission_percent = models.DecimalField(max_digits=4, decimal_places=2)
     status = models.CharField(max_length=20, choices=[('Active', 'Active'), ('Pending', 'Pending'), ('Inactive', 'Inactive')])
     created_at = models.DateTimeField(auto_now_add=True)
+    # Set by the commission engine (core/commissions.py); empty on hand-made rows.
+    source_type = models.CharField(max_length=20, choices=SOURCE_CHOICES, null=True, blank=True)
+    source_id = models.PositiveBigIntegerField(null=True, blank=True)
+    base_amount = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    amount = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['source_type', 'source_id', 'level'], name='referral_commission_unique_source',
+            ),
+        ]
+
+
+class BatchCheckpoint(models.Model):
+    """
+    Progress marker for a resumable batch job: the last primary key the job
+    has fully processed. Updated in the same transaction as each batch.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    position = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
+
+
+class ReferralPath(models.Model):
+    """
+    Closure table over CustomUser.referred_by: one row for every
+    (ancestor, descendant) pair in the referral tree, including each user
+    paired with itself at depth 0. A whole downline or upline is then a
+    single indexed lookup instead of one query per level. Maintained by
+    core/referrals.py from user signals.
+    """
+    ancestor = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='downline_paths')
+    descendant = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='upline_paths')
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='referral_path_unique_pair'),
+        ]
+        indexes = [
+            models.Index(fields=['ancestor', 'depth', 'descendant'], name='referral_path_downline_idx'),
+            models.Index(fields=['descendant', 'depth'], name='referral_path_upline_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
 
 
 class SQLFTProject(models.Model):
@@ -416,6 +506,9 @@ class SQLFTProject(models.Model):
     project_name = models.CharField(max_length=255)
     location = models.CharField(max_length=255)
     google_map_link = models.URLField(blank=True, null=True)
+    latitude = models.FloatField(null=True, blank=True,
+                                 help_text="Filled from google_map_link on save when the link has coordinates.")
+    longitude = models.FloatField(null=True, blank=True)
     description = models.TextField()
     plot_type = models.CharField(max_length=100)
     unit = models.CharField(max_length=10, choices=UNIT_CHOICES)
@@ -426,6 +519,11 @@ class SQLFTProject(models.Model):
     land_document = models.FileField(upload_to='land_documents/', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['latitude', 'longitude'], name='project_lat_lng_idx'),
+        ]
+
     def __str__(self):
         return self.project_name
 
@@ -441,6 +539,11 @@ class SubPlotUnit(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'status'], name='subplot_project_status_idx'),
+        ]
+
     def __str__(self):
         return f"{self.plot_number} - {self.project.project_name}"
 
@@ -485,6 +588,11 @@ class KYCDocument(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='submitted')
     upload_date = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-upload_date'], name='kyc_upload_date_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.document_type}"
 
@@ -541,6 +649,26 @@ class ShortlistCartItem(models.Model):
     content_object = GenericForeignKey('content_type', 'object_id')
     quantity = models.PositiveIntegerField(null=True, blank=True)
     added_at = models.DateTimeField(auto_now_add=True)
+    # Typed copy of the generic relation for plot items, kept in sync by
+    # save(). Lets agent/owner dashboards find interest in their plots with
+    # an indexed join instead of resolving every cart item.
+    plot_listing = models.ForeignKey(
+        PlotListing, on_delete=models.CASCADE, null=True, blank=True, editable=False,
+        related_name='shortlist_items'
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['plot_listing', '-added_at'], name='cartitem_plot_added_idx'),
+            # Generic relation lookups: content_type = ? AND object_id = ?.
+            models.Index(fields=['content_type', 'object_id'], name='cartitem_object_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Callers that bulk_create must set plot_listing themselves.
+        is_plot = self.content_type_id == ContentType.objects.get_for_model(PlotListing).id
+        self.plot_listing_id = self.object_id if is_plot else None
+        super().save(*args, **kwargs)
 
 class CallRequest(models.Model):
     STATUS_CHOICES = [
@@ -615,6 +743,10 @@ class CommercialProperty(models.Model):
     locality = models.CharField(max_length=100)
     city = models.CharField(max_length=100)
     pincode = models.CharField(max_length=20, blank=True)
+    google_map_link = models.URLField(max_length=500, blank=True, null=True)
+    latitude = models.FloatField(null=True, blank=True,
+                                 help_text="Filled from google_map_link on save when the link has coordinates.")
+    longitude = models.FloatField(null=True, blank=True)
 
     area_sqft = models.DecimalField(max_digits=10, decimal_places=2)
     is_for_sale = models.BooleanField(default=False)
@@ -639,6 +771,11 @@ class CommercialProperty(models.Model):
 
     added_date = models.DateField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['latitude', 'longitude'], name='commercial_lat_lng_idx'),
+        ]
+
     def __str__(self):
         return f"{self.property_name} - {self.city}"
     
@@ -648,9 +785,339 @@ class Payment(models.Model):
     plot_id = models.IntegerField()
     razorpay_order_id = models.CharField(max_length=100)
     razorpay_payment_id = models.CharField(max_length=100, blank=True, null=True)
-    amount = models.FloatField()
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    # Kept by the database; summaries add up integers (core/money.py).
+    amount_paise = models.GeneratedField(
+        expression=Cast(Round(F('amount') * 100), models.BigIntegerField()),
+        output_field=models.BigIntegerField(),
+        db_persist=True,
+    )
     status = models.CharField(max_length=20)
     created_at = models.DateTimeField(auto_now_add=True)
+    # The booking this payment pays for; confirmed once the payment is captured.
+    booking = models.ForeignKey(Booking, on_delete=models.SET_NULL, null=True, blank=True, related_name='payments')
+
+    class Meta:
+        indexes = [
+            # VerifyPaymentView looks payments up by order id.
+            models.Index(fields=['razorpay_order_id'], name='payment_order_id_idx'),
+            # OwnerPaymentListView: plot_id IN (...) ORDER BY -created_at.
+            models.Index(fields=['plot_id', '-created_at'], name='payment_plot_created_idx'),
+            # Commission engine: status = 'paid' AND id > checkpoint ORDER BY id.
+            models.Index(fields=['status', 'id'], name='payment_status_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"Payment {self.id} - {self.user.username} - {self.status}"
+
+class NotificationOutbox(models.Model):
+    """
+    Transactional outbox for email, SMS and WhatsApp. Request handlers only
+    insert a row (inside their own transaction); `manage.py run_outbox`
+    delivers pending rows with retry and backoff.
+    """
+    CHANNEL_EMAIL = 'email'
+    CHANNEL_SMS = 'sms'
+    CHANNEL_WHATSAPP = 'whatsapp'
+    CHANNEL_CHOICES = [
+        (CHANNEL_EMAIL, 'Email'),
+        (CHANNEL_SMS, 'SMS'),
+        (CHANNEL_WHATSAPP, 'WhatsApp'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    recipient = models.CharField(max_length=255)
+    subject = models.CharField(max_length=255, blank=True)
+    body = models.TextField()
+    is_html = models.BooleanField(default=False)
+    from_email = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.channel} to {self.recipient} ({self.status})"
+
+    @classmethod
+    def enqueue_email(cls, to, subject, body, from_email=None, is_html=False):
+        return cls.objects.create(
+            channel=cls.CHANNEL_EMAIL,
+            recipient=to,
+            subject=subject,
+            body=body,
+            is_html=is_html,
+            from_email=from_email or '',
+        )
+
+    @classmethod
+    def enqueue_sms(cls, to, body):
+        return cls.objects.create(channel=cls.CHANNEL_SMS, recipient=to, body=body)
+
+    @classmethod
+    def enqueue_whatsapp(cls, to, body):
+        return cls.objects.create(channel=cls.CHANNEL_WHATSAPP, recipient=to, body=body)
+
+
+class DashboardStat(models.Model):
+    """
+    Pre-aggregated admin dashboard figures (see core/stats.py). Totals live
+    in one row per metric; bookings are also bucketed per day and per month.
+    Save/delete signals keep the rows current with in-place increments and
+    `manage.py refresh_dashboard_stats` rebuilds them from the source tables.
+    """
+    PERIOD_TOTAL = 'total'
+    PERIOD_DAY = 'day'
+    PERIOD_MONTH = 'month'
+    PERIOD_CHOICES = [
+        (PERIOD_TOTAL, 'Total'),
+        (PERIOD_DAY, 'Day'),
+        (PERIOD_MONTH, 'Month'),
+    ]
+
+    metric = models.CharField(max_length=50)
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    bucket = models.DateField(help_text="Start of the day or month; a fixed date for totals.")
+    value = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['metric', 'period', 'bucket'], name='dashboard_stat_unique_bucket'),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} {self.period} {self.bucket}: {self.value}"
+
+
+class SearchEntry(models.Model):
+    """
+    One searchable document per plot, micro-plot project, product and
+    commercial property (see core/search.py). Signals keep the text columns
+    in step with the source rows. On Postgres a trigger fills search_vector
+    (title weighted A, location B, body C), and GIN indexes cover the vector
+    and the trigram index on location. Those indexes and the trigger are
+    created by migration 0019 rather than declared here, because SQLite has
+    no equivalent.
+    """
+    KIND_PLOT = 'plot'
+    KIND_PROJECT = 'project'
+    KIND_MATERIAL = 'material'
+    KIND_SERVICE = 'service'
+    KIND_PRODUCT = 'product'
+    KIND_COMMERCIAL = 'commercial'
+    KIND_CHOICES = [
+        (KIND_PLOT, 'Plot'),
+        (KIND_PROJECT, 'Micro-plot project'),
+        (KIND_MATERIAL, 'Material'),
+        (KIND_SERVICE, 'Service'),
+        (KIND_PRODUCT, 'Other product'),
+        (KIND_COMMERCIAL, 'Commercial property'),
+    ]
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    title = models.CharField(max_length=255)
+    location = models.CharField(max_length=255, blank=True)
+    body = models.TextField(blank=True)
+    is_public = models.BooleanField(default=True, help_text="Listed in the public /search/ endpoint.")
+    search_vector = SearchVectorField(null=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='search_entry_unique_object'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}: {self.title}"
+
+
+class SqftReservation(models.Model):
+    """
+    Square feet of a plot held for a 'square_feet' booking (see
+    core/inventory.py). Creating a hold decrements
+    PlotListing.available_sqft_for_investment with a conditional UPDATE, so
+    concurrent bookings can never oversell a plot. A verified payment
+    confirms the hold; otherwise `manage.py release_sqft_holds` returns the
+    area to the plot once expires_at has passed.
+    """
+    STATUS_HELD = 'held'
+    STATUS_CONFIRMED = 'confirmed'
+    STATUS_RELEASED = 'released'
+    STATUS_CHOICES = [
+        (STATUS_HELD, 'Held'),
+        (STATUS_CONFIRMED, 'Confirmed'),
+        (STATUS_RELEASED, 'Released'),
+    ]
+
+    plot = models.ForeignKey(PlotListing, on_delete=models.CASCADE, related_name='sqft_reservations')
+    booking = models.OneToOneField(Booking, on_delete=models.CASCADE, related_name='sqft_reservation')
+    payment = models.ForeignKey(Payment, on_delete=models.SET_NULL, null=True, blank=True,
+                                related_name='sqft_reservations')
+    area_sqft = models.DecimalField(max_digits=10, decimal_places=2)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_HELD)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Sweeper: status = 'held' AND expires_at <= now.
+            models.Index(fields=['status', 'expires_at'], name='sqft_hold_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.area_sqft} sqft of plot {self.plot_id} ({self.status})"
+
+
+class StockShard(models.Model):
+    """
+    One slice of a product's available stock (see core/stock.py). Stock is
+    split over settings.STOCK_SHARD_COUNT rows so that concurrent orders
+    for the same product usually decrement different rows instead of
+    queueing on one row lock. Available stock is the sum over the shards.
+    """
+    product = models.ForeignKey(EcommerceProduct, on_delete=models.CASCADE, related_name='stock_shards')
+    shard = models.PositiveSmallIntegerField()
+    available = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'shard'], name='stock_shard_unique'),
+            models.CheckConstraint(condition=models.Q(available__gte=0), name='stock_shard_not_negative'),
+        ]
+
+    def __str__(self):
+        return f"Product {self.product_id} shard {self.shard}: {self.available}"
+
+
+class StockReservation(models.Model):
+    """
+    Units taken from one StockShard for one order line. Held rows expire
+    after settings.STOCK_HOLD_MINUTES unless the order is confirmed
+    (committed); expired and cancelled holds go back to their shard.
+    """
+    STATUS_HELD = 'held'
+    STATUS_COMMITTED = 'committed'
+    STATUS_RELEASED = 'released'
+    STATUS_CHOICES = [
+        (STATUS_HELD, 'Held'),
+        (STATUS_COMMITTED, 'Committed'),
+        (STATUS_RELEASED, 'Released'),
+    ]
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='stock_reservations')
+    product = models.ForeignKey(EcommerceProduct, on_delete=models.CASCADE, related_name='stock_reservations')
+    shard = models.ForeignKey(StockShard, on_delete=models.CASCADE, related_name='reservations')
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_HELD)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'expires_at'], name='stock_hold_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x product {self.product_id} for order {self.order_id} ({self.status})"
+
+
+class IdempotencyKey(models.Model):
+    """
+    A client-supplied Idempotency-Key for a payment request (see
+    core/payments.py). The first request with a key claims the row; once it
+    finishes, its response is stored here and replayed to any retry with the
+    same key, so a retried request never creates a second order.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    # SHA-256 of the request parameters; reusing a key for a different request is refused.
+    request_hash = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    payment = models.ForeignKey(Payment, on_delete=models.SET_NULL, null=True, blank=True,
+                                related_name='idempotency_keys')
+    locked_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_key_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.response_status or 'in progress'})"
+
+
+class PaymentEvent(models.Model):
+    """
+    A Razorpay webhook delivery, stored exactly as received (see
+    core/webhooks.py). Rows are only ever inserted: the webhook acknowledges
+    as soon as the row is written, and `manage.py process_payment_events`
+    applies them later in batches, tracking its progress with a
+    BatchCheckpoint. Razorpay may deliver an event more than once; the
+    consumer skips event ids it has already seen.
+    """
+    event_id = models.CharField(max_length=100)
+    body = models.TextField()
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Consumer: has this event id been seen before?
+            models.Index(fields=['event_id'], name='payment_event_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"Event {self.event_id}"
+
+
+class ReceiptSequence(models.Model):
+    """The last receipt number issued in each year (see core/receipts.py)."""
+    year = models.PositiveSmallIntegerField(unique=True)
+    last_number = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.year}: {self.last_number}"
+
+
+class PaymentReceipt(models.Model):
+    """
+    The receipt issued for a paid Payment (see core/receipts.py): its
+    number, the tax breakdown in exact decimals and the PDF, rendered once
+    and stored under MEDIA_ROOT. etag is the PDF's SHA-256, which the
+    receipt endpoint sends so clients can revalidate without downloading it
+    again.
+    """
+    payment = models.OneToOneField(Payment, on_delete=models.CASCADE, related_name='receipt')
+    number = models.CharField(max_length=40, unique=True)
+    base_amount = models.DecimalField(max_digits=14, decimal_places=2)
+    service_tax = models.DecimalField(max_digits=14, decimal_places=2)
+    sgst = models.DecimalField(max_digits=14, decimal_places=2)
+    cgst = models.DecimalField(max_digits=14, decimal_places=2)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2)
+    pdf = models.FileField(upload_to='receipts/%Y/%m/')
+    etag = models.CharField(max_length=64)
+    issued_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"Payment {self.id} - {self.user.username} - {self.status}"
\ No newline at end of file
+        return self.number
@@ -0,0 +1,149 @@
+# core/outbox.py
+"""
+Delivery side of the notification outbox (see NotificationOutbox).
+
+Views enqueue rows with NotificationOutbox.enqueue_*; `manage.py run_outbox`
+calls process_outbox() in a loop. Each pass claims a batch of due rows,
+delivers them on a thread pool with a per-channel concurrency limit and
+records the outcome. Failed rows are retried with exponential backoff until
+they run out of attempts.
+"""
+import logging
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from utils import messaging
+
+from .models import NotificationOutbox
+
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def deliver_email(message):
+    messaging.send_email(
+        message.recipient,
+        message.subject,
+        message.body,
+        from_email=message.from_email,
+        is_html=message.is_html,
+    )
+
+
+def deliver_sms(message):
+    messaging.send_sms(message.recipient, message.body)
+
+
+def deliver_whatsapp(message):
+    messaging.send_whatsapp(message.recipient, message.body)
+
+
+DELIVERY_HANDLERS = {
+    NotificationOutbox.CHANNEL_EMAIL: deliver_email,
+    NotificationOutbox.CHANNEL_SMS: deliver_sms,
+    NotificationOutbox.CHANNEL_WHATSAPP: deliver_whatsapp,
+}
+
+
+def get_backoff(attempts):
+    """Seconds to wait before retry number `attempts`, doubling each time, with jitter."""
+    base = _setting('OUTBOX_BACKOFF_SECONDS', 30)
+    cap = _setting('OUTBOX_BACKOFF_MAX_SECONDS', 3600)
+    delay = min(base * 2 ** max(attempts - 1, 0), cap)
+    return delay + random.uniform(0, delay * 0.1)
+
+
+def claim_due_messages(limit):
+    """
+    Lock up to `limit` due rows and lease them to this worker. Rows stuck in
+    'sending' past their lease (a worker died mid-batch) are picked up again.
+    SKIP LOCKED lets several workers drain the table without blocking each other.
+    """
+    now = timezone.now()
+    lease = timedelta(seconds=_setting('OUTBOX_LEASE_SECONDS', 300))
+    with transaction.atomic():
+        due = list(
+            NotificationOutbox.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(status='pending', next_attempt_at__lte=now)
+                | Q(status='sending', locked_until__lt=now)
+            )
+            .order_by('next_attempt_at')
+            .values_list('pk', flat=True)[:limit]
+        )
+        NotificationOutbox.objects.filter(pk__in=due).update(status='sending', locked_until=now + lease)
+    return list(NotificationOutbox.objects.filter(pk__in=due).order_by('next_attempt_at'))
+
+
+def mark_sent(message):
+    message.status = 'sent'
+    message.attempts += 1
+    message.sent_at = timezone.now()
+    message.locked_until = None
+    message.last_error = ''
+    message.save(update_fields=['status', 'attempts', 'sent_at', 'locked_until', 'last_error'])
+
+
+def mark_failed(message, error):
+    message.attempts += 1
+    message.last_error = str(error)[:2000]
+    message.locked_until = None
+    if message.attempts >= message.max_attempts:
+        message.status = 'failed'
+        logger.error("Outbox message %s gave up after %s attempts: %s", message.pk, message.attempts, error)
+    else:
+        message.status = 'pending'
+        message.next_attempt_at = timezone.now() + timedelta(seconds=get_backoff(message.attempts))
+    message.save(update_fields=['status', 'attempts', 'last_error', 'locked_until', 'next_attempt_at'])
+
+
+def _channel_limits():
+    limits = {channel: 4 for channel in DELIVERY_HANDLERS}
+    limits.update(_setting('OUTBOX_CONCURRENCY', {}))
+    return limits
+
+
+def process_outbox(batch_size=None):
+    """
+    Deliver one batch of due messages. Returns (sent, failed) counts.
+
+    Only the network calls run on the thread pool; rows are claimed and
+    updated on the calling thread, so workers never need their own
+    database connections.
+    """
+    messages = claim_due_messages(batch_size or _setting('OUTBOX_BATCH_SIZE', 50))
+    if not messages:
+        return 0, 0
+
+    limits = _channel_limits()
+    semaphores = {channel: threading.BoundedSemaphore(limit) for channel, limit in limits.items()}
+
+    def deliver(message):
+        with semaphores[message.channel]:
+            DELIVERY_HANDLERS[message.channel](message)
+
+    sent = failed = 0
+    with ThreadPoolExecutor(max_workers=sum(limits.values())) as pool:
+        futures = {pool.submit(deliver, message): message for message in messages}
+        for future in as_completed(futures):
+            message = futures[future]
+            error = future.exception()
+            if error is None:
+                mark_sent(message)
+                sent += 1
+            else:
+                mark_failed(message, error)
+                failed += 1
+    return sent, failed
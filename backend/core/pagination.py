@@ -0,0 +1,62 @@
+# core/pagination.py
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Pagination for the admin list endpoints, whose tables grow without bound.
+    Views opt in with `pagination_class`; there is no global default, so
+    other lists keep returning every row.
+
+    Pages are keyset (cursor) reads of `API_PAGE_SIZE` rows, capped at
+    `max_page_size` rows. The body
+    keeps the plain list shape existing clients expect; the next/previous
+    page URLs are sent in an RFC 8288 `Link` header instead of an envelope.
+
+    Ordering follows the view's queryset (or model Meta.ordering), falling
+    back to newest-first by primary key, and an OrderingFilter on the view
+    still takes precedence.
+    """
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(queryset.query.order_by) or tuple(queryset.model._meta.ordering)
+        if not ordering or not all(isinstance(field, str) and '__' not in field and field != '?' for field in ordering):
+            ordering = ('-pk',)
+        self.ordering = ordering
+        return super().get_ordering(request, queryset, view)
+
+    def get_link_headers(self):
+        links = []
+        next_url = self.get_next_link()
+        previous_url = self.get_previous_link()
+        if next_url:
+            links.append(f'<{next_url}>; rel="next"')
+        if previous_url:
+            links.append(f'<{previous_url}>; rel="prev"')
+        return {'Link': ', '.join(links)} if links else {}
+
+    def get_paginated_response(self, data):
+        return Response(data, headers=self.get_link_headers())
+
+    def get_paginated_response_schema(self, schema):
+        return schema
+
+
+class PublicCatalogCursorPagination(KeysetPagination):
+    """
+    Keyset pagination for the public plot catalog, newest first. Each page is
+    a single indexed range read, so cost does not grow with the size of the
+    catalog. Like the admin lists, the body is the plain list of plots and
+    the next/previous page URLs are in the `Link` header.
+    """
+    page_size = 24
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        return self.ordering
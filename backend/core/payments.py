@@ -0,0 +1,339 @@
+# core/payments.py
+"""
+Payment gateway access and idempotent order creation.
+
+The gateway client is created once per process (get_gateway). Its
+requests.Session keeps a keep-alive connection pool to Razorpay and has a
+timeout, so a request does not pay for a TLS handshake on every order and
+cannot hang on a slow gateway. settings.PAYMENT_GATEWAY = 'fake' swaps in
+FakeGateway, which makes orders locally, so payment creation can be
+load-tested offline (`manage.py benchmark_payment_orders`).
+
+create_plot_order() calls the gateway first, outside any transaction. It
+then creates the Booking, its square-feet hold and the Payment in one
+transaction, so a failure leaves no half-written booking and no row lock
+is held while waiting on the network.
+
+A client may send an Idempotency-Key header. The first request with a key
+claims an IdempotencyKey row (unique per user and key) and stores its
+response when it finishes. Retries get that response back instead of a
+second order. A retry that arrives while the first request is still
+running gets IdempotencyKeyInUse. A key whose request died is claimable
+again after settings.PAYMENT_IDEMPOTENCY_LOCK_SECONDS.
+
+mark_paid() is the one place a payment becomes paid. VerifyPaymentView,
+the webhook consumer (core/webhooks.py) and `manage.py reconcile_payments`
+all go through it, so a payment confirmed twice, for example by the
+browser and then by the webhook, still gets one receipt.
+"""
+import csv
+import hashlib
+import json
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+import razorpay
+import requests
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import commissions, inventory, money, stats
+from .models import Booking, IdempotencyKey, Payment, PlotListing, SqftReservation
+from .receipts import send_payment_receipt_email
+
+
+class PaymentGatewayError(Exception):
+    """The gateway could not create the order; the request can be retried."""
+
+
+class IdempotencyKeyInUse(Exception):
+    def __init__(self):
+        super().__init__("A request with this Idempotency-Key is still being processed.")
+
+
+class IdempotencyKeyMismatch(Exception):
+    def __init__(self):
+        super().__init__("This Idempotency-Key was already used for a different request.")
+
+
+# --- Gateways ---
+
+class _TimeoutSession(requests.Session):
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, *args, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(*args, **kwargs)
+
+
+class RazorpayGateway:
+    def __init__(self):
+        self.key_id = settings.RAZORPAY_KEY_ID
+        session = _TimeoutSession(settings.PAYMENT_HTTP_TIMEOUT)
+        # Only connection failures are retried: an order POST that reached
+        # Razorpay must not be replayed and create a second order.
+        retries = Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.2)
+        session.mount('https://', HTTPAdapter(pool_maxsize=settings.PAYMENT_HTTP_POOL_SIZE, max_retries=retries))
+        self.client = razorpay.Client(session=session, auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
+
+    def create_order(self, amount):
+        """Create an order for `amount` paise. Returns Razorpay's order dict."""
+        try:
+            return self.client.order.create({'amount': amount, 'currency': 'INR', 'payment_capture': '1'})
+        except (razorpay.errors.BadRequestError, razorpay.errors.GatewayError,
+                razorpay.errors.ServerError, requests.RequestException, ValueError) as e:
+            raise PaymentGatewayError(str(e) or e.__class__.__name__) from e
+
+    def settlement_report(self, day, page_size=1000):
+        """Captured payments settled on `day`, as settlement rows (see settlement_row)."""
+        rows, skip = [], 0
+        while True:
+            try:
+                page = self.client.settlement.report({
+                    'year': day.year, 'month': day.month, 'day': day.day, 'count': page_size, 'skip': skip,
+                })
+            except (razorpay.errors.BadRequestError, razorpay.errors.GatewayError,
+                    razorpay.errors.ServerError, requests.RequestException, ValueError) as e:
+                raise PaymentGatewayError(str(e) or e.__class__.__name__) from e
+            items = page.get('items', [])
+            rows += [settlement_row(item) for item in items if item.get('type') == 'payment']
+            if len(items) < page_size:
+                return rows
+            skip += page_size
+
+    def close(self):
+        self.client.session.close()
+
+
+class FakeGateway:
+    """Creates orders locally, after settings.PAYMENT_FAKE_LATENCY_MS of simulated network time."""
+
+    def __init__(self):
+        self.key_id = settings.RAZORPAY_KEY_ID or 'rzp_test_fake'
+
+    def create_order(self, amount):
+        if settings.PAYMENT_FAKE_LATENCY_MS:
+            time.sleep(settings.PAYMENT_FAKE_LATENCY_MS / 1000)
+        return {
+            'id': f"order_fake{uuid.uuid4().hex[:14]}", 'entity': 'order', 'amount': amount,
+            'currency': 'INR', 'status': 'created',
+        }
+
+    def settlement_report(self, day):
+        """Rows of the CSV export at settings.PAYMENT_FAKE_SETTLEMENT_FILE settled on `day` (or undated)."""
+        if not settings.PAYMENT_FAKE_SETTLEMENT_FILE:
+            return []
+        return [
+            row for row in read_settlement_csv(settings.PAYMENT_FAKE_SETTLEMENT_FILE)
+            if row['settled_on'] in (None, day)
+        ]
+
+    def close(self):
+        pass
+
+
+GATEWAYS = {
+    'razorpay': RazorpayGateway,
+    'fake': FakeGateway,
+}
+
+_gateways = {}
+_gateways_lock = threading.Lock()
+
+
+def get_gateway():
+    """The process-wide client for settings.PAYMENT_GATEWAY."""
+    name = settings.PAYMENT_GATEWAY
+    with _gateways_lock:
+        if name not in _gateways:
+            _gateways[name] = GATEWAYS[name]()
+        return _gateways[name]
+
+
+def close_gateways():
+    with _gateways_lock:
+        for gateway in _gateways.values():
+            gateway.close()
+        _gateways.clear()
+
+
+# --- Settlement exports ---
+
+def settlement_row(item):
+    """{payment_id, order_id, amount (paise), settled_on} from a Razorpay recon item or export CSV row."""
+    settled_on = item.get('settled_on') or item.get('settled_at')
+    if isinstance(settled_on, int):
+        settled_on = datetime.fromtimestamp(settled_on, tz=dt_timezone.utc).date()
+    elif settled_on:
+        settled_on = date.fromisoformat(str(settled_on)[:10])
+    return {
+        'payment_id': item.get('entity_id') or item.get('payment_id'),
+        'order_id': item.get('order_id') or None,
+        'amount': int(item['amount']),
+        'settled_on': settled_on or None,
+    }
+
+
+def read_settlement_csv(path):
+    """
+    Settlement rows from a CSV export with an entity_id (or payment_id),
+    order_id and amount (paise) column, and optionally type and settled_on.
+    Rows whose type is not 'payment' (refunds, adjustments) are skipped.
+    """
+    with open(path, newline='') as export:
+        return [
+            settlement_row(item) for item in csv.DictReader(export)
+            if item.get('type', 'payment') == 'payment'
+        ]
+
+
+# --- Idempotency keys ---
+
+def request_fingerprint(params):
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def claim_idempotency_key(user, key, fingerprint):
+    """
+    (claimed row, None) when this request should run, or (None, finished
+    row) when it already ran and its stored response should be replayed.
+    """
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(user=user, key=key, request_hash=fingerprint), None
+    except IntegrityError:
+        pass
+    existing = IdempotencyKey.objects.get(user=user, key=key)
+    if existing.request_hash != fingerprint:
+        raise IdempotencyKeyMismatch()
+    if existing.response_status is not None:
+        return None, existing
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.PAYMENT_IDEMPOTENCY_LOCK_SECONDS)
+    # Take over a key whose request died, unless another retry got there first.
+    if IdempotencyKey.objects.filter(
+        pk=existing.pk, response_status__isnull=True, locked_at=existing.locked_at, locked_at__lt=stale,
+    ).update(locked_at=now):
+        existing.locked_at = now
+        return existing, None
+    raise IdempotencyKeyInUse()
+
+
+def _store_response(record, status, body, payment=None):
+    record.response_status, record.response_body, record.payment = status, body, payment
+    record.save(update_fields=['response_status', 'response_body', 'payment'])
+
+
+# --- Orders ---
+
+def create_plot_order(user, plot, amount, booking_type, booked_area_sqft, total_price, idempotency_key=None):
+    """
+    Create a gateway order for `amount` paise, then the plot's Booking,
+    square-feet hold and Payment. Returns (status, body, replayed); a
+    replayed response is the stored one of an earlier request with the same
+    key. Raises PaymentGatewayError, IdempotencyKeyInUse or
+    IdempotencyKeyMismatch.
+    """
+    record = None
+    if idempotency_key:
+        fingerprint = request_fingerprint({
+            'plot_id': plot.pk, 'amount': amount, 'booking_type': booking_type,
+            'booked_area_sqft': booked_area_sqft,
+        })
+        record, finished = claim_idempotency_key(user, idempotency_key, fingerprint)
+        if finished:
+            return finished.response_status, finished.response_body, True
+    gateway = get_gateway()
+    try:
+        order = gateway.create_order(amount)
+        try:
+            with transaction.atomic():
+                booking = Booking.objects.create(
+                    plot_listing=plot,
+                    client=user,
+                    booking_type=booking_type,
+                    booked_area_sqft=booked_area_sqft if booking_type == 'square_feet' else None,
+                    total_price=total_price,
+                    status='pending',
+                )
+                holds = inventory.hold_sqft([booking])
+                payment = Payment.objects.create(
+                    user=user, plot_id=plot.pk, razorpay_order_id=order['id'], amount=money.from_paise(amount),
+                    status='created', booking=booking,
+                )
+                if holds:
+                    SqftReservation.objects.filter(booking=booking).update(payment=payment)
+                status, body = 200, {'order_id': order['id'], 'amount': amount, 'key_id': gateway.key_id}
+                if record:
+                    _store_response(record, status, body, payment)
+        except inventory.InsufficientSqft as e:
+            status, body = 409, {'error': str(e)}
+            if record:
+                _store_response(record, status, body)
+    except Exception:
+        # Nothing was recorded: free the key so the client can retry.
+        if record:
+            record.delete()
+        raise
+    return status, body, False
+
+
+# --- Captured and failed payments ---
+
+def mark_paid(captured):
+    """
+    Mark the payments of `captured` ({razorpay order id: razorpay payment
+    id}) paid, in bulk, unless they already are. Their bookings are
+    confirmed, their square-feet holds made permanent and a receipt is
+    queued for each. Returns (payments newly paid, holds that could not be
+    confirmed).
+    """
+    if not captured:
+        return [], 0
+    with transaction.atomic():
+        paid = list(
+            Payment.objects.select_for_update().select_related('user')
+            .filter(razorpay_order_id__in=list(captured)).exclude(status='paid').order_by('pk')
+        )
+        if not paid:
+            return [], 0
+        for payment in paid:
+            payment.status = 'paid'
+            payment.razorpay_payment_id = captured[payment.razorpay_order_id] or payment.razorpay_payment_id
+        Payment.objects.bulk_update(paid, ['status', 'razorpay_payment_id'])
+        # The bulk update sends no signals. Unpaid payments contribute nothing
+        # to the revenue rollup, so the whole contribution is new.
+        stats.record_created(paid)
+        commissions.rewind_checkpoint('payment', paid[0].pk)
+
+        holds = SqftReservation.objects.filter(payment__in=paid)
+        holds.filter(status=SqftReservation.STATUS_HELD).update(
+            status=SqftReservation.STATUS_CONFIRMED, updated_at=timezone.now(),
+        )
+        expired = set(holds.filter(status=SqftReservation.STATUS_RELEASED).values_list('payment_id', flat=True))
+        lost = sum(inventory.confirm_payment_holds(payment) for payment in paid if payment.pk in expired)
+
+        # After the holds: a hold that expired cancelled its booking, and
+        # retaking it puts the booking back to pending to be confirmed here.
+        booking_ids = [payment.booking_id for payment in paid if payment.booking_id]
+        if booking_ids and Booking.objects.filter(pk__in=booking_ids, status='pending').update(status='confirmed'):
+            commissions.rewind_checkpoint('booking', min(booking_ids))
+
+        plots = PlotListing.objects.in_bulk({payment.plot_id for payment in paid})
+        for payment in paid:
+            send_payment_receipt_email(payment, payment.user, plots.get(payment.plot_id))
+    return paid, lost
+
+
+def mark_failed(order_ids):
+    """Record failed attempts for orders still awaiting payment. The customer may retry the same order."""
+    if not order_ids:
+        return 0
+    return Payment.objects.filter(razorpay_order_id__in=list(order_ids), status='created').update(status='failed')
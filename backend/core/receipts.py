@@ -0,0 +1,165 @@
+# core/receipts.py
+"""
+Payment receipts.
+
+issue_receipt() runs once per paid payment. It takes the next number from
+the year's ReceiptSequence (GAFPL/<year>/<000001>), computes the taxes in
+exact decimals and renders the PDF. The PaymentReceipt row is saved in
+the caller's transaction, and the PDF is written under MEDIA_ROOT once
+that transaction commits. Later requests for the receipt
+(/api/payments/<id>/receipt/) serve that stored file with its ETag, and
+issuing again returns the existing receipt.
+
+The email body and the PDF text come from Django templates in
+core/templates/core/receipts/. They are compiled on first use and then
+kept for the life of the process. The PDF is laid out by utils/pdf.py,
+which needs no PDF library.
+"""
+import hashlib
+import logging
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, connection, transaction
+from django.template.loader import get_template
+from django.utils import timezone
+
+from utils.pdf import render_text_pdf
+
+from .models import NotificationOutbox, PaymentReceipt, PlotListing, ReceiptSequence
+from .money import TAXES, from_paise, tax_paise, to_paise
+
+
+logger = logging.getLogger(__name__)
+
+NUMBER_PREFIX = 'GAFPL'
+COMPANY = {
+    'name': 'Greenheap Agro Farms Private Limited',
+    'address_line1': 'Sri,Anant,GF NO: 1B, 11th Sector, 66th Street,',
+    'address_line2': 'Kalaignar Karunanidhi Nagar, Chennai 600 078',
+    'email': 'support@cashbackfarms.com',
+    'website': 'www.cashbackfarms.com',
+    'phone': '+91 8190019991',
+    'gstin': '33AAJCG6869K2ZZ (Tamil Nadu)',
+}
+
+
+@lru_cache(maxsize=None)
+def _template(name):
+    return get_template(f'core/receipts/{name}')
+
+
+def compute_amounts(amount):
+    """Base, each tax and the total, rounded half up to the paisa (as money.summarize() does)."""
+    base = to_paise(amount)
+    paise = {'base_amount': base}
+    for _, field, rate in TAXES:
+        paise[field] = tax_paise(base, rate)
+    paise['total_amount'] = sum(paise.values())
+    return {field: from_paise(value) for field, value in paise.items()}
+
+
+def next_receipt_number(year):
+    """Take the year's next number in one upsert; the row stays locked until the transaction ends."""
+    table = connection.ops.quote_name(ReceiptSequence._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (year, last_number) VALUES (%s, 1) "
+            f"ON CONFLICT (year) DO UPDATE SET last_number = {table}.last_number + 1 RETURNING last_number",
+            [year],
+        )
+        number = cursor.fetchone()[0]
+    return f"{NUMBER_PREFIX}/{year}/{number:06d}"
+
+
+def _context(receipt, payment, user, plot):
+    return {
+        'company': COMPANY,
+        'receipt_number': receipt.number,
+        'date': payment.created_at.strftime('%B %d, %Y'),
+        'client_name': f"{user.first_name} {user.last_name}".strip() or user.username,
+        'payment_mode': 'UPI',  # Razorpay does not report the method back yet
+        'razorpay_order_id': payment.razorpay_order_id,
+        'razorpay_payment_id': payment.razorpay_payment_id or '',
+        'description': plot.title if plot else 'Plot Purchase',
+        'base_amount': f"{receipt.base_amount:,.2f}",
+        'taxes': [(label, f"{getattr(receipt, field):,.2f}") for label, field, _ in TAXES],
+        'total_amount': f"{receipt.total_amount:,.2f}",
+    }
+
+
+def _render_pdf(receipt, payment, plot):
+    lines = _template('payment_receipt.txt').render(_context(receipt, payment, payment.user, plot))
+    return render_text_pdf(lines.splitlines(), title=f"Payment Receipt {receipt.number}")
+
+
+def _write_pdf(receipt, pdf):
+    if getattr(receipt, '_pdf_written', False):
+        return
+    name = receipt.pdf.storage.save(receipt.pdf.name, ContentFile(pdf))
+    if name != receipt.pdf.name:
+        # A file was already stored under that name; point the receipt at this one.
+        receipt.pdf.name = name
+        PaymentReceipt.objects.filter(pk=receipt.pk).update(pdf=name)
+    receipt._pdf_written = True
+
+
+def issue_receipt(payment, plot=None):
+    """The payment's receipt, numbered, rendered and stored on first call."""
+    existing = PaymentReceipt.objects.filter(payment=payment).first()
+    if existing:
+        return existing
+    try:
+        with transaction.atomic():
+            receipt = PaymentReceipt(
+                payment=payment, number=next_receipt_number(timezone.localdate().year),
+                **compute_amounts(payment.amount),
+            )
+            pdf = _render_pdf(receipt, payment, plot)
+            receipt.etag = hashlib.sha256(pdf).hexdigest()
+            receipt.pdf.name = receipt.pdf.field.generate_filename(receipt, f"{receipt.number.replace('/', '-')}.pdf")
+            receipt.save()
+            # The file is written once the row commits, so a rolled-back payment leaves none behind.
+            receipt._pending_pdf = pdf
+            transaction.on_commit(lambda: _write_pdf(receipt, pdf))
+            return receipt
+    except IntegrityError:
+        # Issued concurrently for the same payment; that one's number stands.
+        return PaymentReceipt.objects.get(payment=payment)
+
+
+def ensure_pdf(receipt):
+    """
+    Write the receipt's PDF now if it is not stored: the transaction that
+    issued it has not committed yet, or its process stopped before the
+    commit hook ran.
+    """
+    if not receipt.pdf.storage.exists(receipt.pdf.name):
+        pdf = getattr(receipt, '_pending_pdf', None)
+        if pdf is None:
+            plot = PlotListing.objects.filter(pk=receipt.payment.plot_id).first()
+            pdf = _render_pdf(receipt, receipt.payment, plot)
+            receipt.etag = hashlib.sha256(pdf).hexdigest()
+            PaymentReceipt.objects.filter(pk=receipt.pk).update(etag=receipt.etag)
+        _write_pdf(receipt, pdf)
+    return receipt
+
+
+def send_payment_receipt_email(payment, user, plot=None):
+    """
+    Issue the receipt and queue it to the user (delivered by run_outbox)
+    """
+    try:
+        receipt = issue_receipt(payment, plot)
+        NotificationOutbox.enqueue_email(
+            to=user.email,
+            subject=f'Payment Receipt - {receipt.number}',
+            body=_template('payment_receipt.html').render(_context(receipt, payment, user, plot)),
+            from_email=settings.EMAIL_HOST_USER,
+            is_html=True,
+        )
+        return True
+    except Exception:
+        logger.exception("Error queueing payment receipt email for payment %s", payment.pk)
+        return False
@@ -0,0 +1,136 @@
+# core/referrals.py
+"""
+Referral tree index (see ReferralPath).
+
+CustomUser.referred_by stays the source of truth; the closure table is kept
+in step by user signals:
+
+- a new user gets its depth-0 row plus one row per ancestor of its referrer;
+- changing referred_by moves the user's whole subtree under the new referrer
+  (a referrer from the user's own downline is rejected before the save);
+- deleting a user detaches its downline (referred_by is SET_NULL, which
+  sends no signals), so each direct referral becomes the root of its own tree.
+
+Writes that bypass signals (bulk_create/bulk_update of users) must be
+followed by rebuild_referral_paths() or `manage.py rebuild_referral_tree`.
+"""
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import Count
+
+from .models import CustomUser, ReferralPath
+
+
+DEFAULT_TREE_DEPTH = 3
+CYCLE_MESSAGE = "A user cannot be referred by themselves or their own downline."
+
+
+def add_user(user):
+    rows = [ReferralPath(ancestor_id=user.pk, descendant_id=user.pk, depth=0)]
+    if user.referred_by_id:
+        rows += [
+            ReferralPath(ancestor_id=ancestor_id, descendant_id=user.pk, depth=depth + 1)
+            for ancestor_id, depth in ReferralPath.objects.filter(
+                descendant_id=user.referred_by_id
+            ).values_list('ancestor_id', 'depth')
+        ]
+    ReferralPath.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+def would_create_cycle(user, referrer_id):
+    """True if `referrer_id` is the user or one of the user's descendants."""
+    if referrer_id is None or user.pk is None:
+        return False
+    return referrer_id == user.pk or ReferralPath.objects.filter(
+        ancestor_id=user.pk, descendant_id=referrer_id
+    ).exists()
+
+
+def check_referrer(user, referrer_id):
+    """Raise ValidationError if `referrer_id` would make the referral tree a cycle."""
+    if would_create_cycle(user, referrer_id):
+        raise ValidationError({'referred_by': CYCLE_MESSAGE})
+
+
+def _detach(root_id, include_root):
+    """Delete every path from outside the subtree at `root_id` into it."""
+    subtree = ReferralPath.objects.filter(ancestor_id=root_id)
+    if not include_root:
+        subtree = subtree.filter(depth__gt=0)
+    subtree = subtree.values('descendant_id')
+    ReferralPath.objects.filter(descendant_id__in=subtree).exclude(ancestor_id__in=subtree).delete()
+
+
+def move_subtree(user, referrer_id):
+    """Re-hang the user and its whole downline under `referrer_id` (or make it a root)."""
+    if would_create_cycle(user, referrer_id):
+        raise ValueError(f"User {referrer_id} is in the downline of user {user.pk}.")
+    with transaction.atomic():
+        _detach(user.pk, include_root=True)
+        if referrer_id is None:
+            return
+        uppers = list(ReferralPath.objects.filter(descendant_id=referrer_id).values_list('ancestor_id', 'depth'))
+        lowers = list(ReferralPath.objects.filter(ancestor_id=user.pk).values_list('descendant_id', 'depth'))
+        ReferralPath.objects.bulk_create([
+            ReferralPath(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=up + down + 1)
+            for ancestor_id, up in uppers
+            for descendant_id, down in lowers
+        ], batch_size=1000)
+
+
+def detach_downline(user):
+    _detach(user.pk, include_root=False)
+
+
+def rebuild_referral_paths(path_model=ReferralPath, user_model=CustomUser):
+    """
+    Rebuild the closure table from referred_by, one INSERT ... SELECT per
+    tree level. Returns the number of rows written. Takes the models as
+    arguments so the backfill migration can pass its historical models.
+    """
+    paths = connection.ops.quote_name(path_model._meta.db_table)
+    users = connection.ops.quote_name(user_model._meta.db_table)
+    written = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {paths}")
+        cursor.execute(f"INSERT INTO {paths} (ancestor_id, descendant_id, depth) SELECT id, id, 0 FROM {users}")
+        written += cursor.rowcount
+        depth = 0
+        while True:
+            # The NOT EXISTS guard stops the walk even if referred_by holds a cycle.
+            cursor.execute(
+                f"INSERT INTO {paths} (ancestor_id, descendant_id, depth) "
+                f"SELECT p.ancestor_id, u.id, p.depth + 1 FROM {paths} p "
+                f"JOIN {users} u ON u.referred_by_id = p.descendant_id "
+                f"WHERE p.depth = %s AND NOT EXISTS ("
+                f"SELECT 1 FROM {paths} q WHERE q.ancestor_id = p.ancestor_id AND q.descendant_id = u.id)",
+                [depth],
+            )
+            if cursor.rowcount <= 0:
+                break
+            written += cursor.rowcount
+            depth += 1
+    return written
+
+
+def downline(user, max_depth=DEFAULT_TREE_DEPTH, level=None):
+    """Paths from the user to its descendants, newest referrals last."""
+    queryset = ReferralPath.objects.filter(ancestor=user)
+    if level is not None:
+        queryset = queryset.filter(depth=level)
+    else:
+        queryset = queryset.filter(depth__gte=1, depth__lte=max_depth)
+    return queryset.order_by('descendant_id')
+
+
+def level_counts(user, max_depth=DEFAULT_TREE_DEPTH):
+    rows = (
+        ReferralPath.objects.filter(ancestor=user, depth__gte=1, depth__lte=max_depth)
+        .values('depth').annotate(count=Count('id')).order_by('depth')
+    )
+    return [{"level": row['depth'], "count": row['count']} for row in rows]
+
+
+def upline(user):
+    """Paths from the user's referrer up to the root, nearest first."""
+    return ReferralPath.objects.filter(descendant=user, depth__gte=1).order_by('depth')
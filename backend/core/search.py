@@ -0,0 +1,207 @@
+# core/search.py
+"""
+Unified search over plots, micro-plot projects, products and commercial
+properties, backed by the SearchEntry table.
+
+Save/delete signals upsert or drop each object's entry. On Postgres a
+migration-installed trigger keeps the entry's weighted tsvector current, and
+queries combine GIN-indexed full-text matching (websearch syntax, ranked
+with ts_rank) with pg_trgm similarity on location, so "chenai" still finds
+Chennai; without the pg_trgm extension only full-text matching is used. Other databases (SQLite in tests and local development) fall back
+to per-term ICONTAINS matching scored by the field that matched.
+"""
+from django.apps import apps as global_apps
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connection, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Greatest
+from rest_framework import filters
+
+from .models import CommercialProperty, EcommerceProduct, PlotListing, SearchEntry, SQLFTProject
+
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+SEARCH_CONFIG = 'english'
+FALLBACK_CANDIDATES = 500
+
+
+def _plot_entry(plot):
+    return {
+        'kind': SearchEntry.KIND_PLOT, 'title': plot.title, 'location': plot.location,
+        'body': '', 'is_public': True,
+    }
+
+
+def _project_entry(project):
+    return {
+        'kind': SearchEntry.KIND_PROJECT, 'title': project.project_name, 'location': project.location,
+        'body': f"{project.plot_type} {project.description}", 'is_public': True,
+    }
+
+
+def _product_entry(product):
+    # Mirrors the public catalogs: only active materials are listed, services always are.
+    if product.category == SearchEntry.KIND_MATERIAL:
+        kind, is_public = SearchEntry.KIND_MATERIAL, product.is_active
+    elif product.category == SearchEntry.KIND_SERVICE:
+        kind, is_public = SearchEntry.KIND_SERVICE, True
+    else:
+        kind, is_public = SearchEntry.KIND_PRODUCT, False
+    return {
+        'kind': kind, 'title': product.name, 'location': '',
+        'body': product.description or '', 'is_public': is_public,
+    }
+
+
+def _commercial_entry(prop):
+    location = ', '.join(part for part in (prop.address_line1, prop.locality, prop.city, prop.pincode) if part)
+    return {
+        'kind': SearchEntry.KIND_COMMERCIAL, 'title': prop.property_name, 'location': location,
+        'body': f"{prop.commercial_type} {prop.description}", 'is_public': True,
+    }
+
+
+# Keyed by model name so the backfill migration can pass historical models.
+ENTRY_BUILDERS = {
+    PlotListing._meta.model_name: _plot_entry,
+    SQLFTProject._meta.model_name: _project_entry,
+    EcommerceProduct._meta.model_name: _product_entry,
+    CommercialProperty._meta.model_name: _commercial_entry,
+}
+
+UPSERT_FIELDS = ['kind', 'title', 'location', 'body', 'is_public', 'updated_at']
+
+
+def is_indexed(model):
+    return model._meta.app_label == 'core' and model._meta.model_name in ENTRY_BUILDERS
+
+
+def _build_entry(instance, content_type=None, entry_model=SearchEntry):
+    fields = ENTRY_BUILDERS[instance._meta.model_name](instance)
+    fields['title'] = (fields['title'] or '')[:255]
+    fields['location'] = (fields['location'] or '')[:255]
+    return entry_model(
+        content_type=content_type or ContentType.objects.get_for_model(instance),
+        object_id=instance.pk,
+        **fields,
+    )
+
+
+def index_object(instance):
+    """Insert or refresh the object's entry in one upsert statement."""
+    index_objects([instance])
+
+
+def index_objects(instances, batch_size=1000):
+    """index_object() for many objects, e.g. rows written with bulk_create (which sends no signals)."""
+    SearchEntry.objects.bulk_create(
+        [_build_entry(instance) for instance in instances],
+        update_conflicts=True, unique_fields=['content_type', 'object_id'], update_fields=UPSERT_FIELDS,
+        batch_size=batch_size,
+    )
+
+
+def remove_object(instance):
+    SearchEntry.objects.filter(
+        content_type=ContentType.objects.get_for_model(instance), object_id=instance.pk,
+    ).delete()
+
+
+def rebuild_search_index(apps=global_apps, batch_size=1000):
+    """
+    Recreate every entry from the source tables. Returns the number of
+    entries. The backfill migration passes its historical app registry.
+    """
+    entry_model = apps.get_model('core', 'SearchEntry')
+    content_types = apps.get_model('contenttypes', 'ContentType')
+    total = 0
+    with transaction.atomic():
+        entry_model.objects.all().delete()
+        for model_name in ENTRY_BUILDERS:
+            model = apps.get_model('core', model_name)
+            content_type = content_types.objects.get_for_model(model)
+            batch = []
+            for instance in model.objects.order_by('pk').iterator(chunk_size=batch_size):
+                batch.append(_build_entry(instance, content_type, entry_model))
+                if len(batch) >= batch_size:
+                    entry_model.objects.bulk_create(batch)
+                    total += len(batch)
+                    batch = []
+            entry_model.objects.bulk_create(batch)
+            total += len(batch)
+    return total
+
+
+def uses_postgres_search():
+    return connection.vendor == 'postgresql'
+
+
+_trigram_available = {}
+
+
+def has_trigram():
+    """Whether pg_trgm is installed in this database (checked once per process)."""
+    if connection.alias not in _trigram_available:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trigram_available[connection.alias] = cursor.fetchone() is not None
+    return _trigram_available[connection.alias]
+
+
+def _postgres_matches(entries, text):
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+    rank = SearchRank(F('search_vector'), query)
+    if not has_trigram():
+        return entries.filter(search_vector=query).annotate(score=rank)
+    return entries.filter(Q(search_vector=query) | Q(location__trigram_similar=text)).annotate(
+        score=Greatest(rank, TrigramSimilarity('location', text) * Value(0.5)),
+    )
+
+
+def _fallback_matches(entries, text):
+    terms = text.lower().split()
+    condition = Q()
+    for term in terms:
+        condition &= Q(title__icontains=term) | Q(location__icontains=term) | Q(body__icontains=term)
+    return entries.filter(condition), terms
+
+
+def _fallback_score(entry, terms):
+    fields = ((entry.title.lower(), 3), (entry.location.lower(), 2), (entry.body.lower(), 1))
+    return sum(max((weight for text, weight in fields if term in text), default=0) for term in terms)
+
+
+def search(text, kinds=None, limit=DEFAULT_LIMIT):
+    """Public entries matching `text`, best first, as SearchEntry objects with a `score`."""
+    entries = SearchEntry.objects.filter(is_public=True)
+    if kinds:
+        entries = entries.filter(kind__in=kinds)
+    if uses_postgres_search():
+        return list(_postgres_matches(entries, text).order_by('-score', '-id')[:limit])
+
+    matches, terms = _fallback_matches(entries, text)
+    results = list(matches.order_by('-id')[:FALLBACK_CANDIDATES])
+    for entry in results:
+        entry.score = float(_fallback_score(entry, terms))
+    results.sort(key=lambda entry: entry.score, reverse=True)
+    return results[:limit]
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    Drop-in for DRF's SearchFilter. On Postgres, `?search=` is answered from
+    the GIN-indexed SearchEntry table instead of ICONTAINS scans over
+    `search_fields`; elsewhere it behaves exactly like SearchFilter.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms or not uses_postgres_search() or not is_indexed(queryset.model):
+            return super().filter_queryset(request, queryset, view)
+        matching = _postgres_matches(
+            SearchEntry.objects.filter(content_type=ContentType.objects.get_for_model(queryset.model)),
+            ' '.join(terms),
+        ).values('object_id')
+        return queryset.filter(pk__in=matching)
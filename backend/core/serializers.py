@@ -1,14 +1,89 @@
 # core/serializers.py
+from decimal import Decimal
+
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth import authenticate
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Prefetch, QuerySet, prefetch_related_objects
 from .models import (
     CustomUser, PlotListing, JointOwner, Booking,
     EcommerceProduct, Order, OrderItem, RealEstateAgentProfile, UserType, PlotInquiry, ReferralCommission, SQLFTProject, BankDetail,
     KYCDocument, FAQ, SupportTicket, Inquiry, ShortlistCartItem, ShortlistCart, CallRequest, B2BVendorProfile, VerifiedPlot, CommercialProperty,SubPlotUnit,
-    Payment
+    Payment, SearchEntry
 
 )
+from .money import CENT
+from .referrals import CYCLE_MESSAGE, would_create_cycle
+
+
+class EagerLoadingMixin:
+    """
+    Lets a ModelSerializer declare the relations it reads so callers never
+    trigger one query per row.
+
+    `select_related_fields` lists forward FK/one-to-one paths joined into the
+    main query. `prefetch_related_fields` lists reverse or many relations,
+    either as plain lookups/Prefetch objects or as `(lookup, SerializerClass)`
+    pairs, in which case the nested serializer's own plan is applied to the
+    prefetch queryset.
+
+    The plan is applied automatically whenever the serializer is built with
+    `many=True` (querysets get select/prefetch_related, already-evaluated lists
+    such as a paginated page get `prefetch_related_objects`). Detail views pass
+    their queryset through `setup_eager_loading()`.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    @classmethod
+    def get_prefetch_lookups(cls):
+        lookups = []
+        for entry in cls.prefetch_related_fields:
+            if isinstance(entry, tuple):
+                lookup, nested_serializer = entry
+                queryset = nested_serializer.setup_eager_loading(nested_serializer.Meta.model.objects.all())
+                entry = Prefetch(lookup, queryset=queryset)
+            lookups.append(entry)
+        return lookups
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        if cls.select_related_fields:
+            queryset = queryset.select_related(*cls.select_related_fields)
+        # Skip lookups the queryset already carries so the plan can be
+        # applied twice (by the view and again by many_init) safely.
+        seen = {getattr(lookup, 'prefetch_to', lookup) for lookup in queryset._prefetch_related_lookups}
+        prefetch_lookups = [
+            lookup for lookup in cls.get_prefetch_lookups()
+            if getattr(lookup, 'prefetch_to', lookup) not in seen
+        ]
+        if prefetch_lookups:
+            queryset = queryset.prefetch_related(*prefetch_lookups)
+        return queryset
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        if args:
+            args = (cls._eager_load(args[0]),) + args[1:]
+        elif 'instance' in kwargs:
+            kwargs['instance'] = cls._eager_load(kwargs['instance'])
+        return super().many_init(*args, **kwargs)
+
+    @classmethod
+    def _eager_load(cls, instances):
+        if isinstance(instances, QuerySet):
+            # Only touch unevaluated querysets; slicing or re-filtering an
+            # evaluated one would throw away its result cache.
+            if instances._result_cache is None and not instances.query.is_sliced:
+                return cls.setup_eager_loading(instances)
+            instances = list(instances)
+        if isinstance(instances, list):
+            model = cls.Meta.model
+            objs = [obj for obj in instances if isinstance(obj, model)]
+            if objs:
+                prefetch_related_objects(objs, *cls.select_related_fields, *cls.get_prefetch_lookups())
+        return instances
 
 # User and Authentication Serializers
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -85,8 +160,9 @@ class CustomUserSerializer2(serializers.ModelSerializer):
             'town', 'city', 'state', 'country', 'is_active', 'user_type'
         ]
 
-class KYCDocumentSerializer(serializers.ModelSerializer):
+class KYCDocumentSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     user = CustomUserSerializer2(read_only=True)  # ✅ Show full user info in response
+    select_related_fields = ('user',)
 
     class Meta:
         model = KYCDocument
@@ -104,9 +180,10 @@ class KYCDocumentSerializer(serializers.ModelSerializer):
 #         fields = ('id', 'username', 'email', 'mobile_number', 'user_type', 'is_staff', 'is_active')
 #         read_only_fields = ('user_type', 'is_staff', 'is_active')
 
-class CustomUserSerializer(serializers.ModelSerializer):
+class CustomUserSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     full_mobile_number = serializers.SerializerMethodField()
     kyc_documents = KYCDocumentSerializer(many=True, read_only=True)
+    prefetch_related_fields = (('kyc_documents', KYCDocumentSerializer),)
 
     class Meta:
         model = CustomUser
@@ -134,24 +211,28 @@ class CustomUserSerializer(serializers.ModelSerializer):
 
 
 # Core Models Serializers
-class JointOwnerSerializer(serializers.ModelSerializer):
+class JointOwnerSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     owner_username = serializers.CharField(source='owner.username', read_only=True)
     owner_email = serializers.EmailField(source='owner.email', read_only=True)
+    select_related_fields = ('owner',)
 
     class Meta:
         model = JointOwner
         fields = ('id', 'owner', 'owner_username', 'owner_email', 'share_percentage')
         read_only_fields = ('owner_username', 'owner_email')
 
-class PlotListingSerializer(serializers.ModelSerializer):
+class PlotListingSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     owner_username = serializers.CharField(source='owner.username', read_only=True)
     listed_by_agent_username = serializers.CharField(source='listed_by_agent.username', read_only=True)
     joint_owners = JointOwnerSerializer(many=True, read_only=True)
+    select_related_fields = ('owner', 'listed_by_agent')
+    prefetch_related_fields = (('joint_owners', JointOwnerSerializer),)
 
     class Meta:
         model = PlotListing
         fields = [
-            'id', 'owner', 'owner_name', 'title', 'location', 'total_area_sqft',
+            'id', 'owner', 'owner_name', 'title', 'location', 'google_map_link', 'latitude', 'longitude',
+            'total_area_sqft',
             'price_per_sqft', 'is_available_full', 'available_sqft_for_investment',
             'is_verified', 'listed_by_agent', 'plot_file', 'created_at', 'updated_at',
             'owner_username', 'listed_by_agent_username', 'joint_owners'
@@ -163,9 +244,10 @@ class PlotListingSerializer(serializers.ModelSerializer):
         )
 
 
-class BookingSerializer(serializers.ModelSerializer):
+class BookingSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     client_username = serializers.CharField(source='client.username', read_only=True)
     plot_title = serializers.CharField(source='plot_listing.title', read_only=True)
+    select_related_fields = ('client', 'plot_listing')
 
     class Meta:
         model = Booking
@@ -176,8 +258,9 @@ class BookingSerializer(serializers.ModelSerializer):
         read_only_fields = ('client', 'booking_date', 'status', 'plot_title', 'client_username')
 
 
-class EcommerceProductSerializer(serializers.ModelSerializer):
+class EcommerceProductSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     vendor_username = serializers.CharField(source='vendor.username', read_only=True)
+    select_related_fields = ('vendor',)
     status = serializers.SerializerMethodField()  # Map is_active to status
 
     class Meta:
@@ -199,8 +282,9 @@ class EcommerceProductSerializer(serializers.ModelSerializer):
         return data
 
 
-class OrderItemSerializer(serializers.ModelSerializer):
+class OrderItemSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     product_name = serializers.CharField(source='product.name', read_only=True)
+    select_related_fields = ('product',)
 
     class Meta:
         model = OrderItem
@@ -208,9 +292,11 @@ class OrderItemSerializer(serializers.ModelSerializer):
         read_only_fields = ('price_at_purchase', 'product_name')
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     client_username = serializers.CharField(source='client.username', read_only=True)
     items = OrderItemSerializer(many=True, read_only=True) # Nested serializer for order items
+    select_related_fields = ('client',)
+    prefetch_related_fields = (('items', OrderItemSerializer),)
 
     class Meta:
         model = Order
@@ -229,8 +315,9 @@ class RealEstateAgentRegistrationSerializer(serializers.ModelSerializer):
             'kyc_documents', 'gst_number', 'license_number', 'commission_rate'
         ]
 
-class RealEstateAgentProfileSerializer(serializers.ModelSerializer):
+class RealEstateAgentProfileSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     user_code = serializers.CharField(source='user.user_code', read_only=True)
+    select_related_fields = ('user',)
 
     class Meta:
         model = RealEstateAgentProfile
@@ -242,8 +329,9 @@ class RealEstateAgentProfileSerializer(serializers.ModelSerializer):
         ]
 
 
-class PlotInquirySerializer(serializers.ModelSerializer):
+class PlotInquirySerializer(EagerLoadingMixin, serializers.ModelSerializer):
     plot_name = serializers.CharField(source='plot.title', read_only=True)
+    select_related_fields = ('plot',)
 
     class Meta:
         model = PlotInquiry
@@ -251,20 +339,51 @@ class PlotInquirySerializer(serializers.ModelSerializer):
         read_only_fields = ('created_at', 'plot_name')
 
 
-class ReferralCommissionSerializer(serializers.ModelSerializer):
+class ReferralCommissionSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     referred_user_name = serializers.CharField(source='referred_user.get_full_name', read_only=True)
     referred_user_code = serializers.CharField(source='referred_user.referral_code', read_only=True)
+    select_related_fields = ('referred_user',)
 
     class Meta:
         model = ReferralCommission
         fields = ['id', 'referred_user_name', 'level', 'referred_user_code', 'commission_percent', 'status', 'created_at']
 
 
+class ReferralTreeNodeSerializer(serializers.ModelSerializer):
+    """
+    A member of a referral downline or upline. Serializes ReferralPath rows:
+    context['member'] names the side of the path to show ('descendant' for
+    a downline, 'ancestor' for an upline) and the path depth is the level.
+    """
+    name = serializers.CharField(source='get_full_name', read_only=True)
+
+    class Meta:
+        model = CustomUser
+        fields = ['id', 'username', 'name', 'referral_code', 'referred_by', 'date_joined']
+
+    def to_representation(self, path):
+        data = super().to_representation(getattr(path, self.context.get('member', 'descendant')))
+        data['level'] = path.depth
+        return data
+
+
+class SearchResultSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='object_id', read_only=True)
+    score = serializers.SerializerMethodField()
+
+    class Meta:
+        model = SearchEntry
+        fields = ['kind', 'id', 'title', 'location', 'score']
+
+    def get_score(self, entry):
+        return round(float(entry.score), 4)
+
+
 class SQLFTProjectSerializer(serializers.ModelSerializer):
     class Meta:
         model = SQLFTProject
         fields = [
-            'id', 'project_name', 'location', 'google_map_link', 'description',
+            'id', 'project_name', 'location', 'google_map_link', 'latitude', 'longitude', 'description',
             'plot_type', 'unit', 'price', 'project_layout', 'project_image',
             'project_video', 'land_document', 'created_at'
         ]
@@ -310,12 +429,15 @@ class PaymentTransactionSerializer(serializers.Serializer):
     date = serializers.DateTimeField()
     status = serializers.CharField()
 
-class ShortlistCartItemSerializer(serializers.ModelSerializer):
+class ShortlistCartItemSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     item_type = serializers.SerializerMethodField()
     item_id = serializers.IntegerField(source='object_id')
     item_title = serializers.SerializerMethodField()
     price_per_unit = serializers.SerializerMethodField()
     total_item_value = serializers.SerializerMethodField()
+    # The generic prefetch groups items by content type, so a whole cart
+    # resolves in one query per model rather than one per item.
+    prefetch_related_fields = ('content_object',)
 
     class Meta:
         model = ShortlistCartItem
@@ -324,8 +446,27 @@ class ShortlistCartItemSerializer(serializers.ModelSerializer):
             'quantity', 'price_per_unit', 'total_item_value'
         ]
 
+    @staticmethod
+    def get_pricing(obj):
+        """
+        (price per unit, total value) of a cart item, computed once and kept
+        on the instance for the other fields and for cart totals.
+        """
+        if not hasattr(obj, '_cart_pricing'):
+            item = obj.content_object
+            price = getattr(item, 'price_per_sqft', getattr(item, 'price', None))
+            # A plot with no quantity is a full-plot purchase; checkout charges its whole area.
+            qty = obj.quantity if obj.quantity else getattr(item, 'total_area_sqft', None) or 1
+            obj._cart_pricing = (price, (Decimal(price or 0) * qty).quantize(CENT))
+        return obj._cart_pricing
+
+    @classmethod
+    def get_cart_total(cls, items):
+        return sum((cls.get_pricing(item)[1] for item in items), Decimal('0'))
+
     def get_item_type(self, obj):
-        return obj.content_type.model
+        # get_for_id is served from the ContentType cache after the first hit.
+        return ContentType.objects.get_for_id(obj.content_type_id).model
 
     def get_item_title(self, obj):
         return getattr(
@@ -339,15 +480,46 @@ class ShortlistCartItemSerializer(serializers.ModelSerializer):
         )
 
     def get_price_per_unit(self, obj):
-        return getattr(obj.content_object, 'price_per_sqft', getattr(obj.content_object, 'price', None))
+        return self.get_pricing(obj)[0]
 
     def get_total_item_value(self, obj):
-        price = self.get_price_per_unit(obj)
-        qty = obj.quantity if obj.quantity else 1
-        return str(float(price or 0) * qty)
+        return str(self.get_pricing(obj)[1])
 
-class WebOrderSerializer(serializers.ModelSerializer):
+class InterestedUserSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    buyer_name = serializers.SerializerMethodField()
+    buyer_phone = serializers.CharField(source='cart.user.mobile_number', read_only=True)
+    buyer_email = serializers.CharField(source='cart.user.email', read_only=True)
+    property_title = serializers.CharField(source='plot_listing.title', read_only=True)
+    contacted_on = serializers.DateTimeField(source='added_at', format='%Y-%m-%d', read_only=True)
+    select_related_fields = ('cart__user', 'plot_listing')
+
+    class Meta:
+        model = ShortlistCartItem
+        fields = ['buyer_name', 'buyer_phone', 'buyer_email', 'property_title', 'contacted_on']
+
+    def get_buyer_name(self, obj):
+        return f"{obj.cart.user.first_name} {obj.cart.user.last_name}"
+
+
+class OwnerShortlistItemSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    plot_id = serializers.IntegerField(source='plot_listing_id', read_only=True)
+    plot_title = serializers.CharField(source='plot_listing.title', read_only=True)
+    plot_location = serializers.CharField(source='plot_listing.location', read_only=True)
+    buyer_name = serializers.CharField(source='cart.user.get_full_name', read_only=True)
+    buyer_email = serializers.CharField(source='cart.user.email', read_only=True)
+    buyer_phone = serializers.CharField(source='cart.user.mobile_number', read_only=True)
+    shortlisted_at = serializers.DateTimeField(source='added_at', read_only=True)
+    select_related_fields = ('cart__user', 'plot_listing')
+
+    class Meta:
+        model = ShortlistCartItem
+        fields = [
+            'plot_id', 'plot_title', 'plot_location', 'buyer_name', 'buyer_email', 'buyer_phone', 'shortlisted_at'
+        ]
+
+class WebOrderSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     client_username = serializers.CharField(source='client.username', read_only=True)
+    select_related_fields = ('client',)
 
     class Meta:
         model = Order
@@ -431,15 +603,21 @@ class UserAdminSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['user_code', 'referral_code', 'date_joined']
 
+    def validate_referred_by(self, value):
+        if value is not None and self.instance is not None and would_create_cycle(self.instance, value.pk):
+            raise serializers.ValidationError(CYCLE_MESSAGE)
+        return value
+
 class CommercialPropertySerializer(serializers.ModelSerializer):
     class Meta:
         model = CommercialProperty
         fields = '__all__'
         read_only_fields = ['id', 'user', 'added_date']
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
     user_email = serializers.EmailField(source='user.email', read_only=True)
+    select_related_fields = ('user',)
 
     class Meta:
         model = Payment
@@ -0,0 +1,180 @@
+# core/signals.py
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from . import commissions, geo, inventory, referrals, search, stats, stock
+
+from .cache import (
+    PUBLIC_PLOTS_NAMESPACE, PUBLIC_PRODUCTS_NAMESPACE, PUBLIC_MICRO_PLOTS_NAMESPACE,
+    FAQS_NAMESPACE, VERIFIED_PLOTS_NAMESPACE, bump_namespace_version_on_commit,
+)
+from .models import (
+    PlotListing, JointOwner, EcommerceProduct, SQLFTProject, FAQ, VerifiedPlot,
+    Booking, Payment, CustomUser, CommercialProperty, Order,
+)
+
+
+@receiver(post_save, sender=PlotListing)
+@receiver(post_delete, sender=PlotListing)
+@receiver(post_save, sender=JointOwner)
+@receiver(post_delete, sender=JointOwner)
+def invalidate_public_plot_catalog(sender, **kwargs):
+    bump_namespace_version_on_commit(PUBLIC_PLOTS_NAMESPACE)
+
+
+@receiver(post_save, sender=EcommerceProduct)
+@receiver(post_delete, sender=EcommerceProduct)
+def invalidate_public_products(sender, **kwargs):
+    bump_namespace_version_on_commit(PUBLIC_PRODUCTS_NAMESPACE)
+
+
+@receiver(post_save, sender=SQLFTProject)
+@receiver(post_delete, sender=SQLFTProject)
+def invalidate_public_micro_plots(sender, **kwargs):
+    bump_namespace_version_on_commit(PUBLIC_MICRO_PLOTS_NAMESPACE)
+
+
+@receiver(post_save, sender=FAQ)
+@receiver(post_delete, sender=FAQ)
+def invalidate_faqs(sender, **kwargs):
+    bump_namespace_version_on_commit(FAQS_NAMESPACE)
+
+
+@receiver(post_save, sender=VerifiedPlot)
+@receiver(post_delete, sender=VerifiedPlot)
+def invalidate_verified_plots(sender, **kwargs):
+    bump_namespace_version_on_commit(VERIFIED_PLOTS_NAMESPACE)
+
+
+@receiver(pre_save, sender=PlotListing)
+@receiver(pre_save, sender=Booking)
+@receiver(pre_save, sender=Payment)
+@receiver(pre_save, sender=CustomUser)
+def capture_dashboard_stat_values(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw:
+        stats.capture_previous(instance, update_fields)
+
+
+@receiver(post_save, sender=PlotListing)
+@receiver(post_save, sender=Booking)
+@receiver(post_save, sender=Payment)
+@receiver(post_save, sender=CustomUser)
+def update_dashboard_stats_on_save(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        stats.record_saved(instance, created)
+
+
+@receiver(post_delete, sender=PlotListing)
+@receiver(post_delete, sender=Booking)
+@receiver(post_delete, sender=Payment)
+@receiver(post_delete, sender=CustomUser)
+def update_dashboard_stats_on_delete(sender, instance, **kwargs):
+    stats.record_deleted(instance)
+
+
+@receiver(pre_save, sender=CustomUser)
+def capture_referrer(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._referrer_changed = False
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and 'referred_by' not in update_fields:
+        return
+    previous = sender.objects.filter(pk=instance.pk).values_list('referred_by_id', flat=True).first()
+    instance._referrer_changed = previous != instance.referred_by_id
+    if instance._referrer_changed:
+        # Refuse before the row is written; post_save would be too late.
+        referrals.check_referrer(instance, instance.referred_by_id)
+
+
+@receiver(post_save, sender=CustomUser)
+def update_referral_tree(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        referrals.add_user(instance)
+    elif getattr(instance, '_referrer_changed', False):
+        referrals.move_subtree(instance, instance.referred_by_id)
+
+
+@receiver(pre_delete, sender=CustomUser)
+def detach_referral_downline(sender, instance, **kwargs):
+    referrals.detach_downline(instance)
+
+
+@receiver(post_save, sender=Payment)
+def revisit_paid_payment(sender, instance, raw=False, **kwargs):
+    if not raw and instance.status == 'paid':
+        commissions.rewind_checkpoint('payment', instance.pk)
+
+
+@receiver(post_save, sender=Booking)
+def revisit_confirmed_booking(sender, instance, raw=False, **kwargs):
+    if not raw and instance.status == 'confirmed':
+        commissions.rewind_checkpoint('booking', instance.pk)
+
+
+@receiver(post_save, sender=Booking)
+def release_cancelled_booking_sqft(sender, instance, raw=False, **kwargs):
+    if not raw and instance.status == 'cancelled' and instance.booking_type == 'square_feet':
+        inventory.release_booking_hold(instance)
+
+
+@receiver(pre_delete, sender=Booking)
+def release_deleted_booking_sqft(sender, instance, **kwargs):
+    if instance.booking_type == 'square_feet':
+        inventory.release_booking_hold(instance)
+
+
+@receiver(pre_save, sender=EcommerceProduct)
+def capture_stock_quantity(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._stock_changed = False
+    if raw or instance._state.adding or (update_fields is not None and 'stock_quantity' not in update_fields):
+        return
+    previous = sender.objects.filter(pk=instance.pk).values_list('stock_quantity', flat=True).first()
+    instance._stock_changed = previous != instance.stock_quantity
+
+
+@receiver(post_save, sender=EcommerceProduct)
+def update_stock_shards(sender, instance, raw=False, **kwargs):
+    if raw or not stock.is_stocked(instance):
+        return
+    if getattr(instance, '_stock_changed', False):
+        stock.set_stock(instance, instance.stock_quantity)
+    else:
+        stock.create_shards([instance])
+
+
+@receiver(post_save, sender=Order)
+def settle_order_stock(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    order_status = (instance.status or '').upper()
+    if order_status in ('CONFIRMED', 'DISPATCHED', 'DELIVERED'):
+        stock.commit_order(instance)
+    elif order_status == 'CANCELLED':
+        stock.release_order(instance)
+
+
+@receiver(post_save, sender=PlotListing)
+@receiver(post_save, sender=SQLFTProject)
+@receiver(post_save, sender=EcommerceProduct)
+@receiver(post_save, sender=CommercialProperty)
+def update_search_entry(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_object(instance)
+
+
+@receiver(post_delete, sender=PlotListing)
+@receiver(post_delete, sender=SQLFTProject)
+@receiver(post_delete, sender=EcommerceProduct)
+@receiver(post_delete, sender=CommercialProperty)
+def remove_search_entry(sender, instance, **kwargs):
+    search.remove_object(instance)
+
+
+@receiver(pre_save, sender=PlotListing)
+@receiver(pre_save, sender=SQLFTProject)
+@receiver(pre_save, sender=CommercialProperty)
+def fill_listing_coordinates(sender, instance, raw=False, **kwargs):
+    if not raw:
+        geo.fill_coordinates(instance)
@@ -0,0 +1,268 @@
+# core/stats.py
+"""
+Materialized admin dashboard statistics (see DashboardStat).
+
+The dashboard used to run full-table COUNT/SUM/TruncMonth queries on every
+request. Instead, each tracked model contributes fixed amounts to a handful
+of rollup rows, and save/delete signals apply the difference between a
+row's old and new contribution as an in-place increment. Reads are then a couple
+of small indexed lookups however large the source tables grow.
+
+Writes that bypass signals (bulk_create, queryset.update/delete) must call
+record_created() or be followed by `manage.py refresh_dashboard_stats`,
+which rebuilds every row from the source tables and is safe to run on a
+schedule to correct drift.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from . import money
+from .models import Booking, CustomUser, DashboardStat, Payment, PlotListing
+
+
+PLOTS = 'plots'
+PLOTS_BOOKED = 'plots_booked'
+USERS = 'users'
+REVENUE = 'revenue'
+BOOKINGS = 'bookings'
+# Present once the rollup has been built from the source tables.
+BUILT = 'rollup_built'
+
+TOTAL = DashboardStat.PERIOD_TOTAL
+DAY = DashboardStat.PERIOD_DAY
+MONTH = DashboardStat.PERIOD_MONTH
+TOTAL_BUCKET = date(1970, 1, 1)
+
+MONTHLY_RANGE_DAYS = {'3months': 90, '6months': 180}
+
+CENT = Decimal('0.01')
+
+
+def _to_money(amount):
+    return Decimal(str(amount or 0)).quantize(CENT)
+
+
+def _local_date(value):
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.date()
+
+
+def _plot_contributions(values):
+    return {
+        (PLOTS, TOTAL, TOTAL_BUCKET): 1,
+        (PLOTS_BOOKED, TOTAL, TOTAL_BUCKET): 0 if values['is_available_full'] else 1,
+    }
+
+
+def _user_contributions(values):
+    return {(USERS, TOTAL, TOTAL_BUCKET): 1}
+
+
+def _payment_contributions(values):
+    paid = values['status'] == 'paid'
+    return {(REVENUE, TOTAL, TOTAL_BUCKET): _to_money(values['amount']) if paid else 0}
+
+
+def _booking_contributions(values):
+    day = _local_date(values['booking_date'])
+    return {
+        (BOOKINGS, DAY, day): 1,
+        (BOOKINGS, MONTH, day.replace(day=1)): 1,
+    }
+
+
+# model -> (fields the contribution depends on, contribution function)
+TRACKED_MODELS = {
+    PlotListing: (('is_available_full',), _plot_contributions),
+    CustomUser: ((), _user_contributions),
+    Payment: (('status', 'amount'), _payment_contributions),
+    Booking: (('booking_date',), _booking_contributions),
+}
+
+
+def _contributions(model, values):
+    if values is None:
+        return {}
+    return TRACKED_MODELS[model][1](values)
+
+
+def _current_values(instance):
+    fields = TRACKED_MODELS[type(instance)][0]
+    return {field: getattr(instance, field) for field in fields}
+
+
+def _apply(deltas):
+    """
+    Add each delta to its rollup row in a single upsert statement
+    (INSERT ... ON CONFLICT DO UPDATE, supported by Postgres and SQLite),
+    so concurrent writers never lose an increment or race to create a row.
+    """
+    rows = [(key, delta) for key, delta in deltas.items() if delta]
+    if not rows:
+        return
+    ops = connection.ops
+    table = ops.quote_name(DashboardStat._meta.db_table)
+    now = ops.adapt_datetimefield_value(timezone.now())
+    params = []
+    for (metric, period, bucket), delta in rows:
+        params += [metric, period, ops.adapt_datefield_value(bucket), Decimal(delta), now]
+    placeholders = ', '.join(['(%s, %s, %s, %s, %s)'] * len(rows))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (metric, period, bucket, value, updated_at) VALUES {placeholders} "
+            f"ON CONFLICT (metric, period, bucket) DO UPDATE "
+            f"SET value = {table}.value + EXCLUDED.value, updated_at = EXCLUDED.updated_at",
+            params,
+        )
+
+
+def capture_previous(instance, update_fields=None):
+    """
+    pre_save hook: remember the stored values the instance's contribution
+    depends on, so post_save can apply only the difference. Costs one
+    primary-key lookup, and only for updates that touch a tracked field.
+    """
+    fields = TRACKED_MODELS[type(instance)][0]
+    instance._dashboard_previous = None
+    if instance._state.adding:
+        return
+    if not fields or (update_fields is not None and not set(fields) & set(update_fields)):
+        instance._dashboard_unchanged = True
+        return
+    instance._dashboard_unchanged = False
+    instance._dashboard_previous = type(instance).objects.filter(pk=instance.pk).values(*fields).first()
+
+
+def record_saved(instance, created):
+    if not created and getattr(instance, '_dashboard_unchanged', True):
+        return
+    old = None if created else instance._dashboard_previous
+    new = _contributions(type(instance), _current_values(instance))
+    old = _contributions(type(instance), old)
+    _apply({key: new.get(key, 0) - old.get(key, 0) for key in new.keys() | old.keys()})
+
+
+def record_deleted(instance):
+    old = _contributions(type(instance), _current_values(instance))
+    _apply({key: -delta for key, delta in old.items()})
+
+
+def record_created(instances):
+    """Apply the contributions of rows inserted with bulk_create (which sends no signals)."""
+    deltas = defaultdict(int)
+    for instance in instances:
+        for key, delta in _contributions(type(instance), _current_values(instance)).items():
+            deltas[key] += delta
+    _apply(deltas)
+
+
+def snapshot(instances):
+    """The tracked values of `instances` before a bulk_update, for record_updated()."""
+    return [_current_values(instance) for instance in instances]
+
+
+def record_updated(instances, previous):
+    """Apply the changes of rows updated with bulk_update, given their snapshot() from before."""
+    deltas = defaultdict(int)
+    for instance, old in zip(instances, previous):
+        for key, delta in _contributions(type(instance), _current_values(instance)).items():
+            deltas[key] += delta
+        for key, delta in _contributions(type(instance), old).items():
+            deltas[key] -= delta
+    _apply(deltas)
+
+
+def rebuild_dashboard_stats():
+    """
+    Recompute every rollup row from the source tables. Returns the number of
+    rows written.
+
+    On Postgres the rollup table is locked for the duration, so signal
+    increments from concurrent writers wait and land on top of the rebuilt
+    figures instead of being lost.
+    """
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f'LOCK TABLE {DashboardStat._meta.db_table} IN EXCLUSIVE MODE')
+
+        plots = PlotListing.objects.aggregate(
+            total=Count('id'), booked=Count('id', filter=Q(is_available_full=False)),
+        )
+        revenue = Payment.objects.filter(status='paid').aggregate(total=Sum('amount_paise'))['total']
+        values = {
+            (BUILT, TOTAL, TOTAL_BUCKET): 1,
+            (PLOTS, TOTAL, TOTAL_BUCKET): plots['total'],
+            (PLOTS_BOOKED, TOTAL, TOTAL_BUCKET): plots['booked'],
+            (USERS, TOTAL, TOTAL_BUCKET): CustomUser.objects.count(),
+            (REVENUE, TOTAL, TOTAL_BUCKET): money.from_paise(revenue),
+        }
+        daily = (
+            Booking.objects.annotate(day=TruncDate('booking_date'))
+            .values('day').annotate(count=Count('id')).values_list('day', 'count')
+        )
+        for day, count in daily:
+            values[(BOOKINGS, DAY, day)] = count
+            month_key = (BOOKINGS, MONTH, day.replace(day=1))
+            values[month_key] = values.get(month_key, 0) + count
+
+        DashboardStat.objects.all().delete()
+        DashboardStat.objects.bulk_create([
+            DashboardStat(metric=metric, period=period, bucket=bucket, value=value)
+            for (metric, period, bucket), value in values.items()
+        ], batch_size=1000)
+    return len(values)
+
+
+def get_dashboard_totals():
+    """Current total for every metric, building the rollup on first use."""
+    totals = dict(DashboardStat.objects.filter(period=TOTAL).values_list('metric', 'value'))
+    if BUILT not in totals:
+        rebuild_dashboard_stats()
+        totals = dict(DashboardStat.objects.filter(period=TOTAL).values_list('metric', 'value'))
+    return totals
+
+
+def plot_stats(totals):
+    total = int(totals.get(PLOTS, 0))
+    booked = int(totals.get(PLOTS_BOOKED, 0))
+    return {"total": total, "booked": booked, "available": total - booked}
+
+
+def user_stats(totals):
+    return {"total_users": int(totals.get(USERS, 0))}
+
+
+def payment_stats(totals):
+    return {"total_revenue": totals.get(REVENUE) or 0}
+
+
+def monthly_booking_stats(filter_range='all'):
+    """
+    Bookings per month as [{"monthYear": "Jan 2025", "count": n}]. '3months'
+    and '6months' sum the daily buckets from that many days back; anything
+    else reads the monthly buckets directly.
+    """
+    if not DashboardStat.objects.filter(metric=BUILT).exists():
+        rebuild_dashboard_stats()
+    days = MONTHLY_RANGE_DAYS.get(filter_range)
+    if days is None:
+        rows = (
+            DashboardStat.objects.filter(metric=BOOKINGS, period=MONTH, value__gt=0)
+            .order_by('bucket').values_list('bucket', 'value')
+        )
+    else:
+        start = timezone.localdate() - timedelta(days=days)
+        rows = (
+            DashboardStat.objects.filter(metric=BOOKINGS, period=DAY, bucket__gte=start, value__gt=0)
+            .annotate(month=TruncMonth('bucket')).values('month')
+            .annotate(count=Sum('value')).order_by('month').values_list('month', 'count')
+        )
+    return [{"monthYear": month.strftime("%b %Y"), "count": int(count)} for month, count in rows]
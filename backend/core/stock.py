@@ -0,0 +1,292 @@
+# core/stock.py
+"""
+Stock ledger for EcommerceProduct (see StockShard and StockReservation).
+
+A product's available units are split over settings.STOCK_SHARD_COUNT
+StockShard rows. Checkout reserves every line of every order in the request
+with one conditional UPDATE. Each product's units (summed over the lines)
+come from one randomly chosen shard:
+
+    WITH v(product_id, shard, quantity) AS (VALUES ...)
+    UPDATE stock_shard SET available = available - v.quantity
+    FROM v WHERE <same product and shard> AND available >= v.quantity
+    RETURNING product_id, id
+
+Concurrent buyers of a hot product therefore mostly lock different rows.
+The chosen shards are first locked with SELECT ... FOR UPDATE ORDER BY
+product, shard: the UPDATE would lock them in whatever order its join
+produced, and two checkouts sharing products could then deadlock. If any
+product's shard is short, the statement is rolled back to its savepoint
+(Postgres keeps the lock on a row it rechecked and skipped, so it must be
+let go) and every product is taken from all its shards instead, locked in
+(product, shard) order so that lockers cannot deadlock. Only when the
+shards together are short does the reservation fail with
+InsufficientStock, and its savepoint undoes every decrement made for the
+request.
+
+Held units expire after settings.STOCK_HOLD_MINUTES unless the order is
+confirmed (commit_order). release_expired_stock(), run by `manage.py
+release_stock_holds`, returns them to their shards and cancels the pending
+order. The same command copies the shard totals into
+EcommerceProduct.stock_quantity (sync_stock_quantities), so the product
+row is not written on every order. Saving a product with a new
+stock_quantity sets the available stock to that figure (set_stock).
+"""
+import operator
+import random
+from collections import defaultdict
+from datetime import timedelta
+from functools import reduce
+
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import EcommerceProduct, Order, StockReservation, StockShard
+
+
+# Services are booked, not shipped from stock.
+STOCKED_CATEGORIES = ('material',)
+
+
+def is_stocked(product):
+    return product.category in STOCKED_CATEGORIES
+
+
+class InsufficientStock(Exception):
+    def __init__(self, product_ids):
+        self.product_ids = sorted(product_ids)
+        super().__init__(f"Not enough stock for product(s) {', '.join(map(str, self.product_ids))}.")
+
+
+class BelowMinimumOrder(Exception):
+    def __init__(self, product):
+        self.product_id = product.pk
+        super().__init__(f"Minimum order quantity for {product.name} is {product.moq}.")
+
+
+def split_quantity(quantity, count=None):
+    """`quantity` spread as evenly as possible over `count` shards."""
+    count = count or settings.STOCK_SHARD_COUNT
+    quantity = max(quantity or 0, 0)
+    return [quantity // count + (1 if shard < quantity % count else 0) for shard in range(count)]
+
+
+def create_shards(products, apps=global_apps):
+    """Shards for stocked products that have none, filled from stock_quantity. Returns the rows created."""
+    shard_model = apps.get_model('core', 'StockShard')
+    products = [product for product in products if is_stocked(product)]
+    existing = set(
+        shard_model.objects.filter(product_id__in=[product.pk for product in products])
+        .values_list('product_id', flat=True).distinct()
+    )
+    return shard_model.objects.bulk_create([
+        shard_model(product_id=product.pk, shard=shard, available=available)
+        for product in products if product.pk not in existing
+        for shard, available in enumerate(split_quantity(product.stock_quantity))
+    ], batch_size=1000)
+
+
+def set_stock(product, quantity):
+    """Make `quantity` units available, on top of the units currently held."""
+    with transaction.atomic():
+        shards = list(StockShard.objects.select_for_update().filter(product=product).order_by('shard'))
+        if not shards:
+            create_shards([product])
+            return
+        for shard, available in zip(shards, split_quantity(quantity, len(shards))):
+            shard.available = available
+        StockShard.objects.bulk_update(shards, ['available'])
+
+
+def hold_expiry():
+    return timezone.now() + timedelta(minutes=settings.STOCK_HOLD_MINUTES)
+
+
+def _take_from_random_shards(quantities):
+    """
+    Take each product's quantity ({product_id: units}) from one random
+    shard of it: one SELECT ... FOR UPDATE that locks the chosen shards in
+    (product, shard) order, then one UPDATE. Returns {product_id: shard_id}
+    for the products that got their units.
+    """
+    shards = {product_id: random.randrange(settings.STOCK_SHARD_COUNT) for product_id in quantities}
+    # Lock the chosen rows in (product, shard) order before updating them.
+    list(
+        StockShard.objects.select_for_update()
+        .filter(reduce(operator.or_, (Q(product_id=product_id, shard=shard) for product_id, shard in shards.items())))
+        .order_by('product_id', 'shard').values_list('pk')
+    )
+    quote = connection.ops.quote_name
+    table = quote(StockShard._meta.db_table)
+    values = ', '.join(['(CAST(%s AS INTEGER), CAST(%s AS INTEGER), CAST(%s AS INTEGER))'] * len(quantities))
+    params = [
+        value for product_id, quantity in quantities.items()
+        for value in (product_id, shards[product_id], quantity)
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH v(product_id, shard, quantity) AS (VALUES {values}) "
+            f"UPDATE {table} SET available = {table}.available - v.quantity FROM v "
+            f"WHERE {table}.product_id = v.product_id AND {table}.shard = v.shard "
+            f"AND {table}.available >= v.quantity RETURNING {table}.product_id, {table}.id",
+            params,
+        )
+        return dict(cursor.fetchall())
+
+
+def _take_across_shards(product_id, quantity):
+    """Lock all of a product's shards and take `quantity` from as many as needed."""
+    shards = list(StockShard.objects.select_for_update().filter(product_id=product_id).order_by('shard'))
+    if sum(shard.available for shard in shards) < quantity:
+        return None
+    pieces, remaining = [], quantity
+    for shard in sorted(shards, key=lambda shard: -shard.available):
+        if not remaining:
+            break
+        taken = min(shard.available, remaining)
+        shard.available -= taken
+        remaining -= taken
+        pieces.append((shard, taken))
+    StockShard.objects.bulk_update([shard for shard, _ in pieces], ['available'])
+    return [(shard.pk, taken) for shard, taken in pieces]
+
+
+def reserve(lines):
+    """
+    Hold stock for order lines [(order, product, quantity)]; lines for
+    products that are not stocked are skipped. Returns the StockReservation
+    rows, or raises InsufficientStock / BelowMinimumOrder without changing
+    anything.
+    """
+    lines = [line for line in lines if is_stocked(line[1])]
+    for _, product, quantity in lines:
+        if quantity < (product.moq or 1):
+            raise BelowMinimumOrder(product)
+    if not lines:
+        return []
+    quantities = defaultdict(int)
+    for _, product, quantity in lines:
+        quantities[product.pk] += quantity
+    expires_at = hold_expiry()
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                taken = _take_from_random_shards(quantities)
+                if len(taken) < len(quantities):
+                    raise _ShardShort
+            pieces = {product_id: [(shard_id, quantities[product_id])] for product_id, shard_id in taken.items()}
+        except _ShardShort:
+            pieces = _take_in_shard_order(quantities)
+        return StockReservation.objects.bulk_create(_split_lines(lines, pieces, expires_at))
+
+
+class _ShardShort(Exception):
+    pass
+
+
+def _take_in_shard_order(quantities):
+    """Slow path of reserve(): every product's quantity from all its shards, locked in (product, shard) order."""
+    pieces, short = {}, set()
+    for product_id in sorted(quantities):
+        pieces[product_id] = _take_across_shards(product_id, quantities[product_id])
+        if pieces[product_id] is None:
+            short.add(product_id)
+    if short:
+        raise InsufficientStock(short)
+    return pieces
+
+
+def _split_lines(lines, pieces, expires_at):
+    """Reservation rows for `lines`, handing out each product's shard pieces line by line."""
+    reservations = []
+    for order, product, quantity in lines:
+        product_pieces = pieces[product.pk]
+        while quantity:
+            shard_id, units = product_pieces[0]
+            taken = min(units, quantity)
+            reservations.append(StockReservation(
+                order=order, product=product, shard_id=shard_id, quantity=taken, expires_at=expires_at,
+            ))
+            quantity -= taken
+            if taken == units:
+                product_pieces.pop(0)
+            else:
+                product_pieces[0] = (shard_id, units - taken)
+    return reservations
+
+
+def _release(holds):
+    """Return the units of `holds` to their shards. Returns the ids of their orders."""
+    holds = list(holds.values_list('pk', 'shard_id', 'quantity', 'order_id'))
+    if not holds:
+        return set()
+    StockReservation.objects.filter(pk__in=[pk for pk, _, _, _ in holds]).update(
+        status=StockReservation.STATUS_RELEASED, updated_at=timezone.now(),
+    )
+    units = defaultdict(int)
+    for _, shard_id, quantity, _ in holds:
+        units[shard_id] += quantity
+    list(StockShard.objects.select_for_update().filter(pk__in=units).order_by('product_id', 'shard').values_list('pk'))
+    quote = connection.ops.quote_name
+    table = quote(StockShard._meta.db_table)
+    values = ', '.join(['(CAST(%s AS INTEGER), CAST(%s AS INTEGER))'] * len(units))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH v(id, quantity) AS (VALUES {values}) "
+            f"UPDATE {table} SET available = {table}.available + v.quantity FROM v WHERE {table}.id = v.id",
+            [value for item in units.items() for value in item],
+        )
+    return {order_id for _, _, _, order_id in holds}
+
+
+def commit_order(order):
+    """The order is confirmed: its held units no longer expire."""
+    StockReservation.objects.filter(order=order, status=StockReservation.STATUS_HELD).update(
+        status=StockReservation.STATUS_COMMITTED, updated_at=timezone.now(),
+    )
+
+
+def release_order(order):
+    """The order is cancelled: give back its held or committed units."""
+    with transaction.atomic():
+        _release(StockReservation.objects.select_for_update().filter(
+            order=order, status__in=[StockReservation.STATUS_HELD, StockReservation.STATUS_COMMITTED],
+        ))
+
+
+def release_expired_stock(batch_size=500, now=None):
+    """
+    Release one batch of expired holds and cancel their still pending
+    orders. Returns the number of holds released. Rows locked by another
+    sweeper are skipped.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        expired = list(
+            StockReservation.objects.select_for_update(skip_locked=True)
+            .filter(status=StockReservation.STATUS_HELD, expires_at__lte=now)
+            .order_by('expires_at').values_list('pk', flat=True)[:batch_size]
+        )
+        order_ids = _release(StockReservation.objects.filter(pk__in=expired))
+        Order.objects.filter(pk__in=order_ids, status__iexact='pending').update(status='cancelled')
+    return len(expired)
+
+
+def sync_stock_quantities():
+    """Copy each product's shard total into stock_quantity where it differs. Returns the rows updated."""
+    total = Subquery(
+        StockShard.objects.filter(product=OuterRef('pk')).values('product')
+        .annotate(total=Sum('available')).values('total')
+    )
+    return (
+        EcommerceProduct.objects.filter(pk__in=StockShard.objects.values('product_id'))
+        .exclude(stock_quantity=total).update(stock_quantity=total)
+    )
+
+
+def available_stock(product):
+    return StockShard.objects.filter(product=product).aggregate(total=Coalesce(Sum('available'), 0))['total']
@@ -0,0 +1,66 @@
+# core/streaming.py
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+
+DEFAULT_STREAM_CHUNK_SIZE = 2000
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def stream_json_array(queryset, serializer_class, context=None, chunk_size=DEFAULT_STREAM_CHUNK_SIZE):
+    """
+    Stream a whole queryset as one JSON array.
+
+    Rows are read through `.iterator(chunk_size)` (a server-side cursor on
+    Postgres), and each chunk is serialized, encoded and yielded before the
+    next is fetched. Memory therefore stays flat however many rows there
+    are. The serializer's eager-loading plan is applied, and its prefetches
+    run once per chunk.
+    """
+    if hasattr(serializer_class, 'setup_eager_loading'):
+        queryset = serializer_class.setup_eager_loading(queryset)
+    encoder = JSONEncoder()
+
+    def generate():
+        yield '['
+        separator = ''
+        for batch in _batches(queryset.iterator(chunk_size=chunk_size), chunk_size):
+            items = serializer_class(batch, many=True, context=context).data
+            yield separator + ','.join(encoder.encode(item) for item in items)
+            separator = ','
+        yield ']'
+
+    return StreamingHttpResponse(generate(), content_type='application/json')
+
+
+class StreamingListMixin:
+    """
+    Adds a streaming export mode to a list endpoint: `?stream=true` returns
+    every row matching the view's filters as one streamed JSON array instead
+    of a single page.
+    """
+    stream_chunk_size = DEFAULT_STREAM_CHUNK_SIZE
+
+    def wants_stream(self, request):
+        return request.query_params.get('stream', '').lower() in ('1', 'true', 'yes')
+
+    def stream_list(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        return stream_json_array(
+            queryset, self.get_serializer_class(), self.get_serializer_context(), self.stream_chunk_size,
+        )
+
+    def list(self, request, *args, **kwargs):
+        if self.wants_stream(request):
+            return self.stream_list(request)
+        return super().list(request, *args, **kwargs)
@@ -0,0 +1,264 @@
+# core/test_query_budgets.py
+"""
+Query-count and latency budgets for every GET route in core/urls.py.
+
+Seeds the benchmark dataset once, requests every list/detail route as an
+anonymous visitor and as each UserType, and compares the response status
+and the number of SQL queries against core/query_budgets.json. A route
+without a budget, one that answers with a different status, or one that
+goes over its query budget fails the suite.
+
+Detail routes are requested with an object every role could read if
+allowed (DETAIL_OBJECTS), so a recorded 404 means the role is scoped out
+of another user's object, not that the route or the fixture is broken.
+
+Run only this suite:
+    DATABASE_ENGINE=sqlite python manage.py test core.test_query_budgets
+
+Wall time is also budgeted, but it depends on the machine, so that check
+only runs when asked for:
+    QUERY_BUDGET_LATENCY=1 DATABASE_ENGINE=sqlite python manage.py test core.test_query_budgets --tag=latency
+
+Re-record budgets after an intentional change:
+    UPDATE_QUERY_BUDGETS=1 DATABASE_ENGINE=sqlite python manage.py test core.test_query_budgets
+
+Set QUERY_BUDGET_REPORT=<path> to also dump the raw measurements as JSON.
+Razorpay, Twilio and SMTP are stubbed; nothing leaves the process.
+"""
+import json
+import logging
+import math
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver
+from rest_framework.test import APIClient
+
+from .benchmark_data import seed_benchmark_dataset
+from .models import (
+    UserType, PlotListing, EcommerceProduct, SQLFTProject, SupportTicket, Payment, VerifiedPlot,
+)
+
+
+BUDGET_FILE = Path(__file__).resolve().parent / 'query_budgets.json'
+
+# Recorded time budgets get this much headroom (and at least the floor) so
+# they catch pathological slowdowns rather than machine-to-machine noise.
+TIME_BUDGET_FACTOR = 4
+TIME_BUDGET_FLOOR_MS = 250
+
+ROLES = ['anonymous'] + [user_type.value for user_type in UserType]
+
+# Path kwargs for routes that are not backed by a generic view queryset.
+DETAIL_OBJECTS = {
+    'PublicPlotDetailView': lambda probes: PlotListing.objects.order_by('id').first().pk,
+    'PublicMaterialDetailView': lambda probes: EcommerceProduct.objects.filter(
+        category='material', is_active=True).order_by('id').first().pk,
+    'PublicServiceDetailView': lambda probes: EcommerceProduct.objects.filter(
+        category='service').order_by('id').first().pk,
+    'PublicMicroPlotDetailView': lambda probes: SQLFTProject.objects.order_by('id').first().pk,
+    'SupportTicketViewSet': lambda probes: SupportTicket.objects.filter(
+        user=probes[UserType.CLIENT]).order_by('id').first().pk,
+    'BookingByClientIDView': lambda probes: probes[UserType.CLIENT].pk,
+    'SubPlotUnitsByProjectView': lambda probes: SQLFTProject.objects.order_by('id').first().pk,
+    'PaymentReceiptView': lambda probes: Payment.objects.filter(
+        user=probes[UserType.CLIENT], status='paid').order_by('id').first().pk,
+    'AdminExportView': lambda probes: 'payments',
+    # An active product of the probe vendor, visible to every role that may
+    # read the viewset; the lowest pk overall is an inactive service.
+    'EcommerceProductViewSet': lambda probes: EcommerceProduct.objects.filter(
+        vendor=probes[UserType.B2B_VENDOR], is_active=True).order_by('id').first().pk,
+    'MaterialProductViewSet': lambda probes: EcommerceProduct.objects.filter(
+        category='material', vendor=probes[UserType.B2B_VENDOR], is_active=True).order_by('id').first().pk,
+    'VerifiedPlotViewSet': lambda probes: VerifiedPlot.objects.filter(is_flagship=True).order_by('id').first().pk,
+}
+
+# Query strings for routes that answer 400 without them.
+QUERY_PARAMS = {
+    'SearchView': {'q': 'chennai plot'},
+    'PublicNearbyPlotListView': {'lat': 13.08, 'lng': 80.27, 'radius_km': 20},
+    'PublicNearbyMicroPlotListView': {'lat': 13.08, 'lng': 80.27, 'radius_km': 20},
+}
+
+_REGEX_GROUP = re.compile(r'\(\?P<(\w+)>[^)]*\)')
+_ROUTE_PARAM = re.compile(r'<(?:\w+:)?(\w+)>')
+
+
+def _walk(patterns, prefix=''):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _walk(pattern.url_patterns, prefix + str(pattern.pattern))
+        else:
+            yield prefix + str(pattern.pattern), pattern
+
+
+def _normalize(template):
+    template = _REGEX_GROUP.sub(r'<\1>', template.replace('^', '').replace('$', ''))
+    return _ROUTE_PARAM.sub(r'<\1>', template)
+
+
+def collect_get_routes():
+    """
+    (template, view class) for every GET route mounted under /api/, skipping
+    DRF format-suffix duplicates and the second copy of the router that
+    core/urls.py also mounts under api/api/.
+    """
+    routes = {}
+    for raw, pattern in _walk(get_resolver().url_patterns):
+        if not raw.startswith('api/') or raw.startswith('api/api/') or 'format' in raw:
+            continue
+        callback = pattern.callback
+        view_class = getattr(callback, 'cls', None) or getattr(callback, 'view_class', None)
+        if view_class is None:
+            continue
+        actions = getattr(callback, 'actions', None)
+        if actions is not None:
+            if 'get' not in actions:
+                continue
+        elif not hasattr(view_class, 'get'):
+            continue
+        template = '/' + _normalize(raw)
+        routes.setdefault(template, view_class)
+    return sorted(routes.items())
+
+
+def _detail_pk(view_class, probes):
+    if view_class.__name__ in DETAIL_OBJECTS:
+        return DETAIL_OBJECTS[view_class.__name__](probes)
+    queryset = getattr(view_class, 'queryset', None)
+    if queryset is not None:
+        model = queryset.model
+    else:
+        model = view_class.serializer_class.Meta.model
+    obj = model.objects.order_by('pk').first()
+    return obj.pk if obj else 0
+
+
+def resolve_path(template, view_class, probes):
+    params = _ROUTE_PARAM.findall(template)
+    path = template
+    for name in params:
+        path = path.replace(f"<{name}>", str(_detail_pk(view_class, probes)))
+    return path
+
+
+class _FakeRazorpayClient:
+    def __init__(self, *args, **kwargs):
+        self.order = self
+
+    def create(self, data):
+        return {'id': 'order_stub', **data}
+
+
+@tag('benchmark')
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend', MEDIA_ROOT=tempfile.mkdtemp())
+class RouteQueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._patches = [
+            mock.patch('razorpay.Client', _FakeRazorpayClient),
+            mock.patch('requests.post', return_value=mock.Mock(status_code=201, text='stubbed')),
+            mock.patch('twilio.rest.Client'),
+        ]
+        for patcher in cls._patches:
+            patcher.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        for patcher in cls._patches:
+            patcher.stop()
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.probes = seed_benchmark_dataset()
+
+    def measure(self, role):
+        client = APIClient(raise_request_exception=False)
+        if role != 'anonymous':
+            client.force_authenticate(self.probes[role])
+
+        results = {}
+        request_logger = logging.getLogger('django.request')
+        previous_level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+        try:
+            for template, view_class in collect_get_routes():
+                path = resolve_path(template, view_class, self.probes)
+                cache.clear()  # budgets describe the cold path
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    response = client.get(path, QUERY_PARAMS.get(view_class.__name__))
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                results[f"GET {template} [{role}]"] = {
+                    'queries': len(ctx.captured_queries),
+                    'ms': round(elapsed_ms, 1),
+                    'status': response.status_code,
+                }
+        finally:
+            request_logger.setLevel(previous_level)
+        return results
+
+    def measure_all(self):
+        measurements = {}
+        for role in ROLES:
+            measurements.update(self.measure(role))
+        return measurements
+
+    def test_routes_stay_within_budget(self):
+        measurements = self.measure_all()
+
+        report_path = os.getenv('QUERY_BUDGET_REPORT')
+        if report_path:
+            Path(report_path).write_text(json.dumps(measurements, indent=2, sort_keys=True))
+
+        if os.getenv('UPDATE_QUERY_BUDGETS'):
+            budgets = {
+                key: {
+                    'status': value['status'],
+                    'queries': value['queries'],
+                    'ms': max(TIME_BUDGET_FLOOR_MS, math.ceil(value['ms'] * TIME_BUDGET_FACTOR)),
+                }
+                for key, value in measurements.items()
+            }
+            BUDGET_FILE.write_text(json.dumps(budgets, indent=2, sort_keys=True) + '\n')
+            return
+
+        budgets = json.loads(BUDGET_FILE.read_text())
+        for key, measured in sorted(measurements.items()):
+            with self.subTest(route=key):
+                budget = budgets.get(key)
+                self.assertIsNotNone(budget, f"No budget recorded for {key}; re-run with UPDATE_QUERY_BUDGETS=1.")
+                # A route that starts failing early runs fewer queries; the
+                # status keeps that from passing as an improvement.
+                self.assertEqual(
+                    measured['status'], budget['status'],
+                    f"{key} answered {measured['status']} (recorded {budget['status']})."
+                )
+                self.assertLessEqual(
+                    measured['queries'], budget['queries'],
+                    f"{key} ran {measured['queries']} queries (budget {budget['queries']})."
+                )
+
+    @tag('latency')
+    @skipUnless(os.getenv('QUERY_BUDGET_LATENCY'), "Set QUERY_BUDGET_LATENCY=1 to check wall-time budgets.")
+    def test_routes_stay_within_time_budget(self):
+        measurements = self.measure_all()
+        budgets = json.loads(BUDGET_FILE.read_text())
+        for key, measured in sorted(measurements.items()):
+            with self.subTest(route=key):
+                budget = budgets.get(key)
+                self.assertIsNotNone(budget, f"No budget recorded for {key}; re-run with UPDATE_QUERY_BUDGETS=1.")
+                self.assertLessEqual(
+                    measured['ms'], budget['ms'],
+                    f"{key} took {measured['ms']}ms (budget {budget['ms']}ms)."
+                )
@@ -1,6 +1,1595 @@
-from django.test import TestCase
+import csv
+import gzip
+import hashlib
+import hmac
+import io
+import json
+import os
+import smtplib
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.contenttypes.models import ContentType
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from utils import messaging
+from utils.twilio_whatsapp import send_whatsapp_message
+
+from .models import (
+    CustomUser, PlotListing, JointOwner, EcommerceProduct, ShortlistCart, ShortlistCartItem,
+    Booking, Order, OrderItem, NotificationOutbox, FAQ, VerifiedPlot, Payment, KYCDocument,
+    ReferralPath, ReferralCommission, BatchCheckpoint, SQLFTProject, CommercialProperty, SearchEntry,
+    SqftReservation, StockReservation, StockShard, IdempotencyKey, PaymentEvent, PaymentReceipt, SubPlotUnit,
+)
+from .outbox import process_outbox
+from .referrals import CYCLE_MESSAGE
+
 
 class CoreModelTests(TestCase):
     def test_example(self):
         # Example test case
-        self.assertEqual(1 + 1, 2)
\ No newline at end of file
+        self.assertEqual(1 + 1, 2)
+
+
+def make_plot(owner, **kwargs):
+    defaults = {
+        'title': 'Green Acres',
+        'location': 'Chennai',
+        'total_area_sqft': Decimal('1200.00'),
+        'price_per_sqft': Decimal('850.00'),
+    }
+    defaults.update(kwargs)
+    return PlotListing.objects.create(owner=owner, **defaults)
+
+
+class PublicPlotCatalogTests(APITestCase):
+    url = '/api/public/plots/'
+
+    def setUp(self):
+        cache.clear()
+        self.owner = CustomUser.objects.create_user(username='owner', email='owner@example.com')
+        for i in range(5):
+            make_plot(self.owner, title=f"Plot {i}")
+
+    def test_catalog_is_cursor_paginated_with_a_list_body(self):
+        response = self.client.get(self.url, {'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 2)
+        self.assertIn('rel="next"', response['Link'])
+
+        next_page = self.client.get(response['Link'].split(';')[0].strip('<>'))
+        self.assertEqual(len(next_page.data), 2)
+        self.assertNotEqual(response.data[0]['id'], next_page.data[0]['id'])
+
+    def test_warm_request_does_not_query_the_database(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data), 5)
+
+    def test_plot_and_joint_owner_writes_invalidate_the_cache(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_plot(self.owner, title='Fresh Listing')
+        response = self.client.get(self.url)
+        self.assertEqual(response.data[0]['title'], 'Fresh Listing')
+
+        partner = CustomUser.objects.create_user(username='partner', email='partner@example.com')
+        plot = PlotListing.objects.get(title='Fresh Listing')
+        with self.captureOnCommitCallbacks(execute=True):
+            JointOwner.objects.create(plot_listing=plot, owner=partner, share_percentage=Decimal('50.00'))
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data[0]['joint_owners']), 1)
+
+
+class PlotListingQueryCountTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.agent = CustomUser.objects.create_user(
+            username='agent', email='agent@example.com', user_type='real_estate_agent'
+        )
+        self.admin = CustomUser.objects.create_user(
+            username='admin', email='admin@example.com', user_type='admin'
+        )
+        self.add_plots(3)
+
+    def add_plots(self, count):
+        for _ in range(count):
+            n = CustomUser.objects.count()
+            owner = CustomUser.objects.create_user(username=f"owner{n}", email=f"owner{n}@example.com")
+            partner = CustomUser.objects.create_user(username=f"partner{n}", email=f"partner{n}@example.com")
+            plot = make_plot(owner, listed_by_agent=self.agent)
+            JointOwner.objects.create(plot_listing=plot, owner=partner, share_percentage=Decimal('25.00'))
+
+    def count_queries(self, callback):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as ctx:
+            response = callback()
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_public_list_query_count_is_independent_of_page_size(self):
+        small = self.count_queries(lambda: self.client.get('/api/public/plots/', {'page_size': 3}))
+        self.add_plots(10)
+        cache.clear()
+        large = self.count_queries(lambda: self.client.get('/api/public/plots/', {'page_size': 13}))
+        self.assertEqual(small, large)
+
+    def test_viewset_list_query_count_is_independent_of_row_count(self):
+        self.client.force_authenticate(self.admin)
+        small = self.count_queries(lambda: self.client.get('/api/plots/'))
+        self.add_plots(10)
+        large = self.count_queries(lambda: self.client.get('/api/plots/'))
+        self.assertEqual(small, large)
+
+    def test_public_detail_loads_relations_up_front(self):
+        plot = PlotListing.objects.first()
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/api/public/plots/{plot.pk}/")
+        self.assertEqual(response.data['listed_by_agent_username'], 'agent')
+        self.assertEqual(len(response.data['joint_owners']), 1)
+
+
+class CartTestMixin:
+    def setUp(self):
+        self.client_user = CustomUser.objects.create_user(username='buyer', email='buyer@example.com')
+        self.vendor = CustomUser.objects.create_user(
+            username='vendor', email='vendor@example.com', user_type='b2b_vendor'
+        )
+        self.cart = ShortlistCart.objects.create(user=self.client_user)
+        self.client.force_authenticate(self.client_user)
+
+    def fill_cart(self, plots, products):
+        plot_ct = ContentType.objects.get_for_model(PlotListing)
+        product_ct = ContentType.objects.get_for_model(EcommerceProduct)
+        for i in range(plots):
+            plot = make_plot(self.client_user, title=f"Plot {i}", available_sqft_for_investment=Decimal('1200.00'))
+            ShortlistCartItem.objects.create(cart=self.cart, content_type=plot_ct, object_id=plot.id, quantity=10)
+        for i in range(products):
+            product = EcommerceProduct.objects.create(
+                vendor=self.vendor, name=f"Cement {i}", price=Decimal('410.50'), category='material',
+                stock_quantity=100,
+            )
+            ShortlistCartItem.objects.create(cart=self.cart, content_type=product_ct, object_id=product.id, quantity=3)
+
+
+class MyPaymentsTests(CartTestMixin, APITestCase):
+    def test_lists_bookings_and_orders(self):
+        plot = make_plot(self.vendor, title='Lakeview')
+        Booking.objects.create(
+            client=self.client_user, plot_listing=plot, booking_type='full_plot', total_price=Decimal('1020000.00'),
+        )
+        product = EcommerceProduct.objects.create(vendor=self.vendor, name='Cement', price=Decimal('410.50'))
+        order = Order.objects.create(client=self.client_user, category='material', total_amount=Decimal('821.00'))
+        OrderItem.objects.create(order=order, product=product, quantity=2, price_at_purchase=Decimal('410.50'))
+
+        response = self.client.get('/api/my-payments/')
+        self.assertEqual(response.status_code, 200)
+        by_type = {row['type']: row for row in response.data}
+        self.assertEqual(by_type['plot_purchase']['description'], 'Full Plot Booking: Lakeview')
+        self.assertEqual(
+            (by_type['material_purchase']['description'], by_type['material_purchase']['amount']),
+            ('Order for Cement', '821.00'),
+        )
+
+    def test_kyc_status_requires_login(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/user/kyc/status/').status_code, 401)
+
+
+class CheckoutCartTests(CartTestMixin, APITestCase):
+    url = '/api/cart/checkout/'
+
+    def test_checkout_creates_bookings_orders_and_empties_cart(self):
+        self.fill_cart(plots=2, products=2)
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['bookings_created']), 2)
+        self.assertEqual(len(response.data['orders_created']), 2)
+
+        booking = Booking.objects.get(pk=response.data['bookings_created'][0])
+        self.assertEqual(booking.booking_type, 'square_feet')
+        self.assertEqual(booking.total_price, Decimal('8500.00'))
+        order = Order.objects.get(pk=response.data['orders_created'][0])
+        self.assertEqual(order.total_amount, Decimal('1231.50'))
+        self.assertTrue(order.order_id)
+        self.assertEqual(order.items.get().price_at_purchase, Decimal('410.50'))
+        self.assertFalse(self.cart.items.exists())
+
+    def test_query_count_does_not_grow_with_cart_size(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self.fill_cart(plots=1, products=1)
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(self.url)
+        self.fill_cart(plots=15, products=15)
+        with CaptureQueriesContext(connection) as large:
+            self.client.post(self.url)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_failure_mid_checkout_rolls_everything_back(self):
+        self.fill_cart(plots=2, products=2)
+        with mock.patch.object(OrderItem.objects, 'bulk_create', side_effect=RuntimeError('boom')):
+            with self.assertRaises(RuntimeError):
+                self.client.post(self.url)
+        self.assertFalse(Booking.objects.exists())
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(self.cart.items.count(), 4)
+
+
+class CartViewTests(CartTestMixin, APITestCase):
+    url = '/api/cart/'
+
+    def test_cart_items_and_total(self):
+        self.fill_cart(plots=1, products=2)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['item_type'] for item in response.data], ['plotlisting', 'ecommerceproduct', 'ecommerceproduct'])
+        self.assertEqual(response.data[0]['item_title'], 'Plot 0')
+        self.assertEqual(response.data[1]['total_item_value'], '1231.50')
+        self.assertEqual(response['X-Cart-Total'], '10963.00')
+
+    def test_full_plot_item_is_priced_like_checkout_charges_it(self):
+        plot = make_plot(self.vendor, title='Whole Plot')  # 1200 sqft at 850
+        plot_ct = ContentType.objects.get_for_model(PlotListing)
+        ShortlistCartItem.objects.create(cart=self.cart, content_type=plot_ct, object_id=plot.id, quantity=None)
+        response = self.client.get(self.url)
+        self.assertEqual(response.data[0]['total_item_value'], '1020000.00')
+        self.assertEqual(response['X-Cart-Total'], '1020000.00')
+
+        self.client.post('/api/cart/checkout/')
+        self.assertEqual(Booking.objects.get(booking_type='full_plot').total_price, Decimal('1020000.00'))
+
+    def test_query_count_grows_with_models_not_items(self):
+        # cart, items, then one content type lookup and one fetch per model
+        self.fill_cart(plots=1, products=1)
+        ContentType.objects.clear_cache()
+        with self.assertNumQueries(6):
+            self.client.get(self.url)
+        self.fill_cart(plots=10, products=10)
+        ContentType.objects.clear_cache()
+        with self.assertNumQueries(6):
+            self.client.get(self.url)
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class NotificationOutboxTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='otpuser', email='otp@example.com', is_active=True)
+
+    def test_otp_request_only_queues_the_email(self):
+        response = self.client.post('/api/auth/request-otp/', {'email': 'otp@example.com'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        queued = NotificationOutbox.objects.get()
+        self.assertEqual((queued.channel, queued.recipient, queued.status), ('email', 'otp@example.com', 'pending'))
+
+        call_command('run_outbox', '--once', stdout=mock.Mock())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['otp@example.com'])
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ('sent', 1))
+
+    def test_failed_delivery_backs_off_then_gives_up(self):
+        message = NotificationOutbox.enqueue_sms('+919999999999', 'Your OTP is 123456')
+        message.max_attempts = 2
+        message.save()
+
+        with mock.patch('utils.messaging.send_sms', side_effect=RuntimeError('Twilio is down')):
+            self.assertEqual(process_outbox(), (0, 1))
+            message.refresh_from_db()
+            self.assertEqual((message.status, message.attempts), ('pending', 1))
+            self.assertGreater(message.next_attempt_at, timezone.now())
+            self.assertIn('down', message.last_error)
+
+            # Not due yet, so nothing is claimed.
+            self.assertEqual(process_outbox(), (0, 0))
+
+            NotificationOutbox.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(process_outbox(), (0, 1))
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ('failed', 2))
+
+    def test_expired_lease_is_reclaimed(self):
+        message = NotificationOutbox.enqueue_email('otp@example.com', 'Hi', 'Body')
+        NotificationOutbox.objects.update(
+            status='sending', locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(process_outbox(), (1, 0))
+        message.refresh_from_db()
+        self.assertEqual(message.status, 'sent')
+
+
+class MessagingTransportTests(TestCase):
+    def make_pool(self, connections, **kwargs):
+        options = {'max_size': 2, 'max_idle': 60, 'health_check_after': 60, 'is_healthy': lambda conn: True}
+        options.update(kwargs)
+        factory = mock.Mock(side_effect=connections)
+        return factory, messaging.ConnectionPool(factory=factory, close=lambda conn: conn.close(), **options)
+
+    def test_released_connections_are_reused(self):
+        factory, pool = self.make_pool([mock.Mock(), mock.Mock()])
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            pass
+        self.assertIs(first, second)
+        self.assertEqual(factory.call_count, 1)
+
+    def test_unhealthy_idle_connection_is_replaced(self):
+        stale, fresh = mock.Mock(), mock.Mock()
+        factory, pool = self.make_pool([stale, fresh], health_check_after=0, is_healthy=lambda conn: conn is not stale)
+        pool.release(pool.acquire())
+        self.assertIs(pool.acquire(), fresh)
+        stale.close.assert_called_once()
+
+    def test_connection_that_raised_is_discarded(self):
+        broken, fresh = mock.Mock(), mock.Mock()
+        factory, pool = self.make_pool([broken, fresh])
+        with self.assertRaises(OSError):
+            with pool.connection():
+                raise OSError('reset by peer')
+        broken.close.assert_called_once()
+        self.assertIs(pool.acquire(), fresh)
+
+    def test_send_email_retries_once_on_dropped_session(self):
+        dropped = mock.Mock(**{'send_messages.side_effect': smtplib.SMTPServerDisconnected()})
+        fresh = mock.Mock(**{'send_messages.return_value': 1})
+        factory, pool = self.make_pool([dropped, fresh])
+        with mock.patch.object(messaging, '_smtp_pool', pool):
+            self.assertEqual(messaging.send_email('a@example.com', 'Hi', 'Body'), 1)
+        fresh.send_messages.assert_called_once()
+
+    @override_settings(TWILIO={'ACCOUNT_SID': 'AC123', 'AUTH_TOKEN': 'token', 'FROM_NUMBER': '+15550001111'})
+    def test_twilio_client_is_shared_and_reads_the_twilio_dict(self):
+        self.addCleanup(messaging.close_transports)
+        messaging.close_transports()
+        with mock.patch('utils.messaging.Client') as client_class:
+            messaging.send_sms('+919999999999', 'Your OTP is 123456')
+            send_whatsapp_message('+919999999999', 'Welcome')
+        self.assertEqual(client_class.call_count, 1)
+        self.assertEqual(client_class.call_args.args, ('AC123', 'token'))
+        create = client_class.return_value.messages.create
+        self.assertEqual(create.call_args_list[1].kwargs['to'], 'whatsapp:+919999999999')
+        self.assertEqual(create.call_args_list[1].kwargs['from_'], 'whatsapp:+15550001111')
+
+
+class ReadEndpointCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        FAQ.objects.create(question='What is a micro plot?', answer='A share of a larger plot.')
+
+    def test_faq_list_is_served_from_cache_until_an_faq_changes(self):
+        self.client.get('/api/faqs/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/faqs/')
+        self.assertEqual(len(response.data), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            FAQ.objects.create(question='How do I pay?', answer='Razorpay.')
+        self.assertEqual(len(self.client.get('/api/faqs/').data), 2)
+
+    def test_cache_is_invalidated_only_when_the_write_commits(self):
+        self.client.get('/api/faqs/')
+        with self.captureOnCommitCallbacks() as callbacks:
+            FAQ.objects.create(question='How do I pay?', answer='Razorpay.')
+            # Not committed yet: a reader still gets the cached page rather
+            # than caching the uncommitted state under a new version.
+            self.assertEqual(len(self.client.get('/api/faqs/').data), 1)
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertEqual(len(self.client.get('/api/faqs/').data), 2)
+
+    def test_materials_cache_is_invalidated_by_product_writes(self):
+        vendor = CustomUser.objects.create_user(username='vendor', email='vendor@example.com')
+        self.assertEqual(self.client.get('/api/public/materials/').data, [])
+        with self.captureOnCommitCallbacks(execute=True):
+            EcommerceProduct.objects.create(vendor=vendor, name='Cement', price=Decimal('410.50'), category='material')
+        self.assertEqual(len(self.client.get('/api/public/materials/').data), 1)
+
+    def test_cached_admin_list_still_checks_permissions(self):
+        admin = CustomUser.objects.create_user(username='admin', email='admin@example.com', user_type='admin')
+        client_user = CustomUser.objects.create_user(username='client', email='client@example.com')
+        VerifiedPlot.objects.create(title='Flagship', location='OMR', area=Decimal('1000'), price=Decimal('5000000'))
+
+        self.client.force_authenticate(admin)
+        self.assertEqual(len(self.client.get('/api/admin/verified-plots/').data), 1)
+        self.client.force_authenticate(client_user)
+        self.assertEqual(self.client.get('/api/admin/verified-plots/').status_code, 403)
+
+    def test_hit_and_miss_counters(self):
+        self.client.get('/api/faqs/')
+        self.client.get('/api/faqs/')
+        self.client.get('/api/faqs/')
+        admin = CustomUser.objects.create_user(username='admin', email='admin@example.com', user_type='admin')
+        self.client.force_authenticate(admin)
+        stats = self.client.get('/api/admin/cache/stats/').data
+        self.assertEqual(stats['faqs'], {'hits': 2, 'misses': 1, 'hit_ratio': 0.6667})
+        self.assertIsNone(stats['public_products']['hit_ratio'])
+
+
+class ListPaginationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = CustomUser.objects.create_user(username='admin', email='admin@example.com', user_type='admin')
+        self.client.force_authenticate(self.admin)
+        Payment.objects.bulk_create(
+            Payment(user=self.admin, plot_id=1, razorpay_order_id=f"order_{i}", amount=100 + i, status='paid')
+            for i in range(7)
+        )
+
+    def test_list_body_stays_a_list_with_link_header(self):
+        response = self.client.get('/api/admin/payments/', {'page_size': 5})
+        self.assertEqual(len(response.data), 5)
+        self.assertIn('rel="next"', response['Link'])
+
+        next_url = response['Link'].split(';')[0].strip('<>')
+        second = self.client.get(next_url)
+        seen = [p['razorpay_order_id'] for p in response.data + second.data]
+        self.assertEqual(sorted(seen), [f"order_{i}" for i in range(7)])
+        self.assertIn('rel="prev"', second['Link'])
+        self.assertNotIn('rel="next"', second['Link'])
+
+    def test_page_size_is_capped(self):
+        from .pagination import KeysetPagination
+        with mock.patch.object(KeysetPagination, 'max_page_size', 3):
+            response = self.client.get('/api/admin/payments/', {'page_size': 100000})
+        self.assertEqual(len(response.data), 3)
+
+    def test_stream_mode_returns_every_row_in_constant_queries(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        import json
+
+        def stream():
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get('/api/admin/payments/', {'stream': 'true'})
+                rows = json.loads(b''.join(response.streaming_content))
+            return rows, len(ctx.captured_queries)
+
+        from .streaming import StreamingListMixin
+        with mock.patch.object(StreamingListMixin, 'stream_chunk_size', 3):
+            rows, small = stream()
+            self.assertEqual(len(rows), 7)
+            Payment.objects.bulk_create(
+                Payment(user=self.admin, plot_id=1, razorpay_order_id=f"extra_{i}", amount=1, status='paid')
+                for i in range(20)
+            )
+            rows, large = stream()
+        self.assertEqual(len(rows), 27)
+        self.assertEqual(small, large)
+
+    def test_kyc_list_keeps_its_envelope(self):
+        KYCDocument.objects.create(user=self.admin, document_type='aadhaar_card', file='kyc_documents/a.pdf')
+        response = self.client.get('/api/admin/kyc-documents/')
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(len(response.data['documents']), 1)
+
+    def test_cached_pages_keep_their_link_header(self):
+        for i in range(3):
+            make_plot(self.admin, title=f"Plot {i}")
+        first = self.client.get('/api/public/plots/', {'page_size': 2})
+        cached = self.client.get('/api/public/plots/', {'page_size': 2})
+        self.assertIn('rel="next"', first['Link'])
+        self.assertEqual(first['Link'], cached['Link'])
+
+    def test_other_lists_are_not_paginated(self):
+        FAQ.objects.bulk_create(FAQ(question=f"Q{i}", answer='A') for i in range(3))
+        response = self.client.get('/api/faqs/', {'page_size': 2})
+        self.assertEqual(len(response.data), 3)
+        self.assertNotIn('Link', response)
+
+
+class PlotInterestTests(CartTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.agent = CustomUser.objects.create_user(
+            username='agent', email='agent@example.com', user_type='real_estate_agent'
+        )
+        self.owner = CustomUser.objects.create_user(username='owner', email='owner@example.com')
+        self.plot = make_plot(self.owner, listed_by_agent=self.agent, title='Agent Plot')
+        make_plot(self.client_user, title='Someone Else')
+
+    def shortlist(self, user, plot):
+        cart, _ = ShortlistCart.objects.get_or_create(user=user)
+        return ShortlistCartItem.objects.create(
+            cart=cart, content_type=ContentType.objects.get_for_model(PlotListing), object_id=plot.id
+        )
+
+    def test_cart_items_keep_the_typed_plot_column_in_sync(self):
+        item = self.shortlist(self.client_user, self.plot)
+        self.assertEqual(item.plot_listing_id, self.plot.id)
+        self.fill_cart(plots=0, products=1)
+        self.assertIsNone(self.cart.items.exclude(pk=item.pk).get().plot_listing_id)
+
+    def test_agent_and_owner_only_see_interest_in_their_plots(self):
+        self.shortlist(self.client_user, self.plot)
+        self.shortlist(self.client_user, PlotListing.objects.get(title='Someone Else'))
+        self.fill_cart(plots=0, products=2)
+
+        self.client.force_authenticate(self.agent)
+        response = self.client.get('/api/agents/interested-users/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['property_title'] for row in response.data], ['Agent Plot'])
+        self.assertEqual(response.data[0]['buyer_email'], 'buyer@example.com')
+
+        self.client.force_authenticate(self.owner)
+        response = self.client.get('/api/owner/shortlisted/')
+        self.assertEqual([row['plot_id'] for row in response.data], [self.plot.id])
+
+    def test_query_count_does_not_grow_with_interest(self):
+        self.client.force_authenticate(self.owner)
+        self.shortlist(self.client_user, self.plot)
+        with self.assertNumQueries(1):
+            self.client.get('/api/owner/shortlisted/')
+        for i in range(10):
+            buyer = CustomUser.objects.create_user(username=f"buyer{i}", email=f"buyer{i}@example.com")
+            self.shortlist(buyer, self.plot)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/owner/shortlisted/')
+        self.assertEqual(len(response.data), 11)
+
+    def test_non_agents_are_refused(self):
+        response = self.client.get('/api/agents/interested-users/')
+        self.assertEqual(response.status_code, 403)
+
+
+class DashboardStatsTests(APITestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(username='admin', email='admin@example.com', user_type='admin')
+        self.client.force_authenticate(self.admin)
+        self.plot = make_plot(self.admin)
+        make_plot(self.admin, is_available_full=False)
+        Booking.objects.create(
+            plot_listing=self.plot, client=self.admin, booking_type='full_plot', total_price=Decimal('100.00')
+        )
+        self.payment = Payment.objects.create(
+            user=self.admin, plot_id=self.plot.id, razorpay_order_id='order_1', amount=250.5, status='created'
+        )
+
+    def summary(self):
+        return self.client.get('/api/admin/dashboard/summary/').data
+
+    def test_summary_matches_the_source_tables(self):
+        data = self.summary()
+        self.assertEqual(data['plots'], {'total': 2, 'booked': 1, 'available': 1})
+        self.assertEqual(data['users'], {'total_users': 1})
+        self.assertEqual(data['payments'], {'total_revenue': 0})
+        month = timezone.now().strftime('%b %Y')
+        self.assertEqual(data['monthly_bookings'], [{'monthYear': month, 'count': 1}])
+        self.assertEqual(self.client.get('/api/admin/dashboard/monthly-bookings/', {'range': '3months'}).data,
+                         [{'monthYear': month, 'count': 1}])
+
+    def test_signals_keep_the_rollup_current_without_rescanning(self):
+        self.summary()  # build
+        self.payment.status = 'paid'
+        self.payment.save()
+        self.plot.is_available_full = False
+        self.plot.save()
+        CustomUser.objects.create_user(username='late', email='late@example.com')
+        Booking.objects.filter(plot_listing=self.plot).get().delete()
+
+        with self.assertNumQueries(1):
+            totals = self.client.get('/api/admin/dashboard/plot-stats/').data
+        self.assertEqual(totals, {'total': 2, 'booked': 2, 'available': 0})
+        data = self.summary()
+        self.assertEqual(data['payments'], {'total_revenue': Decimal('250.50')})
+        self.assertEqual(data['users'], {'total_users': 2})
+        self.assertEqual(data['monthly_bookings'], [])
+
+        self.payment.status = 'refunded'
+        self.payment.save(update_fields=['status'])
+        self.assertEqual(self.summary()['payments'], {'total_revenue': 0})
+
+    def test_refresh_command_corrects_drift(self):
+        self.summary()
+        PlotListing.objects.filter(pk=self.plot.pk).update(is_available_full=False)  # bypasses signals
+        self.assertEqual(self.summary()['plots']['booked'], 1)
+        call_command('refresh_dashboard_stats', stdout=mock.MagicMock())
+        self.assertEqual(self.summary()['plots']['booked'], 2)
+
+    def test_summary_requires_admin(self):
+        self.client.force_authenticate(CustomUser.objects.create_user(username='c', email='c@example.com'))
+        self.assertEqual(self.client.get('/api/admin/dashboard/summary/').status_code, 403)
+
+
+class ReferralTreeTests(APITestCase):
+    def setUp(self):
+        # root -> a -> b -> c, root -> d
+        self.root = self.make_user('root')
+        self.a = self.make_user('a', self.root)
+        self.b = self.make_user('b', self.a)
+        self.c = self.make_user('c', self.b)
+        self.d = self.make_user('d', self.root)
+        self.client.force_authenticate(self.root)
+
+    def make_user(self, name, referrer=None):
+        return CustomUser.objects.create_user(username=name, email=f"{name}@example.com", referred_by=referrer)
+
+    def paths(self):
+        return set(ReferralPath.objects.filter(depth__gt=0).values_list('ancestor__username', 'descendant__username', 'depth'))
+
+    def test_paths_follow_user_creation_moves_and_deletes(self):
+        self.assertIn(('root', 'c', 3), self.paths())
+
+        self.b.referred_by = self.d
+        self.b.save()
+        self.assertEqual(self.paths(), {
+            ('root', 'a', 1), ('root', 'd', 1), ('root', 'b', 2), ('root', 'c', 3),
+            ('d', 'b', 1), ('d', 'c', 2), ('b', 'c', 1),
+        })
+
+        self.d.delete()
+        self.assertEqual(self.paths(), {('root', 'a', 1), ('b', 'c', 1)})
+
+        expected = self.paths()
+        call_command('rebuild_referral_tree', stdout=mock.MagicMock())
+        self.assertEqual(self.paths(), expected)
+
+    def test_tree_endpoint_returns_levels_upline_and_a_paginated_downline(self):
+        response = self.client.get('/api/referral/network/tree/', {'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['levels'], [
+            {'level': 1, 'count': 2}, {'level': 2, 'count': 1}, {'level': 3, 'count': 1},
+        ])
+        self.assertEqual([row['username'] for row in response.data['downline']], ['a', 'b'])
+        self.assertIn('rel="next"', response['Link'])
+
+        self.client.force_authenticate(self.c)
+        response = self.client.get('/api/referral/network/tree/', {'level': 1})
+        self.assertEqual([(row['username'], row['level']) for row in response.data['upline']],
+                         [('b', 1), ('a', 2), ('root', 3)])
+        self.assertEqual(response.data['downline'], [])
+
+    def test_query_count_does_not_grow_with_the_network(self):
+        with self.assertNumQueries(3):
+            self.client.get('/api/referral/network/tree/')
+        for i in range(20):
+            self.make_user(f"leaf{i}", self.c)
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/referral/network/tree/', {'depth': 4})
+        self.assertEqual(response.data['levels'][-1], {'level': 4, 'count': 20})
+
+    def test_admin_cannot_create_a_referral_cycle(self):
+        admin = CustomUser.objects.create_user(username='admin', email='admin@example.com', user_type='admin')
+        self.client.force_authenticate(admin)
+        response = self.client.patch(f"/api/admin/users/{self.a.pk}/", {'referred_by': self.c.pk})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['referred_by'], [CYCLE_MESSAGE])
+        self.a.refresh_from_db()
+        self.assertEqual(self.a.referred_by, self.root)
+
+    def test_cycles_are_refused_before_the_user_is_saved(self):
+        self.a.referred_by = self.c
+        with self.assertRaises(ValidationError):
+            self.a.full_clean()
+        with self.assertRaises(ValidationError):
+            self.a.save()
+        self.assertEqual(CustomUser.objects.get(pk=self.a.pk).referred_by, self.root)
+        self.assertIn(('root', 'c', 3), self.paths())
+
+
+@override_settings(REFERRAL_COMMISSION_PERCENTS=['2', '1', '0.5'])
+class ReferralCommissionEngineTests(TestCase):
+    def setUp(self):
+        # l3 -> l2 -> l1 -> buyer, and a fourth level above that earns nothing
+        self.top = CustomUser.objects.create_user(username='top', email='top@example.com')
+        self.l3 = CustomUser.objects.create_user(username='l3', email='l3@example.com', referred_by=self.top)
+        self.l2 = CustomUser.objects.create_user(username='l2', email='l2@example.com', referred_by=self.l3)
+        self.l1 = CustomUser.objects.create_user(username='l1', email='l1@example.com', referred_by=self.l2)
+        self.buyer = CustomUser.objects.create_user(username='buyer', email='buyer@example.com', referred_by=self.l1)
+
+    def pay(self, amount, status='paid'):
+        return Payment.objects.create(
+            user=self.buyer, plot_id=1, razorpay_order_id=f"order_{amount}", amount=amount, status=status
+        )
+
+    def run_engine(self, *args):
+        call_command('compute_referral_commissions', *args, stdout=mock.MagicMock())
+
+    def test_each_upline_level_earns_its_percentage_once(self):
+        payment = self.pay(1000)
+        self.pay(500, status='created')
+        plot = make_plot(self.top)
+        Booking.objects.create(plot_listing=plot, client=self.buyer, booking_type='full_plot',
+                               total_price=Decimal('20000.00'), status='confirmed')
+
+        self.run_engine()
+        self.run_engine('--restart')
+
+        rows = ReferralCommission.objects.filter(source_type='payment', source_id=payment.pk).order_by('level')
+        self.assertEqual(
+            [(row.user.username, row.level, row.amount) for row in rows],
+            [('l1', 1, Decimal('20.00')), ('l2', 2, Decimal('10.00')), ('l3', 3, Decimal('5.00'))],
+        )
+        self.assertEqual(ReferralCommission.objects.filter(source_type='booking').count(), 3)
+        self.assertEqual(ReferralCommission.objects.count(), 6)
+
+    def test_resumes_from_checkpoint_and_revisits_late_payments(self):
+        from .commissions import process_batch
+        first, pending, last = self.pay(100), self.pay(200, status='created'), self.pay(300)
+
+        self.assertEqual(process_batch('payment', batch_size=1), (1, 3))
+        self.assertEqual(BatchCheckpoint.objects.get(name='referral_commissions:payment').position, first.pk)
+        self.run_engine('--source', 'payment')
+        self.assertEqual(ReferralCommission.objects.filter(source_id=last.pk).count(), 3)
+
+        pending.status = 'paid'
+        pending.save()
+        self.run_engine('--source', 'payment')
+        self.assertEqual(ReferralCommission.objects.filter(source_id=pending.pk).count(), 3)
+        self.assertEqual(ReferralCommission.objects.count(), 9)
+
+    def test_a_booking_paid_through_a_payment_earns_once(self):
+        plot = make_plot(self.top)
+        booking = Booking.objects.create(plot_listing=plot, client=self.buyer, booking_type='square_feet',
+                                         booked_area_sqft=Decimal('100.00'), total_price=Decimal('1000.00'),
+                                         status='confirmed')
+        payment = Payment.objects.create(user=self.buyer, plot_id=plot.pk, booking=booking,
+                                         razorpay_order_id='order_sqft', amount=Decimal('1000.00'), status='paid')
+        self.run_engine()
+
+        self.assertFalse(ReferralCommission.objects.filter(source_type='booking').exists())
+        rows = ReferralCommission.objects.filter(source_type='payment', source_id=payment.pk).order_by('level')
+        self.assertEqual([(row.user.username, row.amount) for row in rows],
+                         [('l1', Decimal('20.00')), ('l2', Decimal('10.00')), ('l3', Decimal('5.00'))])
+
+    @override_settings(REFERRAL_COMMISSION_PERCENTS=['2', '', '0.5'])
+    def test_blank_level_pays_nothing(self):
+        self.pay(1000)
+        self.run_engine()
+        self.assertEqual(
+            sorted(ReferralCommission.objects.values_list('user__username', 'amount')),
+            [('l1', Decimal('20.00')), ('l3', Decimal('5.00'))],
+        )
+
+    @override_settings(REFERRAL_COMMISSION_PERCENTS=['2', 'one'])
+    def test_malformed_percent_is_a_configuration_error(self):
+        from .commissions import get_level_percents
+        with self.assertRaises(ImproperlyConfigured):
+            get_level_percents()
+
+
+class HotQueryPlanTests(TestCase):
+    def test_hot_filter_queries_use_indexes(self):
+        from .benchmark_data import seed_benchmark_dataset
+        seed_benchmark_dataset(scale=0.05)
+        out = mock.MagicMock()
+        call_command('check_query_plans', stdout=out)
+        self.assertNotIn('SEQ SCAN', ''.join(str(call) for call in out.write.call_args_list))
+
+
+class SearchTests(APITestCase):
+    url = '/api/search/'
+
+    def setUp(self):
+        cache.clear()
+        owner = CustomUser.objects.create_user(username='owner', email='owner@example.com')
+        vendor = CustomUser.objects.create_user(username='vendor', email='vendor@example.com', user_type='b2b_vendor')
+        self.plot = make_plot(owner, title='Riverside Farmland', location='Chennai')
+        make_plot(owner, title='Hilltop Orchard', location='Coimbatore')
+        self.project = SQLFTProject.objects.create(
+            user=owner, project_name='Sunrise Meadows', location='Chennai', description='Gated farmland community',
+            plot_type='Residential', unit='sqft', price=Decimal('1500.00'),
+        )
+        self.wire = EcommerceProduct.objects.create(
+            vendor=vendor, name='Farmland Fencing Wire', description='Galvanised', price=Decimal('40.00'),
+            category='material',
+        )
+        EcommerceProduct.objects.create(
+            vendor=vendor, name='Farmland Drip Kit', price=Decimal('90.00'), category='material', is_active=False,
+        )
+        CommercialProperty.objects.create(
+            user=owner, property_name='Anna Salai Office', commercial_type='Office Space', locality='Anna Salai',
+            city='Chennai', area_sqft=Decimal('900.00'), description='Near farmland markets',
+            contact_person='Ravi', contact_number='9000000000',
+        )
+
+    def results(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [(row['kind'], row['title']) for row in response.data]
+
+    def test_ranks_matches_across_catalogs(self):
+        title_hits = {('plot', 'Riverside Farmland'), ('material', 'Farmland Fencing Wire')}
+        results = self.results(q='farmland')
+        # Title matches outrank description matches; the inactive material is not listed.
+        self.assertEqual(set(results[:2]), title_hits)
+        self.assertEqual(set(results[2:]), {('project', 'Sunrise Meadows'), ('commercial', 'Anna Salai Office')})
+        self.assertEqual(set(self.results(q='farmland', kind='plot,material')), title_hits)
+
+    def test_index_follows_saves_and_deletes(self):
+        self.plot.title = 'Lakeview Acres'
+        self.plot.save()
+        self.assertEqual(self.results(q='lakeview'), [('plot', 'Lakeview Acres')])
+        self.wire.is_active = False
+        self.wire.save()
+        self.assertNotIn(('material', 'Farmland Fencing Wire'), self.results(q='farmland'))
+        self.project.delete()
+        self.assertEqual(self.results(q='meadows'), [])
+        self.assertEqual(SearchEntry.objects.count(), 5)
+
+    def test_rebuild_matches_signal_maintained_index(self):
+        from .search import rebuild_search_index
+        before = set(SearchEntry.objects.values_list('kind', 'title', 'location', 'is_public'))
+        self.assertEqual(rebuild_search_index(), 6)
+        self.assertEqual(set(SearchEntry.objects.values_list('kind', 'title', 'location', 'is_public')), before)
+
+    def test_rejects_missing_query_and_unknown_kind(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'q': 'farm', 'kind': 'product'}).status_code, 400)
+
+    def test_plot_listing_search_parameter(self):
+        self.client.force_authenticate(CustomUser.objects.get(username='owner'))
+        response = self.client.get('/api/plots/', {'search': 'coimbatore'})
+        self.assertEqual([plot['title'] for plot in response.data], ['Hilltop Orchard'])
+
+    def test_location_typos_match_on_postgres(self):
+        from .search import has_trigram, uses_postgres_search
+        if not uses_postgres_search() or not has_trigram():
+            self.skipTest("Trigram matching needs Postgres with pg_trgm.")
+        self.assertIn(('plot', 'Hilltop Orchard'), self.results(q='coimbatre'))
+
+
+class NearbyListingTests(APITestCase):
+    url = '/api/public/plots/nearby/'
+
+    def setUp(self):
+        owner = CustomUser.objects.create_user(username='owner', email='owner@example.com')
+        # Chennai Central, ~3 km south (Mylapore), ~25 km south-west (Tambaram), Bengaluru.
+        make_plot(owner, title='Central', latitude=13.0827, longitude=80.2707)
+        make_plot(owner, title='Mylapore', latitude=13.0368, longitude=80.2676)
+        make_plot(owner, title='Tambaram', latitude=12.9249, longitude=80.1000)
+        make_plot(owner, title='Bengaluru', latitude=12.9716, longitude=77.5946)
+        make_plot(owner, title='Unmapped')
+
+    def test_parses_coordinates_from_map_links(self):
+        from .geo import parse_map_link
+        self.assertEqual(parse_map_link('https://www.google.com/maps/place/X/@13.05,80.25,15z/data=!3d13.0368!4d80.2676'),
+                         (13.0368, 80.2676))
+        self.assertEqual(parse_map_link('https://www.google.com/maps/@12.9716,77.5946,14z'), (12.9716, 77.5946))
+        self.assertEqual(parse_map_link('https://maps.google.com/?q=13.0827%2C80.2707'), (13.0827, 80.2707))
+        self.assertIsNone(parse_map_link('https://maps.app.goo.gl/AbCdEf123'))
+        self.assertIsNone(parse_map_link('https://www.google.com/maps/@95.1,80.2,14z'))
+
+    def test_returns_listings_in_radius_nearest_first(self):
+        response = self.client.get(self.url, {'lat': 13.0827, 'lng': 80.2707, 'radius_km': 30})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['title'] for row in response.data], ['Central', 'Mylapore', 'Tambaram'])
+        self.assertEqual(response.data[0]['distance_km'], 0)
+        self.assertAlmostEqual(response.data[1]['distance_km'], 5.1, delta=0.1)
+
+        response = self.client.get(self.url, {'lat': 13.0827, 'lng': 80.2707, 'radius_km': 10, 'limit': 1})
+        self.assertEqual([row['title'] for row in response.data], ['Central'])
+
+    def test_map_link_fills_project_coordinates(self):
+        project = SQLFTProject.objects.create(
+            project_name='Sunrise Meadows', location='Tambaram', description='Gated', plot_type='Residential',
+            unit='sqft', price=Decimal('1500.00'), google_map_link='https://www.google.com/maps/@12.9249,80.1,14z',
+        )
+        self.assertEqual((project.latitude, project.longitude), (12.9249, 80.1))
+        response = self.client.get('/api/public/micro-plots/nearby/', {'lat': 12.93, 'lng': 80.1, 'radius_km': 2})
+        self.assertEqual([row['project_name'] for row in response.data], ['Sunrise Meadows'])
+
+    def test_rejects_invalid_parameters(self):
+        for params in ({}, {'lat': 'north', 'lng': 80}, {'lat': 91, 'lng': 80}, {'lat': 13, 'lng': 80, 'radius_km': 500}):
+            self.assertEqual(self.client.get(self.url, params).status_code, 400)
+
+
+class SqftInventoryTests(CartTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.plot = make_plot(self.client_user, available_sqft_for_investment=Decimal('100.00'))
+
+    def book(self, area):
+        return self.client.post('/api/purchase/micro-plot/', {
+            'plot_listing': self.plot.id, 'booked_area_sqft': area, 'total_price': '8500.00',
+        })
+
+    def available(self):
+        self.plot.refresh_from_db()
+        return self.plot.available_sqft_for_investment
+
+    def test_bookings_take_holds_and_never_oversell(self):
+        self.assertEqual(self.book('60').status_code, 201)
+        self.assertEqual(self.available(), Decimal('40.00'))
+        response = self.book('50')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.available(), Decimal('40.00'))
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertEqual(SqftReservation.objects.get().status, SqftReservation.STATUS_HELD)
+
+    def test_booking_endpoint_takes_a_hold(self):
+        def book(area):
+            return self.client.post('/api/bookings/', {
+                'plot_listing': self.plot.id, 'booking_type': 'square_feet', 'booked_area_sqft': area,
+                'total_price': '0.00',
+            })
+
+        self.assertEqual(book('100').status_code, 201)
+        self.assertEqual(self.available(), Decimal('0.00'))
+        self.assertFalse(self.plot.is_available_full)
+        self.assertEqual(SqftReservation.objects.get().area_sqft, Decimal('100.00'))
+        response = book('10')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['plot_ids'], [self.plot.id])
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_checkout_conflict_rolls_back_every_plot(self):
+        self.fill_cart(plots=1, products=0)
+        plot_ct = ContentType.objects.get_for_model(PlotListing)
+        ShortlistCartItem.objects.create(cart=self.cart, content_type=plot_ct, object_id=self.plot.id, quantity=500)
+        response = self.client.post('/api/cart/checkout/')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['plot_ids'], [self.plot.id])
+        self.assertFalse(Booking.objects.exists())
+        self.assertEqual(PlotListing.objects.get(title='Plot 0').available_sqft_for_investment, Decimal('1200.00'))
+        self.assertEqual(self.cart.items.count(), 2)
+
+    def test_sweeper_releases_expired_holds(self):
+        from .inventory import release_expired_holds
+        self.book('30')
+        self.assertEqual(release_expired_holds(), 0)
+        self.assertEqual(release_expired_holds(now=timezone.now() + timedelta(hours=1)), 1)
+        self.assertEqual(self.available(), Decimal('100.00'))
+        self.assertEqual(Booking.objects.get().status, 'cancelled')
+        self.assertEqual(SqftReservation.objects.get().status, SqftReservation.STATUS_RELEASED)
+
+    def test_verified_payment_confirms_hold(self):
+        from .inventory import confirm_payment_holds, release_expired_holds
+        self.book('30')
+        payment = Payment.objects.create(user=self.client_user, plot_id=self.plot.id, razorpay_order_id='order_1',
+                                         amount=8500, status='paid')
+        SqftReservation.objects.update(payment=payment)
+        # Paid after the hold expired: the area is taken again while the plot still has it.
+        release_expired_holds(now=timezone.now() + timedelta(hours=1))
+        self.assertEqual(confirm_payment_holds(payment), 0)
+        self.assertEqual(SqftReservation.objects.get().status, SqftReservation.STATUS_CONFIRMED)
+        self.assertEqual(Booking.objects.get().status, 'pending')
+        self.assertEqual(self.available(), Decimal('70.00'))
+        self.assertEqual(release_expired_holds(now=timezone.now() + timedelta(hours=2)), 0)
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+    def test_payment_for_an_expired_hold_confirms_its_booking(self):
+        from .inventory import release_expired_holds
+        from .payments import mark_paid
+        self.book('30')
+        booking = Booking.objects.get()
+        Payment.objects.create(user=self.client_user, plot_id=self.plot.id, booking=booking,
+                               razorpay_order_id='order_1', amount=8500, status='created')
+        SqftReservation.objects.update(payment=Payment.objects.get())
+        release_expired_holds(now=timezone.now() + timedelta(hours=1))
+        self.assertEqual(Booking.objects.get().status, 'cancelled')
+        paid, lost = mark_paid({'order_1': 'pay_1'})
+        self.assertEqual((len(paid), lost), (1, 0))
+        self.assertEqual(Booking.objects.get().status, 'confirmed')
+        self.assertEqual(SqftReservation.objects.get().status, SqftReservation.STATUS_CONFIRMED)
+        self.assertEqual(self.available(), Decimal('70.00'))
+
+    def test_public_catalog_shows_the_area_after_holds_and_releases(self):
+        from .inventory import release_expired_holds
+        cache.clear()
+
+        def catalog_area():
+            return self.client.get('/api/public/plots/').data[0]['available_sqft_for_investment']
+
+        self.assertEqual(catalog_area(), '100.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.book('60').status_code, 201)
+        self.assertEqual(catalog_area(), '40.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            release_expired_holds(now=timezone.now() + timedelta(hours=1))
+        self.assertEqual(catalog_area(), '100.00')
+
+    def test_cancelling_or_deleting_a_booking_returns_its_area(self):
+        self.book('30')
+        self.book('20')
+        first, second = Booking.objects.order_by('pk')
+        first.status = 'cancelled'
+        first.save()
+        self.assertEqual(self.available(), Decimal('80.00'))
+        second.delete()
+        self.assertEqual(self.available(), Decimal('100.00'))
+
+
+class SqftConcurrencyTests(TransactionTestCase):
+    def test_parallel_bookings_do_not_oversell(self):
+        from django.db import connection
+        if connection.vendor != 'postgresql':
+            self.skipTest("SQLite serializes writers; run on Postgres.")
+        out = mock.MagicMock()
+        call_command('benchmark_sqft_bookings', bookings=120, concurrency=12, stdout=out)
+        report = ''.join(str(call) for call in out.write.call_args_list)
+        self.assertIn('72 held, 48 refused, 0 errors', report)
+        self.assertIn('oversold 0 sqft', report)
+
+
+class StockLedgerTests(CartTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = EcommerceProduct.objects.create(
+            vendor=self.vendor, name='Steel rods', price=Decimal('95.00'), category='material',
+            stock_quantity=10, moq=2,
+        )
+
+    def buy(self, quantity):
+        return self.client.post('/api/purchase/material/', {
+            'items': [{'product': self.product.id, 'quantity': quantity}],
+        }, format='json')
+
+    def available(self):
+        from .stock import available_stock
+        return available_stock(self.product)
+
+    def test_product_stock_is_split_over_shards(self):
+        self.assertEqual(
+            list(self.product.stock_shards.order_by('shard').values_list('available', flat=True)), [3, 3, 2, 2],
+        )
+        service = EcommerceProduct.objects.create(
+            vendor=self.vendor, name='Survey', price=Decimal('500.00'), category='service', stock_quantity=5,
+        )
+        self.assertFalse(service.stock_shards.exists())
+
+    def test_purchase_holds_stock_across_shards_and_never_oversells(self):
+        # 7 units are more than any one shard has.
+        self.assertEqual(self.buy(7).status_code, 201)
+        self.assertEqual(self.available(), 3)
+        self.assertEqual(StockReservation.objects.aggregate(total=Sum('quantity'))['total'], 7)
+        response = self.buy(4)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['product_ids'], [self.product.id])
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(self.available(), 3)
+
+    def test_minimum_order_quantity_is_enforced(self):
+        self.assertEqual(self.buy(1).status_code, 400)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(self.available(), 10)
+
+    def test_checkout_conflict_rolls_back_every_product(self):
+        self.fill_cart(plots=0, products=1)
+        product_ct = ContentType.objects.get_for_model(EcommerceProduct)
+        ShortlistCartItem.objects.create(cart=self.cart, content_type=product_ct, object_id=self.product.id, quantity=11)
+        response = self.client.post('/api/cart/checkout/')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['product_ids'], [self.product.id])
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(StockShard.objects.aggregate(total=Sum('available'))['total'], 110)
+
+    def test_sweeper_releases_expired_holds_and_syncs_quantity(self):
+        from .stock import release_expired_stock, sync_stock_quantities
+        # Every shard has 2 units, so each purchase below takes a single hold.
+        self.buy(2)
+        self.assertEqual(sync_stock_quantities(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, 8)
+        self.assertEqual(release_expired_stock(), 0)
+        self.assertEqual(release_expired_stock(now=timezone.now() + timedelta(hours=1)), 1)
+        self.assertEqual(self.available(), 10)
+        self.assertEqual(Order.objects.get().status, 'cancelled')
+
+    def test_confirmed_orders_keep_stock_and_cancelled_orders_return_it(self):
+        from .stock import release_expired_stock
+        self.buy(2)
+        self.buy(2)
+        first, second = Order.objects.order_by('pk')
+        first.status = 'CONFIRMED'
+        first.save()
+        self.assertEqual(StockReservation.objects.filter(order=first).get().status, StockReservation.STATUS_COMMITTED)
+        self.assertEqual(release_expired_stock(now=timezone.now() + timedelta(hours=1)), 1)
+        self.assertEqual(self.available(), 8)
+        first.status = 'CANCELLED'
+        first.save()
+        self.assertEqual(self.available(), 10)
+
+    def test_vendor_restock_sets_available_units(self):
+        self.buy(4)
+        self.product.stock_quantity = 20
+        self.product.save()
+        self.assertEqual(self.available(), 20)
+        self.assertEqual(self.product.stock_shards.count(), 4)
+
+
+class StockConcurrencyTests(TransactionTestCase):
+    def test_flash_sale_does_not_oversell(self):
+        from django.db import connection
+        if connection.vendor != 'postgresql':
+            self.skipTest("SQLite serializes writers; run on Postgres.")
+        out = mock.MagicMock()
+        call_command('benchmark_stock_reservations', orders=200, concurrency=12, shards=4, stdout=out)
+        report = ''.join(str(call) for call in out.write.call_args_list)
+        self.assertIn('120 held, 80 refused, 0 errors', report)
+        self.assertIn('oversold 0', report)
+
+    @override_settings(STOCK_SHARD_COUNT=1)
+    def test_carts_sharing_products_do_not_deadlock(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from django.db import connection, transaction
+        from .stock import available_stock, reserve
+        if connection.vendor != 'postgresql':
+            self.skipTest("SQLite serializes writers; run on Postgres.")
+        user = CustomUser.objects.create_user(username='buyer', email='buyer@example.com')
+        products = [
+            EcommerceProduct.objects.create(vendor=user, name=f"Cement {i}", price=Decimal('400.00'),
+                                            category='material', stock_quantity=1000)
+            for i in range(3)
+        ]
+
+        def checkout(worker):
+            # Each worker lists the same products in a different order.
+            ordered = products[worker % 3:] + products[:worker % 3]
+            try:
+                for _ in range(10):
+                    with transaction.atomic():
+                        order = Order.objects.create(client=user, total_amount=Decimal('1200.00'))
+                        reserve([(order, product, 1) for product in ordered])
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            list(pool.map(checkout, range(6)))
+        self.assertEqual([available_stock(product) for product in products], [940, 940, 940])
+
+
+@override_settings(PAYMENT_GATEWAY='fake')
+class CreateOrderTests(CartTestMixin, APITestCase):
+    url = '/api/payments/create-order/'
+
+    def setUp(self):
+        super().setUp()
+        self.plot = make_plot(self.client_user, available_sqft_for_investment=Decimal('100.00'))
+
+    def create_order(self, key=None, **data):
+        payload = {'plot_id': self.plot.id, 'amount': 8500, 'booking_type': 'square_feet', 'booked_area_sqft': '30'}
+        payload.update(data)
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        return self.client.post(self.url, payload, **headers)
+
+    def test_creates_booking_hold_and_payment(self):
+        response = self.create_order()
+        self.assertEqual(response.status_code, 200)
+        payment = Payment.objects.get()
+        self.assertEqual(payment.razorpay_order_id, response.data['order_id'])
+        self.assertEqual(response.data['amount'], 850000)
+        booking = Booking.objects.get()
+        self.assertEqual(booking.plot_listing, self.plot)
+        self.assertEqual(SqftReservation.objects.get(booking=booking).payment, payment)
+
+    def test_amount_in_rupees_and_paise_is_exact(self):
+        response = self.create_order(amount='8500.35')
+        self.assertEqual(response.data['amount'], 850035)
+        payment = Payment.objects.get()
+        self.assertEqual((payment.amount, payment.amount_paise), (Decimal('8500.35'), 850035))
+        self.assertEqual(Booking.objects.get().total_price, Decimal('25500.00'))
+
+    def test_booking_total_is_priced_by_booking_type(self):
+        self.create_order(booked_area_sqft='100')
+        self.assertEqual(Booking.objects.get().total_price, Decimal('85000.00'))  # 100 sqft x 850
+        self.create_order(booking_type='full_plot', booked_area_sqft='')
+        self.assertEqual(Booking.objects.get(booking_type='full_plot').total_price, Decimal('1020000.00'))
+        self.assertEqual(self.create_order(booked_area_sqft='').status_code, 400)
+
+    def test_retry_with_same_key_replays_the_first_response(self):
+        first = self.create_order(key='checkout-1')
+        retry = self.create_order(key='checkout-1')
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.data['order_id'], first.data['order_id'])
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Payment.objects.count(), 1)
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertEqual(IdempotencyKey.objects.get().payment, Payment.objects.get())
+        self.assertEqual(self.create_order(key='checkout-2').status_code, 200)
+        self.assertEqual(Payment.objects.count(), 2)
+
+    def test_key_reused_for_another_request_or_still_running_is_refused(self):
+        self.create_order(key='checkout-1')
+        self.assertEqual(self.create_order(key='checkout-1', amount=9000).status_code, 422)
+        IdempotencyKey.objects.create(user=self.client_user, key='checkout-2',
+                                      request_hash=IdempotencyKey.objects.get().request_hash)
+        self.assertEqual(self.create_order(key='checkout-2').status_code, 409)
+        IdempotencyKey.objects.filter(key='checkout-2').update(locked_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(self.create_order(key='checkout-2').status_code, 200)
+
+    def test_gateway_failure_writes_nothing_and_frees_the_key(self):
+        from . import payments
+        with mock.patch.object(payments.FakeGateway, 'create_order', side_effect=payments.PaymentGatewayError('timeout')):
+            self.assertEqual(self.create_order(key='checkout-1').status_code, 502)
+        self.assertFalse(Booking.objects.exists())
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(self.create_order(key='checkout-1').status_code, 200)
+
+    def test_unavailable_area_creates_no_payment(self):
+        response = self.create_order(key='checkout-1', booked_area_sqft='500')
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Payment.objects.exists())
+        self.assertFalse(Booking.objects.exists())
+        self.assertEqual(self.create_order(key='checkout-1', booked_area_sqft='500').status_code, 409)
+
+    @override_settings(PAYMENT_GATEWAY='razorpay', RAZORPAY_KEY_ID='rzp_test_key', RAZORPAY_KEY_SECRET='secret')
+    def test_razorpay_client_is_reused(self):
+        from . import payments
+        payments.close_gateways()
+        self.addCleanup(payments.close_gateways)
+        gateway = payments.get_gateway()
+        self.assertIs(payments.get_gateway(), gateway)
+        self.assertEqual(gateway.client.session.timeout, 10)
+        self.assertEqual(gateway.client.session.get_adapter('https://api.razorpay.com')._pool_maxsize, 10)
+
+
+@override_settings(PAYMENT_GATEWAY='fake', RAZORPAY_WEBHOOK_SECRET='whsec', RAZORPAY_KEY_SECRET='secret',
+                   MEDIA_ROOT=tempfile.mkdtemp())
+class PaymentWebhookTests(CartTestMixin, APITestCase):
+    url = '/api/payments/webhook/razorpay/'
+
+    def setUp(self):
+        super().setUp()
+        self.plot = make_plot(self.client_user, available_sqft_for_investment=Decimal('100.00'))
+        response = self.client.post('/api/payments/create-order/', {
+            'plot_id': self.plot.id, 'amount': 8500, 'booking_type': 'square_feet', 'booked_area_sqft': '30',
+        })
+        self.order_id = response.data['order_id']
+
+    def deliver(self, event, event_id, signature=None):
+        body = json.dumps({
+            'event': event,
+            'payload': {'payment': {'entity': {'id': 'pay_1', 'order_id': self.order_id, 'amount': 850000}}},
+        }).encode()
+        signature = signature or hmac.new(b'whsec', body, hashlib.sha256).hexdigest()
+        return self.client.post(self.url, body, content_type='application/json',
+                                HTTP_X_RAZORPAY_SIGNATURE=signature, HTTP_X_RAZORPAY_EVENT_ID=event_id)
+
+    def receipts(self):
+        return NotificationOutbox.objects.filter(subject__startswith='Payment Receipt').count()
+
+    def test_only_signed_events_are_stored(self):
+        self.assertEqual(self.deliver('payment.captured', 'evt_1').status_code, 200)
+        self.assertEqual(self.deliver('payment.captured', 'evt_2', signature='forged').status_code, 400)
+        self.assertEqual(list(PaymentEvent.objects.values_list('event_id', flat=True)), ['evt_1'])
+        self.assertEqual(Payment.objects.get().status, 'created')
+
+    def test_consumer_applies_each_event_once(self):
+        from .webhooks import process_payment_events
+        self.deliver('payment.failed', 'evt_1')
+        self.assertEqual(process_payment_events(), (1, 0))
+        self.assertEqual(Payment.objects.get().status, 'failed')
+
+        self.deliver('payment.captured', 'evt_2')
+        self.deliver('payment.captured', 'evt_2')
+        self.deliver('payment.failed', 'evt_1')
+        self.assertEqual(process_payment_events(), (3, 1))
+        self.assertEqual(process_payment_events(), (0, 0))
+        payment = Payment.objects.get()
+        self.assertEqual((payment.status, payment.razorpay_payment_id), ('paid', 'pay_1'))
+        self.assertEqual(payment.booking.status, 'confirmed')
+        self.assertEqual(SqftReservation.objects.get().status, SqftReservation.STATUS_CONFIRMED)
+        self.assertEqual(self.receipts(), 1)
+
+    def test_browser_verification_after_webhook_sends_no_second_receipt(self):
+        from .webhooks import process_payment_events
+        self.deliver('payment.captured', 'evt_1')
+        process_payment_events()
+        signature = hmac.new(b'secret', f"{self.order_id}|pay_1".encode(), hashlib.sha256).hexdigest()
+        response = self.client.post('/api/verify-payment/', {
+            'razorpay_order_id': self.order_id, 'razorpay_payment_id': 'pay_1', 'razorpay_signature': signature,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['receipt_sent'])
+        self.assertEqual(self.receipts(), 1)
+
+    def test_reconciliation_marks_settled_payments_paid_and_flags_unknown_orders(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as export:
+            export.write(f"entity_id,order_id,amount,type\npay_1,{self.order_id},850000,payment\n"
+                         "rfnd_1,,1000,refund\n")
+        self.addCleanup(os.remove, export.name)
+        out = mock.MagicMock()
+        call_command('reconcile_payments', export=export.name, dry_run=True, stdout=out)
+        self.assertEqual(Payment.objects.get().status, 'created')
+        call_command('reconcile_payments', export=export.name, stdout=out)
+        self.assertEqual(Payment.objects.get().status, 'paid')
+        self.assertEqual(self.receipts(), 1)
+
+        with open(export.name, 'a') as extra:
+            extra.write("pay_2,order_unknown,500,payment\n")
+        with self.assertRaises(CommandError):
+            call_command('reconcile_payments', export=export.name, stdout=out)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class PaymentReceiptTests(CartTestMixin, APITestCase):
+    def pay(self, amount, user=None):
+        return Payment.objects.create(user=user or self.client_user, plot_id=1, razorpay_order_id=f"order_{amount}",
+                                      razorpay_payment_id='pay_1', amount=amount, status='paid')
+
+    def test_taxes_are_exact_and_numbers_follow_the_sequence(self):
+        from .receipts import issue_receipt
+        with self.captureOnCommitCallbacks(execute=True):
+            first = issue_receipt(self.pay(1000.1))
+        self.assertEqual(
+            (first.base_amount, first.service_tax, first.sgst, first.cgst, first.total_amount),
+            (Decimal('1000.10'), Decimal('60.01'), Decimal('25.00'), Decimal('25.00'), Decimal('1110.11')),
+        )
+        second = issue_receipt(self.pay(250))
+        year = timezone.localdate().year
+        self.assertEqual([first.number, second.number], [f"GAFPL/{year}/000001", f"GAFPL/{year}/000002"])
+        self.assertEqual(issue_receipt(first.payment), first)
+        with first.pdf.open('rb') as pdf:
+            content = pdf.read()
+        self.assertTrue(content.startswith(b'%PDF-1.4'))
+        self.assertIn(b'Rs. 1,110.11', content)
+        self.assertEqual(first.etag, hashlib.sha256(content).hexdigest())
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+    def test_rolled_back_receipt_leaves_no_file(self):
+        from django.db import transaction
+        from .receipts import issue_receipt
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                receipt = issue_receipt(self.pay(300))
+                transaction.set_rollback(True)
+        self.assertTrue(receipt.pdf.name)
+        self.assertFalse(receipt.pdf.storage.exists(receipt.pdf.name))
+        self.assertFalse(PaymentReceipt.objects.exists())
+
+    def test_receipt_is_served_with_etag(self):
+        payment = self.pay(500)
+        url = f'/api/payments/{payment.id}/receipt/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(PaymentReceipt.objects.count(), 1)
+
+        other = CustomUser.objects.create_user(username='other', email='other@example.com')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        unpaid = Payment.objects.create(user=other, plot_id=1, razorpay_order_id='order_x', amount=1, status='created')
+        self.assertEqual(self.client.get(f'/api/payments/{unpaid.id}/receipt/').status_code, 404)
+
+    def test_missing_pdf_is_written_again_when_served(self):
+        from .receipts import issue_receipt
+        payment = self.pay(700)
+        with self.captureOnCommitCallbacks(execute=True):
+            receipt = issue_receipt(payment)
+        receipt.pdf.storage.delete(receipt.pdf.name)
+        response = self.client.get(f'/api/payments/{payment.id}/receipt/')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        self.assertEqual(response['ETag'], f'"{PaymentReceipt.objects.get().etag}"')
+
+    def test_receipt_email_renders_template(self):
+        from .receipts import send_payment_receipt_email
+        payment = self.pay(2000)
+        self.assertTrue(send_payment_receipt_email(payment, self.client_user))
+        message = NotificationOutbox.objects.get()
+        self.assertEqual(message.subject, f"Payment Receipt - {payment.receipt.number}")
+        self.assertIn('₹2,220.00', message.body)
+        self.assertIn('SGST @ 2.5%', message.body)
+
+
+class PaymentSummaryTests(CartTestMixin, APITestCase):
+    # Amounts whose taxes round half up, or would drift as floats
+    AMOUNTS = ['0.10', '8.35', '0.50', '1000.10', '333.33', '12345.67', '0.07', '99999.99']
+
+    def pay(self, amount, plot_id=1, status='paid'):
+        return Payment.objects.create(user=self.client_user, plot_id=plot_id, razorpay_order_id=f"order_{amount}",
+                                      amount=Decimal(amount), status=status)
+
+    def test_summary_matches_the_receipts_to_the_paisa(self):
+        from . import money
+        from .receipts import compute_amounts
+        for amount in self.AMOUNTS:
+            self.pay(amount)
+        self.pay('500.00', status='created')
+        last_month = timezone.now() - timedelta(days=40)
+        Payment.objects.filter(amount__in=self.AMOUNTS[:3]).update(created_at=last_month)
+
+        summary = money.summarize_payments(Payment.objects.filter(status='paid'), 'month')
+        receipts = [compute_amounts(amount) for amount in self.AMOUNTS]
+        for field in ('base_amount', 'service_tax', 'sgst', 'cgst', 'total_amount'):
+            self.assertEqual(Decimal(summary[field]), sum(receipt[field] for receipt in receipts), field)
+        self.assertEqual(summary['count'], 8)
+        self.assertEqual([row['count'] for row in summary['periods']], [3, 5])
+        self.assertEqual(summary['periods'][0]['period'], timezone.localtime(last_month).strftime('%Y-%m'))
+        self.assertEqual(summary['periods'][0]['service_tax'], '0.54')
+        self.assertEqual(money.summarize_payments(Payment.objects.none())['total_amount'], '0.00')
+
+    def test_payment_stats_by_period(self):
+        admin = CustomUser.objects.create_user(username='admin', email='admin@example.com', user_type='admin')
+        self.client.force_authenticate(admin)
+        self.pay('1000.10')
+        url = '/api/admin/dashboard/payment-stats/'
+        self.assertNotIn('summary', self.client.get(url).data)
+        summary = self.client.get(url, {'period': 'day'}).data['summary']
+        self.assertEqual((summary['base_amount'], summary['total_amount']), ('1000.10', '1110.11'))
+        self.assertEqual(self.client.get(url, {'period': 'week'}).status_code, 400)
+
+    def test_vendor_summary_and_owner_payouts(self):
+        product = EcommerceProduct.objects.create(vendor=self.vendor, name='Cement', price=Decimal('410.10'),
+                                                  category='material', stock_quantity=100)
+        for status in ('DELIVERED', 'pending'):
+            order = Order.objects.create(client=self.client_user, total_amount=Decimal('1230.30'), status=status)
+            OrderItem.objects.create(order=order, product=product, quantity=3, price_at_purchase=product.price)
+        self.client.force_authenticate(self.vendor)
+        response = self.client.get('/api/vendor/payments/summary/', {'period': 'month'})
+        self.assertEqual(response.data['total_earned'], '1230.30')
+        self.assertEqual([row['earned'] for row in response.data['periods']], ['1230.30'])
+
+        mine = make_plot(self.vendor)
+        self.pay('200.05', plot_id=mine.pk)
+        self.pay('100.00', plot_id=mine.pk, status='created')
+        self.pay('999.00', plot_id=make_plot(self.client_user).pk)
+        response = self.client.get('/api/owner/payouts/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['count'], response.data['base_amount']), (1, '200.05'))
+        self.assertEqual(len(response.data['periods']), 1)
+
+
+class AdminExportTests(APITestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(username='admin', email='admin@example.com', user_type='admin')
+        self.client.force_authenticate(self.admin)
+        for i, amount in enumerate(['100.10', '200.20', '300.30']):
+            payment = Payment.objects.create(user=self.admin, plot_id=1, razorpay_order_id=f"order_{i}",
+                                             amount=Decimal(amount), status='paid')
+            Payment.objects.filter(pk=payment.pk).update(created_at=timezone.now() - timedelta(days=10 * i))
+
+    def export(self, entity='payments', **params):
+        return self.client.get(f'/api/admin/export/{entity}/', params)
+
+    def test_csv_export_streams_rows_in_range_and_gzips(self):
+        start = (timezone.localdate() - timedelta(days=15)).isoformat()
+        response = self.export(**{'from': start})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn(f'filename="payments-{start}.csv"', response['Content-Disposition'])
+        rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0][:3], ['id', 'user_id', 'user_username'])
+        self.assertEqual([(row[7], row[8]) for row in rows[1:]], [('100.10', '10010'), ('200.20', '20020')])
+
+        response = self.client.get('/api/admin/export/payments/', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(len(gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()), 4)
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_parquet_export_keeps_types_in_row_groups(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        response = self.export(format='parquet')
+        self.assertEqual(response['Content-Type'], 'application/vnd.apache.parquet')
+        parquet = pq.ParquetFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(parquet.metadata.num_row_groups, 2)
+        table = parquet.read()
+        self.assertEqual(table.schema.field('amount').type, pa.decimal128(14, 2))
+        self.assertEqual(table.schema.field('created_at').type, pa.timestamp('us', tz='UTC'))
+        self.assertEqual(table.column('amount').to_pylist(), [Decimal('100.10'), Decimal('200.20'), Decimal('300.30')])
+
+        users = pq.read_table(io.BytesIO(b''.join(self.export('users', format='parquet').streaming_content)))
+        self.assertEqual(users.column('username').to_pylist(), ['admin'])
+        self.assertNotIn('aadhaar_card', users.column_names)
+
+    def test_export_rejects_unknown_requests(self):
+        self.assertEqual(self.export('plots').status_code, 404)
+        response = self.export(format='xlsx')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('format', response.json())
+        self.assertEqual(self.export(to='yesterday').status_code, 400)
+        self.client.force_authenticate(CustomUser.objects.create_user(username='c', email='c@example.com'))
+        self.assertEqual(self.export().status_code, 403)
+
+
+class BulkImportTests(CartTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.project = SQLFTProject.objects.create(
+            project_name='Sunrise Meadows', location='Tambaram', description='Gated', plot_type='Residential',
+            unit='sqft', price=Decimal('1500.00'),
+        )
+
+    def upload(self, entity, content, name='rows.csv', **params):
+        upload = SimpleUploadedFile(name, content.encode() if isinstance(content, str) else content)
+        query = '?dry_run=true' if params.get('dry_run') else ''
+        return self.client.post(f'/api/imports/{entity}/{query}', {'file': upload}, format='multipart')
+
+    def test_subplots_are_created_then_updated_by_id(self):
+        csv_text = (
+            "Plot_Number,Dimensions,Area,Total_Price,Project,Remarks\n"
+            f"A-1,30x40,1200,1800000.50,{self.project.pk},\"corner, east\"\n"
+            f"A-2,30x40,1200.5,1800750,{self.project.pk},\n"
+            "\n"
+            f"A-3,,800,1200000,{self.project.pk},\n"
+        )
+        response = self.upload('subplots', csv_text)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual((response.data['rows'], response.data['created']), (3, 3))
+        first = SubPlotUnit.objects.get(plot_number='A-1')
+        self.assertEqual((first.total_price, first.remarks, first.status), (Decimal('1800000.50'), 'corner, east', 'Available'))
+        self.assertEqual(SubPlotUnit.objects.get(plot_number='A-3').dimensions, '')
+
+        response = self.upload('subplots', f"id,status\n{first.pk},Booked\n")
+        self.assertEqual((response.status_code, response.data['updated']), (201, 1))
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.area), ('Booked', Decimal('1200.00')))
+
+    def test_invalid_rows_are_reported_and_nothing_is_written(self):
+        csv_text = (
+            "id,plot_number,area,project\n"
+            f",B-1,100,{self.project.pk}\n"
+            f",B-2,lots,{self.project.pk}\n"
+            ",B-3,100,999999\n"
+            "999999,B-4,,\n"
+        )
+        response = self.upload('subplots', csv_text)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error_count'], 3)
+        self.assertEqual([(e['row'], sorted(e['errors'])) for e in response.data['errors']],
+                         [(3, ['area']), (4, ['project']), (5, ['id'])])
+        self.assertFalse(SubPlotUnit.objects.exists())
+
+        response = self.upload('subplots', f"plot_number,project\nB-1,{self.project.pk}\n", dry_run=True)
+        self.assertEqual((response.status_code, response.data['created'], response.data['dry_run']), (200, 1, True))
+        self.assertFalse(SubPlotUnit.objects.exists())
+        self.assertEqual(self.upload('subplots', b'\xff\xfe\x00garbage').status_code, 400)
+
+    def test_materials_from_xlsx_get_vendor_stock_and_search(self):
+        import openpyxl
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(['name', 'price', 'stock_quantity', 'moq', 'category'])
+        sheet.append(['Red bricks', 8.5, 10000, 500, 'service'])
+        sheet.append(['River sand', 1450, 40, None, None])
+        xlsx = io.BytesIO()
+        workbook.save(xlsx)
+
+        self.assertEqual(self.upload('materials', xlsx.getvalue(), name='catalog.xlsx').status_code, 403)
+        self.client.force_authenticate(self.vendor)
+        response = self.upload('materials', xlsx.getvalue(), name='catalog.xlsx')
+        self.assertEqual(response.status_code, 201, response.data)
+        bricks = EcommerceProduct.objects.get(name='Red bricks')
+        self.assertEqual((bricks.vendor, bricks.category, bricks.price, bricks.moq), (self.vendor, 'material', Decimal('8.50'), 500))
+        self.assertEqual(StockShard.objects.filter(product=bricks).aggregate(total=Sum('available'))['total'], 10000)
+        self.assertTrue(SearchEntry.objects.filter(object_id=bricks.pk, kind='material').exists())
+
+        response = self.upload('materials', f"id,stock_quantity,moq\n{bricks.pk},100,200\n")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('non_field_errors', response.data['errors'][0]['errors'])
+
+    def test_plots_are_owned_by_the_importer_with_coordinates(self):
+        response = self.upload('plots', (
+            "title,location,total_area_sqft,price_per_sqft,google_map_link\n"
+            "Green Acres,Chennai,1200,850,\"https://www.google.com/maps/@12.9249,80.1,14z\"\n"
+        ))
+        self.assertEqual(response.status_code, 201, response.data)
+        plot = PlotListing.objects.get()
+        self.assertEqual((plot.owner, plot.latitude, plot.longitude), (self.client_user, 12.9249, 80.1))
+        self.assertTrue(SearchEntry.objects.filter(object_id=plot.pk, kind='plot').exists())
+
+        other = CustomUser.objects.create_user(username='other', email='other@example.com')
+        self.client.force_authenticate(other)
+        response = self.upload('plots', f"id,title\n{plot.pk},Taken\n")
+        self.assertEqual(response.status_code, 400)
+
+    def test_command_imports_a_file(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write(f"plot_number,project\nC-1,{self.project.pk}\nC-2,{self.project.pk}\n")
+        self.addCleanup(os.remove, f.name)
+        out = io.StringIO()
+        call_command('import_rows', 'subplots', f.name, '--user', 'buyer', '--dry-run', stdout=out)
+        self.assertIn('2 would be created', out.getvalue())
+        self.assertFalse(SubPlotUnit.objects.exists())
+        call_command('import_rows', 'subplots', f.name, '--user', 'buyer', stdout=io.StringIO())
+        self.assertEqual(SubPlotUnit.objects.count(), 2)
+        with self.assertRaises(CommandError):
+            call_command('import_rows', 'materials', f.name, '--user', 'buyer', stdout=io.StringIO())
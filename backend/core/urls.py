@@ -6,27 +6,27 @@ from .views import (
     EcommerceProductViewSet, OrderViewSet, OrderItemViewSet,
     RealEstateAgentProfileViewSet, RealEstateAgentRegistrationView,
     UserRegistrationView, OTPRequestView, OTPVerificationAndLoginView,
-    UserLoginView, UserLogoutView, ReferralNetworkView,
+    UserLoginView, UserLogoutView, ReferralNetworkView, ReferralTreeView,
     SQLFTProjectViewSet, PlotInquiryViewSet, BankDetailViewSet, UserRegisterView, UserProfileView,
     KYCSubmitView, KYCStatusView, KYCUpdateView, MicroPlotListView, MicroPlotDetailView, FAQViewSet,
     MaterialProductViewSet, SupportTicketViewSet, PlotPurchaseListView, PlotPurchaseCreateView, MicroPlotPurchaseListView, MicroPlotPurchaseCreateView,
     MaterialPurchaseListView, MaterialPurchaseCreateView, ServiceOrderListView, ServiceOrderCreateView,SubmitPlotInquiry, SubmitMicroPlotInquiry, 
     SubmitMaterialInquiry, SubmitServiceInquiry, AllBookingListView, MyBookingListView, BookingByClientIDView, PublicPlotDetailView,
-    PublicPlotListView, PublicMicroPlotListView, MyBookingListView, MyPaymentsView,
+    PublicPlotListView, PublicNearbyPlotListView, PublicNearbyMicroPlotListView, SearchView, PublicMicroPlotListView, MyBookingListView, MyPaymentsView,
     PublicMaterialListView, PublicMaterialDetailView, PublicMicroPlotDetailView,PublicServiceDetailView,PublicServiceListView,
     UpdateCartItemView, AddToCartView, CartView, RemoveCartItemView, ClearCartView, CheckoutCartView, UpdateOrderStatusView, WebOrderViewSet,
     CallRequestCreateView, ToggleCustomerStatusView, B2BCustomerListView, B2BVendorProfileView, VendorPaymentSummaryView, VendorPaymentHistoryView,
     InterestedUsersView, EmailTokenObtainPairView, UsernameTokenObtainPairView, VerifiedPlotViewSet, BookingViewSetAdmin, AdminUserViewSet,
     ToggleUserStatusView, CommercialPropertyDetailView, CommercialPropertyListCreateView, AllKYCListView,SubPlotUnitViewSet,
-    PlotStatsView, UserStatsView, PaymentStatsView, MonthlyBookingStatsView, PaymentViewSet, SubPlotUnitsByProjectView, OwnerShortlistView,
-    OwnerPaymentListView,
+    PlotStatsView, UserStatsView, PaymentStatsView, MonthlyBookingStatsView, DashboardSummaryView, CacheStatsView, PaymentViewSet, SubPlotUnitsByProjectView, OwnerShortlistView,
+    OwnerPaymentListView, OwnerPayoutSummaryView, AdminExportView, BulkImportView,
 )
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
 from .views import (
-    CreateOrderView, VerifyPaymentView, payment_history,
+    CreateOrderView, VerifyPaymentView, payment_history, razorpay_webhook, PaymentReceiptView,
     PublicServiceListView, PublicServiceDetailView
 )   
 
@@ -68,10 +68,14 @@ urlpatterns = [
     path('auth/login/', UserLoginView.as_view(), name='login'),
     path('auth/logout/', UserLogoutView.as_view(), name='logout'),
     path('agents/register/', RealEstateAgentRegistrationView.as_view(), name='agent-register'),
+    # Must precede the router, whose agents/<pk>/ and bookings/<pk>/ routes would otherwise match them.
+    path('agents/interested-users/', InterestedUsersView.as_view(), name='interested-users'),
+    path('bookings/my/', MyBookingListView.as_view(), name='my-bookings'),
     path('', include(router.urls)),
     path('auth/jwt/login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('auth/jwt/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('referral/network/', ReferralNetworkView.as_view(), name='referral-network'),
+    path('referral/network/tree/', ReferralTreeView.as_view(), name='referral-network-tree'),
     path('auth/user-register/', UserRegisterView.as_view(), name='user-register'),
     path('user/profile/', UserProfileView.as_view(), name='user-profile'),
     path('user/kyc/submit/', KYCSubmitView.as_view(), name='kyc-submit'),
@@ -96,13 +100,15 @@ urlpatterns = [
     path('inquiry/material/', SubmitMaterialInquiry.as_view(), name='inquiry-material'),
     path('inquiry/service/', SubmitServiceInquiry.as_view(), name='inquiry-service'),
     path('bookings/', AllBookingListView.as_view(), name='all-bookings'),
-    path('bookings/my/', MyBookingListView.as_view(), name='my-bookings'),
     path('bookings/client/<int:client_id>/', BookingByClientIDView.as_view(), name='bookings-by-client'),
+    path('search/', SearchView.as_view(), name='search'),
     path('public/plots/', PublicPlotListView.as_view(), name='public-plot-list'),
+    path('public/plots/nearby/', PublicNearbyPlotListView.as_view(), name='public-plot-nearby'),
     path('public/plots/<int:pk>/', PublicPlotDetailView.as_view(), name='public-plot-detail'),
     path('public/materials/', PublicMaterialListView.as_view(), name='public-materials'),
     path('public/materials/<int:pk>/', PublicMaterialDetailView.as_view(), name='public-material-detail'),
     path('public/micro-plots/', PublicMicroPlotListView.as_view(), name='public-micro-plot-list'),
+    path('public/micro-plots/nearby/', PublicNearbyMicroPlotListView.as_view(), name='public-micro-plot-nearby'),
     path('public/micro-plots/<int:pk>/', PublicMicroPlotDetailView.as_view(), name='public-micro-plot-detail'),
     path('public/services/', PublicServiceListView.as_view(), name='public-service-list'),
     path('public/services/<int:pk>/', PublicServiceDetailView.as_view(), name='public-service-detail'),
@@ -121,7 +127,6 @@ urlpatterns = [
     path('b2b/profile/', B2BVendorProfileView.as_view(), name='b2b-profile'),
     path('vendor/payments/summary/', VendorPaymentSummaryView.as_view(), name='vendor-payment-summary'),
     path('vendor/payments/history/', VendorPaymentHistoryView.as_view(), name='vendor-payment-history'),
-    path('agents/interested-users/', InterestedUsersView.as_view(), name='interested-users'),
     path('auth/email-login/', EmailTokenObtainPairView.as_view(), name='email_token_obtain_pair'),
     path('auth/username-login/', UsernameTokenObtainPairView.as_view(), name='username_token_obtain_pair'),
     path('admin/users/<int:pk>/toggle-status/', ToggleUserStatusView.as_view(), name='admin-user-toggle-status'),
@@ -129,14 +134,21 @@ urlpatterns = [
     path('admin/commercial-properties/<int:pk>/', CommercialPropertyDetailView.as_view(), name='commercial-detail'),
     path('admin/kyc-documents/', AllKYCListView.as_view(), name='admin-kyc-list'),
     path('payments/create-order/', CreateOrderView.as_view(), name='create_order'),
+    path('payments/<int:pk>/receipt/', PaymentReceiptView.as_view(), name='payment-receipt'),
     path('verify-payment/', VerifyPaymentView.as_view()),
+    path('payments/webhook/razorpay/', razorpay_webhook, name='razorpay-webhook'),
     # path('payments/history/', views.payment_history, name='payment_history'),
     path('admin/dashboard/plot-stats/', PlotStatsView.as_view()),
     path('admin/dashboard/user-stats/', UserStatsView.as_view()),
     path('admin/dashboard/payment-stats/', PaymentStatsView.as_view()),
     path('admin/dashboard/monthly-bookings/', MonthlyBookingStatsView.as_view()),
+    path('admin/dashboard/summary/', DashboardSummaryView.as_view(), name='admin-dashboard-summary'),
+    path('admin/cache/stats/', CacheStatsView.as_view(), name='admin-cache-stats'),
+    path('admin/export/<str:entity>/', AdminExportView.as_view(), name='admin-export'),
+    path('imports/<str:entity>/', BulkImportView.as_view(), name='bulk-import'),
     path('subplots/by-project/<int:project_id>/', SubPlotUnitsByProjectView.as_view(), name='subplots-by-project'),
     path('owner/shortlisted/', OwnerShortlistView.as_view(), name='owner-shortlisted'),
     path('owner/payments/', OwnerPaymentListView.as_view(), name='owner-payments'),
+    path('owner/payouts/', OwnerPayoutSummaryView.as_view(), name='owner-payouts'),
 
 ]
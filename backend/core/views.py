@@ -9,9 +9,7 @@ from rest_framework.exceptions import PermissionDenied
 from django.contrib.auth import authenticate
 from django.db import IntegrityError, DatabaseError
 from django.shortcuts import get_object_or_404
-from django.core.mail import send_mail
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.core.mail import EmailMessage
 from django.template.loader import render_to_string
 from rest_framework.parsers import MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
@@ -25,44 +23,50 @@ from django.conf import settings
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
-import requests
-from requests.auth import HTTPBasicAuth
-from django.db.models import Count
 from rest_framework.generics import RetrieveUpdateAPIView
-from django.db.models import Sum, F
+from django.db.models import F
 from rest_framework_simplejwt.views import TokenObtainPairView
-import razorpay
 import hmac
 import hashlib
 from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+from django.http import FileResponse, HttpResponseNotModified, JsonResponse
+from django.middleware.gzip import re_accepts_gzip
 from django.contrib.auth.decorators import login_required
 import json
-from django.contrib.auth import get_user_model
-from datetime import datetime, timedelta
-from django.db.models.functions import TruncMonth
+from datetime import date
 
 
 
 from .models import SubPlotUnit
 from .serializers import SubPlotUnitSerializer
+from .pagination import KeysetPagination, PublicCatalogCursorPagination
+from .streaming import StreamingListMixin
+from . import exports, geo, imports, inventory, money, payments, receipts, referrals, search, stats, stock, webhooks
+from .search import FullTextSearchFilter
+from .cache import (
+    PUBLIC_PLOTS_NAMESPACE, PUBLIC_PRODUCTS_NAMESPACE, PUBLIC_MICRO_PLOTS_NAMESPACE,
+    FAQS_NAMESPACE, VERIFIED_PLOTS_NAMESPACE, cached_response, get_cache_stats,
+)
 
 
 from .models import (
     CustomUser, PlotListing, JointOwner, Booking,
     EcommerceProduct, Order, OrderItem, RealEstateAgentProfile, UserType, PlotInquiry, ReferralCommission,
     SQLFTProject, BankDetail, CustomUser, KYCDocument, FAQ, SupportTicket, Inquiry, ShortlistCart, ShortlistCartItem,CallRequest, B2BVendorProfile,Payment,
-    VerifiedPlot, CommercialProperty, Payment
+    VerifiedPlot, CommercialProperty, Payment, NotificationOutbox, SearchEntry, PaymentReceipt,
+    generate_order_id
 )
 from .serializers import (
     UserRegistrationSerializer, OTPRequestSerializer, OTPVerificationSerializer,
     CustomUserSerializer, PlotListingSerializer, JointOwnerSerializer,
     BookingSerializer, EcommerceProductSerializer, OrderSerializer,
     OrderItemSerializer, RealEstateAgentProfileSerializer, RealEstateAgentRegistrationSerializer, PlotInquirySerializer,
-    ReferralCommissionSerializer, SQLFTProjectSerializer, BankDetailSerializer, KYCDocumentSerializer, FAQSerializer,
+    ReferralCommissionSerializer, ReferralTreeNodeSerializer, SearchResultSerializer, SQLFTProjectSerializer, BankDetailSerializer, KYCDocumentSerializer, FAQSerializer,
     SupportTicketSerializer, InquirySerializer, PaymentTransactionSerializer, ShortlistCartItemSerializer,WebOrderSerializer,
     CallRequestSerializer, B2BProfileSerializer, EmailTokenObtainPairSerializer, UsernameTokenObtainPairSerializer,VerifiedPlotSerializer,
-    UserAdminSerializer, CommercialPropertySerializer,PaymentTransactionSerializer, ShortlistCartItemSerializer, PaymentSerializer
+    UserAdminSerializer, CommercialPropertySerializer,PaymentTransactionSerializer, ShortlistCartItemSerializer, PaymentSerializer,
+    InterestedUserSerializer, OwnerShortlistItemSerializer
 )
 
 from django.contrib.auth.decorators import login_required
@@ -77,6 +81,20 @@ class IsAdminUserType(permissions.BasePermission):
             and request.user.user_type == 'admin'
         )
 
+class PrefetchPlanMixin:
+    """
+    Applies the serializer's declared eager-loading plan (see
+    EagerLoadingMixin in serializers.py) to every queryset a generic view
+    lists or looks objects up in, so list and detail endpoints run a constant
+    number of queries.
+    """
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, 'setup_eager_loading'):
+            queryset = serializer_class.setup_eager_loading(queryset)
+        return queryset
+
 # --- Authentication and User Management ---
 class UserRegistrationView(APIView):
     authentication_classes = []
@@ -94,33 +112,33 @@ class UserRegistrationView(APIView):
             referred_by = CustomUser.objects.filter(referral_code=referral_code).first()
 
         try:
-            # Create user
-            user = serializer.save(
-                user_type=validated_data.get('user_type', UserType.CLIENT),
-                referred_by=referred_by,
-                is_active=False  # ✅ Deactivate until OTP is verified
-            )
-
-            # Generate OTP
-            otp = user.generate_otp()
-
-            # Send OTP via email
-            email = validated_data.get('email')
-            message = f"""Dear user,
-            Your CashbackFarms verification code is: {otp}
-            This OTP is valid for 10 minutes.
-            Do not share it with anyone.
-
-            Team CashbackFarms"""
-            if email:
-                send_mail(
-                subject='CashbackFarms OTP Verification',
-                message=message,
-                from_email='support@cashbackfarms.com',
-                recipient_list=[email],
-                fail_silently=False,
+            with transaction.atomic():
+                # Create user
+                user = serializer.save(
+                    user_type=validated_data.get('user_type', UserType.CLIENT),
+                    referred_by=referred_by,
+                    is_active=False  # ✅ Deactivate until OTP is verified
                 )
 
+                # Generate OTP
+                otp = user.generate_otp()
+
+                # Queue OTP email (delivered by run_outbox)
+                email = validated_data.get('email')
+                message = f"""Dear user,
+                Your CashbackFarms verification code is: {otp}
+                This OTP is valid for 10 minutes.
+                Do not share it with anyone.
+
+                Team CashbackFarms"""
+                if email:
+                    NotificationOutbox.enqueue_email(
+                        to=email,
+                        subject='CashbackFarms OTP Verification',
+                        body=message,
+                        from_email='support@cashbackfarms.com',
+                    )
+
             return Response(
                 {
                     "message": "User registered successfully. OTP sent for verification.",
@@ -206,7 +224,7 @@ class OTPRequestView(APIView):
             # Generate OTP
             otp = user.generate_otp()
 
-            # Send OTP via email if email is provided
+            # Queue OTP via email if email is provided (delivered by run_outbox)
             message = f"""Dear user,
             Your CashbackFarms verification code is: {otp}
             This OTP is valid for 10 minutes.
@@ -214,36 +232,15 @@ class OTPRequestView(APIView):
 
             Team CashbackFarms"""
             if email:
-                try:
-
-                    send_mail(
+                NotificationOutbox.enqueue_email(
+                    to=email,
                     subject='CashbackFarms OTP Verification',
-                    message=message,
+                    body=message,
                     from_email='support@cashbackfarms.com',
-                    recipient_list=[email],
-                    fail_silently=False,
-                    )
-                    
-                except Exception as e:
-                    return Response({"detail": f"Failed to send OTP email: {e}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            # Send OTP via SMS if mobile_number is provided
+                )
+            # Queue OTP via SMS if mobile_number is provided
             elif mobile_number:
-                try:
-                    account_sid = settings.TWILIO['ACCOUNT_SID']  # Move to settings in production!
-                    auth_token = settings.TWILIO['AUTH_TOKEN']
-                    from_number = settings.TWILIO['FROM_NUMBER']
-                    to_number = mobile_number
-                    url = f'https://api.twilio.com/2010-04-01/Accounts/{account_sid}/Messages.json'
-                    data = {
-                        'To': to_number,
-                        'From': from_number,
-                        'Body': f'Your OTP is {otp}'
-                    }
-                    response = requests.post(url, data=data, auth=HTTPBasicAuth(account_sid, auth_token))
-                    if response.status_code != 201:
-                        return Response({"detail": f"Failed to send OTP SMS: {response.text}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-                except Exception as e:
-                    return Response({"detail": f"Failed to send OTP SMS: {e}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                NotificationOutbox.enqueue_sms(mobile_number, f'Your OTP is {otp}')
 
             print(f"DEBUG: OTP for {user.username}: {otp}")  # For dev only
             return Response({"message": "OTP sent successfully."}, status=status.HTTP_200_OK)
@@ -362,7 +359,7 @@ class OTPVerificationAndLoginView(APIView):
                 # ✅ Send WhatsApp message
                 if user.mobile_number and user.country_code:
                     full_number = user.country_code + user.mobile_number
-                    send_whatsapp_message(full_number, f"Hi {user.first_name or user.username}, your OTP is verified and your Cashback Gold account is now active!")
+                    NotificationOutbox.enqueue_whatsapp(full_number, f"Hi {user.first_name or user.username}, your OTP is verified and your Cashback Gold account is now active!")
 
                 refresh = RefreshToken.for_user(user)
                 user_data = {
@@ -429,10 +426,10 @@ class UserLogoutView(APIView):
             return Response({"detail": f"Logout failed: {e}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 # --- Core Model ViewSets ---
-class PlotListingViewSet(viewsets.ModelViewSet):
+class PlotListingViewSet(PrefetchPlanMixin, viewsets.ModelViewSet):
     serializer_class = PlotListingSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
     
     filterset_fields = ['location', 'price_per_sqft', 'is_available_full', 'is_verified']
     search_fields = ['title', 'location']
@@ -477,7 +474,7 @@ class PlotListingViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class JointOwnerViewSet(viewsets.ModelViewSet):
+class JointOwnerViewSet(PrefetchPlanMixin, viewsets.ModelViewSet):
     queryset = JointOwner.objects.all()
     serializer_class = JointOwnerSerializer
     permission_classes = [IsAuthenticated] # Requires authentication
@@ -504,7 +501,7 @@ class JointOwnerViewSet(viewsets.ModelViewSet):
         except Exception as e:
             raise serializers.ValidationError({"detail": f"Internal server error: {e}"})
 
-class BookingViewSet(viewsets.ModelViewSet):
+class BookingViewSet(PrefetchPlanMixin, viewsets.ModelViewSet):
     queryset = Booking.objects.all()
     serializer_class = BookingSerializer
     permission_classes = [IsAuthenticated]
@@ -517,6 +514,12 @@ class BookingViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return Booking.objects.none()
 
+    def create(self, request, *args, **kwargs):
+        try:
+            return super().create(request, *args, **kwargs)
+        except inventory.InsufficientSqft as e:
+            return Response({"detail": str(e), "plot_ids": e.plot_ids}, status=status.HTTP_409_CONFLICT)
+
     def perform_create(self, serializer):
         try:
             plot = serializer.validated_data['plot_listing']
@@ -529,16 +532,23 @@ class BookingViewSet(viewsets.ModelViewSet):
                 plot.is_available_full = False
                 plot.available_sqft_for_investment = 0 # No more sqft for investment if full plot is booked
             elif booking_type == 'square_feet':
-                if booked_area_sqft <= 0 or booked_area_sqft > plot.available_sqft_for_investment:
-                    raise serializers.ValidationError("Invalid square feet amount or not enough available.")
+                if not booked_area_sqft or booked_area_sqft <= 0:
+                    raise serializers.ValidationError("Invalid square feet amount.")
                 total_price = booked_area_sqft * plot.price_per_sqft
-                plot.available_sqft_for_investment -= booked_area_sqft
-                if plot.available_sqft_for_investment <= 0:
-                    plot.is_available_full = False # Mark as not fully available if all sqft are booked
             else:
                 raise serializers.ValidationError("Invalid booking type.")
-            serializer.save(client=self.request.user, total_price=total_price)
-            plot.save() # Update plot availability
+            with transaction.atomic():
+                booking = serializer.save(client=self.request.user, total_price=total_price)
+                if booking_type == 'full_plot':
+                    plot.save(update_fields=['is_available_full', 'available_sqft_for_investment'])
+                else:
+                    # The hold takes the area with a conditional update (409 if it is gone).
+                    inventory.hold_sqft([booking])
+                    PlotListing.objects.filter(pk=plot.pk, available_sqft_for_investment__lte=0).update(
+                        is_available_full=False,  # Mark as not fully available if all sqft are booked
+                    )
+        except inventory.InsufficientSqft:
+            raise
         except Exception as e:
             raise serializers.ValidationError({"detail": f"Internal server error: {e}"})
 
@@ -587,11 +597,11 @@ class BookingViewSet(viewsets.ModelViewSet):
 #         except Exception as e:
 #             raise serializers.ValidationError({"detail": f"Internal server error: {e}"})
 
-class EcommerceProductViewSet(viewsets.ModelViewSet):
+class EcommerceProductViewSet(PrefetchPlanMixin, viewsets.ModelViewSet):
     queryset = EcommerceProduct.objects.all()
     serializer_class = EcommerceProductSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
     filterset_fields = ['category', 'is_active']
     search_fields = ['name', 'description']
     ordering_fields = ['price', 'created_at']
@@ -650,7 +660,7 @@ class EcommerceProductViewSet(viewsets.ModelViewSet):
             raise PermissionDenied("You do not have permission to delete this product.")
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(PrefetchPlanMixin, viewsets.ModelViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
@@ -674,7 +684,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         except Exception as e:
             raise serializers.ValidationError({"detail": f"Internal server error: {e}"})
 
-class OrderItemViewSet(viewsets.ModelViewSet):
+class OrderItemViewSet(PrefetchPlanMixin, viewsets.ModelViewSet):
     queryset = OrderItem.objects.all()
     serializer_class = OrderItemSerializer
     permission_classes = [IsAuthenticated]
@@ -689,7 +699,7 @@ class OrderItemViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return OrderItem.objects.none()
 
-class RealEstateAgentProfileViewSet(viewsets.ModelViewSet):
+class RealEstateAgentProfileViewSet(PrefetchPlanMixin, viewsets.ModelViewSet):
     queryset = RealEstateAgentProfile.objects.all()
     serializer_class = RealEstateAgentProfileSerializer
     permission_classes = [IsAuthenticated]
@@ -773,17 +783,12 @@ class RealEstateAgentRegistrationView(generics.CreateAPIView):
                 Team Greenheap Gold
                 """
             if email:
-                try:
-                    smtp_user = settings.EMAIL_HOST_USER
-                    email_msg = EmailMessage(
-                        subject="Your OTP Code",
-                        body=html_body,
-                        from_email=smtp_user,
-                        to=[email],
-                    )
-                    email_msg.send(fail_silently=False)
-                except Exception as e:
-                    raise serializers.ValidationError({"detail": f"Failed to send OTP email: {e}"})
+                NotificationOutbox.enqueue_email(
+                    to=email,
+                    subject="Your OTP Code",
+                    body=html_body,
+                    from_email=settings.EMAIL_HOST_USER,
+                )
 
             # Step 4: Save profile
             serializer.save(user=user)
@@ -793,7 +798,7 @@ class RealEstateAgentRegistrationView(generics.CreateAPIView):
         except Exception as e:
             raise serializers.ValidationError({"detail": f"Internal server error: {e}"})
 
-class PlotInquiryViewSet(viewsets.ModelViewSet):
+class PlotInquiryViewSet(PrefetchPlanMixin, viewsets.ModelViewSet):
     queryset = PlotInquiry.objects.all()
     serializer_class = PlotInquirySerializer
     permission_classes = [IsAuthenticated]
@@ -847,6 +852,48 @@ class ReferralNetworkView(APIView):
             "network": serializer.data
         })
 
+# GET /api/referral/network/tree/?depth=3&level=2
+class ReferralTreeView(generics.GenericAPIView):
+    """
+    A user's downline up to `depth` levels (optionally a single `level`)
+    with member counts per level, plus the upline chain to the root. Each
+    part is one indexed read of the ReferralPath closure table; the
+    downline is keyset-paginated with a Link header. Admins may pass
+    `user=<id>` to view someone else's network.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = ReferralTreeNodeSerializer
+    pagination_class = KeysetPagination
+
+    def get(self, request):
+        user = request.user
+        user_id = request.query_params.get('user')
+        if user_id:
+            if user.user_type != UserType.ADMIN:
+                return Response({"detail": "Only admins can view another user's network."}, status=403)
+            user = get_object_or_404(CustomUser, pk=user_id)
+
+        try:
+            depth = int(request.query_params.get('depth', referrals.DEFAULT_TREE_DEPTH))
+            level = request.query_params.get('level')
+            level = int(level) if level else None
+        except ValueError:
+            return Response({"detail": "depth and level must be integers."}, status=400)
+        if depth < 1 or (level is not None and level < 1):
+            return Response({"detail": "depth and level must be at least 1."}, status=400)
+
+        page = self.paginate_queryset(referrals.downline(user, depth, level).select_related('descendant'))
+        downline = ReferralTreeNodeSerializer(page, many=True, context={'member': 'descendant'}).data
+        upline = ReferralTreeNodeSerializer(
+            referrals.upline(user).select_related('ancestor'), many=True, context={'member': 'ancestor'}
+        ).data
+        return Response({
+            "referral_code": user.referral_code,
+            "levels": referrals.level_counts(user, depth),
+            "upline": upline,
+            "downline": downline,
+        }, headers=self.paginator.get_link_headers())
+
 class SQLFTProjectViewSet(viewsets.ModelViewSet):
     queryset = SQLFTProject.objects.all()
     serializer_class = SQLFTProjectSerializer
@@ -992,7 +1039,7 @@ class KYCSubmitView(APIView):
 
 
 class KYCStatusView(APIView):
-    permission_classes = [AllowAny]
+    permission_classes = [IsAuthenticated]
 
     def get(self, request):
         documents = request.user.kyc_documents.all()
@@ -1088,10 +1135,10 @@ class IsB2BVendorOrAdmin(permissions.BasePermission):
         )
 
 
-class MaterialProductViewSet(viewsets.ModelViewSet):
+class MaterialProductViewSet(PrefetchPlanMixin, viewsets.ModelViewSet):
     queryset = EcommerceProduct.objects.filter(category='material')
     serializer_class = EcommerceProductSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
     filterset_fields = ['category', 'price']
     search_fields = ['name', 'description']
     ordering_fields = ['price', 'created_at']
@@ -1128,6 +1175,14 @@ class FAQViewSet(viewsets.ModelViewSet):
     queryset = FAQ.objects.all()
     serializer_class = FAQSerializer
 
+    @cached_response(FAQS_NAMESPACE)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cached_response(FAQS_NAMESPACE)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
             return [permissions.IsAdminUser()]
@@ -1186,7 +1241,7 @@ class SupportTicketViewSet(viewsets.ViewSet):
         except SupportTicket.DoesNotExist:
             return Response({"detail": "Not found"}, status=404)
 
-class PlotPurchaseListView(generics.ListAPIView):
+class PlotPurchaseListView(PrefetchPlanMixin, generics.ListAPIView):
     serializer_class = BookingSerializer
     permission_classes = [IsAuthenticated]
 
@@ -1208,11 +1263,12 @@ class PlotPurchaseCreateView(generics.CreateAPIView):
             return Response({"error": "Invalid booking_type, must be 'full_plot'"}, status=400)
 
         try:
-            plot = PlotListing.objects.get(id=plot_id, is_available_full=True)
+            # Row lock: a concurrent purchase waits here, then sees is_available_full=False.
+            plot = PlotListing.objects.select_for_update().get(id=plot_id, is_available_full=True)
         except PlotListing.DoesNotExist:
             return Response({"error": "Plot not available for full purchase."}, status=404)
 
-        total_price = float(plot.total_area_sqft) * float(plot.price_per_sqft)
+        total_price = plot.total_area_sqft * plot.price_per_sqft
 
         booking = Booking.objects.create(
             plot_listing=plot,
@@ -1244,7 +1300,12 @@ class MicroPlotPurchaseCreateView(APIView):
         data['booking_type'] = 'square_feet'
         serializer = BookingSerializer(data=data)
         if serializer.is_valid():
-            serializer.save()
+            try:
+                with transaction.atomic():
+                    booking = serializer.save(client=request.user)
+                    inventory.hold_sqft([booking])
+            except inventory.InsufficientSqft as e:
+                return Response({"detail": str(e)}, status=status.HTTP_409_CONFLICT)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -1278,10 +1339,18 @@ class MaterialPurchaseCreateView(APIView):
             except Exception as e:
                 return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        order = Order.objects.create(client=user, total_amount=total_amount)
-
-        for product, quantity, price in order_items:
-            OrderItem.objects.create(order=order, product=product, quantity=quantity, price_at_purchase=price)
+        try:
+            with transaction.atomic():
+                order = Order.objects.create(client=user, total_amount=total_amount)
+                OrderItem.objects.bulk_create([
+                    OrderItem(order=order, product=product, quantity=quantity, price_at_purchase=price)
+                    for product, quantity, price in order_items
+                ])
+                stock.reserve([(order, product, quantity) for product, quantity, _ in order_items])
+        except stock.BelowMinimumOrder as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except stock.InsufficientStock as e:
+            return Response({"detail": str(e), "product_ids": e.product_ids}, status=status.HTTP_409_CONFLICT)
 
         serializer = OrderSerializer(order)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -1419,13 +1488,11 @@ class SubmitServiceInquiry(APIView):
         serializer.save()
         return Response(serializer.data, status=201)
 
-class AllBookingListView(APIView):
+class AllBookingListView(StreamingListMixin, PrefetchPlanMixin, generics.ListAPIView):
+    queryset = Booking.objects.all().order_by('-booking_date')
+    serializer_class = BookingSerializer
     permission_classes = [IsAdminUser]
-
-    def get(self, request):
-        bookings = Booking.objects.all().order_by('-booking_date')
-        serializer = BookingSerializer(bookings, many=True)
-        return Response(serializer.data, status=200)
+    pagination_class = KeysetPagination
 
 class MyBookingListView(APIView):
     permission_classes = [IsAuthenticated]
@@ -1445,17 +1512,101 @@ class BookingByClientIDView(APIView):
 
 class PublicPlotListView(APIView):
     permission_classes = [AllowAny]
+    pagination_class = PublicCatalogCursorPagination
 
+    @cached_response(PUBLIC_PLOTS_NAMESPACE)
     def get(self, request):
-        plots = PlotListing.objects.all()
-        serializer = PlotListingSerializer(plots, many=True)
-        return Response(serializer.data, status=200)
+        paginator = self.pagination_class()
+        plots = PlotListingSerializer.setup_eager_loading(PlotListing.objects.all())
+        page = paginator.paginate_queryset(plots, request, view=self)
+        serializer = PlotListingSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+# GET /api/search/?q=chennai plot&kind=plot,project&limit=20
+class SearchView(APIView):
+    """
+    Ranked search across plots, micro-plot projects, materials, services and
+    commercial properties. Returns the best `limit` matches (max 50) as a
+    list of {kind, id, title, location, score}; `kind` narrows the types.
+    """
+    permission_classes = [AllowAny]
+    search_kinds = (
+        SearchEntry.KIND_PLOT, SearchEntry.KIND_PROJECT, SearchEntry.KIND_MATERIAL,
+        SearchEntry.KIND_SERVICE, SearchEntry.KIND_COMMERCIAL,
+    )
+
+    def get(self, request):
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            return Response({"detail": "Query parameter 'q' is required."}, status=400)
+
+        kinds = [kind for kind in request.query_params.get('kind', '').split(',') if kind]
+        unknown = set(kinds) - set(self.search_kinds)
+        if unknown:
+            return Response({"detail": f"Unknown kind: {', '.join(sorted(unknown))}."}, status=400)
+
+        try:
+            limit = int(request.query_params.get('limit', search.DEFAULT_LIMIT))
+        except ValueError:
+            return Response({"detail": "limit must be an integer."}, status=400)
+        limit = min(max(limit, 1), search.MAX_LIMIT)
+
+        results = search.search(text, kinds or self.search_kinds, limit)
+        return Response(SearchResultSerializer(results, many=True).data)
+
+class NearbyListView(APIView):
+    """
+    Listings within `radius_km` (default 10, max 100) of `lat`/`lng`,
+    nearest first, each with a `distance_km` field. Subclasses set
+    `queryset` and `serializer_class`. See core/geo.py.
+    """
+    permission_classes = [AllowAny]
+    queryset = None
+    serializer_class = None
+    default_radius_km = 10
+    max_radius_km = 100
+    default_limit = 20
+    max_limit = 100
+
+    def parse_params(self, params):
+        try:
+            latitude = float(params['lat'])
+            longitude = float(params['lng'])
+            radius_km = float(params.get('radius_km', self.default_radius_km))
+            limit = int(params.get('limit', self.default_limit))
+        except KeyError:
+            raise serializers.ValidationError({"detail": "Query parameters 'lat' and 'lng' are required."})
+        except ValueError:
+            raise serializers.ValidationError({"detail": "lat, lng, radius_km and limit must be numbers."})
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise serializers.ValidationError({"detail": "lat must be within ±90 and lng within ±180."})
+        if not 0 < radius_km <= self.max_radius_km:
+            raise serializers.ValidationError({"detail": f"radius_km must be between 0 and {self.max_radius_km}."})
+        return latitude, longitude, radius_km, min(max(limit, 1), self.max_limit)
+
+    def get(self, request):
+        latitude, longitude, radius_km, limit = self.parse_params(request.query_params)
+        listings = list(geo.nearby(self.queryset.all(), latitude, longitude, radius_km)[:limit])
+        data = self.serializer_class(listings, many=True).data
+        for row, listing in zip(data, listings):
+            row['distance_km'] = round(listing.distance_km, 3)
+        return Response(data)
+
+# GET /api/public/plots/nearby/?lat=13.08&lng=80.27&radius_km=5
+class PublicNearbyPlotListView(NearbyListView):
+    queryset = PlotListingSerializer.setup_eager_loading(PlotListing.objects.all())
+    serializer_class = PlotListingSerializer
+
+# GET /api/public/micro-plots/nearby/?lat=13.08&lng=80.27&radius_km=5
+class PublicNearbyMicroPlotListView(NearbyListView):
+    queryset = SQLFTProject.objects.all()
+    serializer_class = SQLFTProjectSerializer
 
 class PublicPlotDetailView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request, pk):
-        plot = get_object_or_404(PlotListing, pk=pk)
+        plot = get_object_or_404(PlotListingSerializer.setup_eager_loading(PlotListing.objects.all()), pk=pk)
         serializer = PlotListingSerializer(plot)
         return Response(serializer.data, status=200)
 
@@ -1464,9 +1615,14 @@ class PublicMicroPlotListView(generics.ListAPIView):
     serializer_class = SQLFTProjectSerializer
     permission_classes = [AllowAny]
 
+    @cached_response(PUBLIC_MICRO_PLOTS_NAMESPACE)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
 class PublicMicroPlotDetailView(APIView):
     permission_classes = [AllowAny]
 
+    @cached_response(PUBLIC_MICRO_PLOTS_NAMESPACE)
     def get(self, request, pk):
         try:
             micro_plot = SQLFTProject.objects.get(pk=pk)
@@ -1479,6 +1635,7 @@ class PublicMicroPlotDetailView(APIView):
 class PublicMaterialListView(APIView):
     permission_classes = [AllowAny]
 
+    @cached_response(PUBLIC_PRODUCTS_NAMESPACE)
     def get(self, request):
         materials = EcommerceProduct.objects.filter(category='material', is_active=True)
         serializer = EcommerceProductSerializer(materials, many=True)
@@ -1503,6 +1660,7 @@ class PublicMaterialDetailView(APIView):
 class PublicServiceListView(APIView):
     permission_classes = [AllowAny]
 
+    @cached_response(PUBLIC_PRODUCTS_NAMESPACE)
     def get(self, request):
         services = EcommerceProduct.objects.filter(category='service')
         serializer = EcommerceProductSerializer(services, many=True)
@@ -1536,7 +1694,7 @@ class MyPaymentsView(APIView):
         transactions = []
 
         # Add plot & micro-plot bookings
-        bookings = Booking.objects.filter(client=user)
+        bookings = Booking.objects.filter(client=user).select_related('plot_listing')
         for booking in bookings:
             if booking.booking_type == 'full_plot':
                 trans_type = "plot_purchase"
@@ -1555,16 +1713,16 @@ class MyPaymentsView(APIView):
             })
 
         # Add material/service orders
-        orders = Order.objects.filter(client=user)
+        orders = Order.objects.filter(client=user).prefetch_related('items__product')
         for order in orders:
-            product_names = ", ".join([item.product.title for item in order.items.all()])
+            product_names = ", ".join([item.product.name for item in order.items.all()]) or order.product_name or ""
             order_type = 'material_purchase' if order.category == 'material' else 'service_purchase'
             transactions.append({
                 "transaction_id": f"ORDER-{order.id}",
                 "type": order_type,
                 "description": f"Order for {product_names}",
-                "amount": order.total_price,
-                "date": order.created_at,
+                "amount": order.total_amount,
+                "date": order.order_date,
                 "status": order.status
             })
 
@@ -1576,8 +1734,12 @@ class CartView(APIView):
 
     def get(self, request):
         cart, _ = ShortlistCart.objects.get_or_create(user=request.user)
-        serializer = ShortlistCartItemSerializer(cart.items.all(), many=True)
-        return Response(serializer.data, status=200)
+        items = list(ShortlistCartItemSerializer.setup_eager_loading(cart.items.all()))
+        serializer = ShortlistCartItemSerializer(items, many=True)
+        # The body stays a plain list for existing clients; the cart total is
+        # computed from the same per-item pricing and sent alongside it.
+        headers = {'X-Cart-Total': str(ShortlistCartItemSerializer.get_cart_total(items))}
+        return Response(serializer.data, status=200, headers=headers)
 
 class AddToCartView(APIView):
     permission_classes = [IsAuthenticated]
@@ -1675,54 +1837,80 @@ class ClearCartView(APIView):
 class CheckoutCartView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @transaction.atomic
     def post(self, request):
         user = request.user
         cart, _ = ShortlistCart.objects.get_or_create(user=user)
-        bookings_created = []
-        orders_created = []
 
-        for item in cart.items.all():
-            model_name = item.content_type.model
+        # GenericForeignKey prefetch: one query per content type in the cart.
+        items = list(cart.items.prefetch_related('content_object'))
+        plot_ct = ContentType.objects.get_for_model(PlotListing)
+        product_ct = ContentType.objects.get_for_model(EcommerceProduct)
+
+        bookings = []
+        orders = []
+        order_lines = []
+        for item in items:
             obj = item.content_object
+            if obj is None:
+                continue
 
-            if model_name == 'plotlisting':
-                booking = Booking.objects.create(
+            if item.content_type_id == plot_ct.id:
+                area = Decimal(item.quantity) if item.quantity else obj.total_area_sqft
+                bookings.append(Booking(
                     client=user,
                     plot_listing=obj,
                     booking_type='full_plot' if item.quantity is None else 'square_feet',
                     booked_area_sqft=item.quantity,
-                    total_price=float(getattr(obj, 'price_per_sqft', 0)) * (item.quantity or obj.total_area_sqft),
+                    total_price=obj.price_per_sqft * area,
                     status='pending'
-                )
-                bookings_created.append(booking.id)
+                ))
 
-            elif model_name == 'ecommerceproduct':
-                order = Order.objects.create(
+            elif item.content_type_id == product_ct.id:
+                quantity = item.quantity or 1
+                orders.append(Order(
                     client=user,
-                    total_amount=float(getattr(obj, 'price', 0)) * item.quantity,
+                    order_id=generate_order_id(),  # bulk_create skips Order.save()
+                    total_amount=obj.price * quantity,
                     status='pending'
-                )
-                OrderItem.objects.create(
-                    order=order,
-                    product=obj,
-                    quantity=item.quantity,
-                    unit_price=obj.price
-                )
-                orders_created.append(order.id)
+                ))
+                order_lines.append((obj, quantity))
 
+        Booking.objects.bulk_create(bookings)
+        try:
+            inventory.hold_sqft(bookings)
+        except inventory.InsufficientSqft as e:
+            transaction.set_rollback(True)
+            return Response({"detail": str(e), "plot_ids": e.plot_ids}, status=status.HTTP_409_CONFLICT)
+        stats.record_created(bookings)
+        Order.objects.bulk_create(orders)
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, quantity=quantity, price_at_purchase=product.price)
+            for order, (product, quantity) in zip(orders, order_lines)
+        ])
+        # Every material line of the cart in one reservation round trip.
+        try:
+            stock.reserve([(order, product, quantity) for order, (product, quantity) in zip(orders, order_lines)])
+        except stock.BelowMinimumOrder as e:
+            transaction.set_rollback(True)
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except stock.InsufficientStock as e:
+            transaction.set_rollback(True)
+            return Response({"detail": str(e), "product_ids": e.product_ids}, status=status.HTTP_409_CONFLICT)
         cart.items.all().delete()
 
         return Response({
             "message": "Cart checked out successfully.",
-            "bookings_created": bookings_created,
-            "orders_created": orders_created
+            "bookings_created": [booking.id for booking in bookings],
+            "orders_created": [order.id for order in orders]
         }, status=200)
 
 # views.py
-class WebOrderViewSet(viewsets.ModelViewSet):
+class WebOrderViewSet(StreamingListMixin, PrefetchPlanMixin, viewsets.ModelViewSet):
     queryset = Order.objects.all().order_by('-order_date')
     serializer_class = WebOrderSerializer
     permission_classes = [IsB2BVendor]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -1821,36 +2009,47 @@ class B2BVendorProfileView(RetrieveUpdateAPIView):
     def get_object(self):
         return self.request.user
 
+def _summary_period(request, default=None):
+    """The ?period= of a money summary: None, 'day', 'month' or 'year'; raises ValidationError otherwise."""
+    period = request.query_params.get('period', default)
+    if period is not None and period not in money.PERIODS:
+        raise serializers.ValidationError({"period": f"Must be one of: {', '.join(money.PERIODS)}."})
+    return period
+
+# GET /api/vendor/payments/summary/?period=month
 class VendorPaymentSummaryView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         vendor = request.user
+        period = _summary_period(request)
 
         # First: Check if OrderItem-based logic works
         delivered_items = OrderItem.objects.filter(
             product__vendor=vendor,
             order__status__iexact='DELIVERED'
         )
-
-        total_earned = delivered_items.aggregate(
-            total_amount=Sum(F('quantity') * F('price_at_purchase'))
-        )['total_amount']
+        summary = money.summarize(
+            delivered_items, F('quantity') * money.paise_of('price_at_purchase'), 'order__order_date', period,
+        )
 
         # If no OrderItems exist, fallback to Order model
-        if total_earned is None:
-            total_earned = Order.objects.filter(
-                client=vendor,
-                status__iexact='DELIVERED'
-            ).aggregate(
-                total=Sum('total_amount')
-            )['total'] or Decimal('0.00')
+        if not summary['count']:
+            summary = money.summarize(
+                Order.objects.filter(client=vendor, status__iexact='DELIVERED'),
+                money.paise_of('total_amount'), 'order_date', period,
+            )
 
-        return Response({
+        data = {
             "vendor": vendor.username,
-            "total_earned": str(total_earned),
+            "total_earned": summary['total_amount'],
             "currency": "INR"
-        }, status=200)
+        }
+        if period:
+            data["periods"] = [
+                {"period": row['period'], "earned": row['total_amount']} for row in summary['periods']
+            ]
+        return Response(data, status=200)
 
 
 
@@ -1896,43 +2095,20 @@ class VendorPaymentHistoryView(APIView):
 
         return Response(history, status=200)
 
-class InterestedUsersView(APIView):
+class InterestedUsersView(PrefetchPlanMixin, generics.ListAPIView):
+    serializer_class = InterestedUserSerializer
     permission_classes = [IsAuthenticated]
 
-    def get(self, request):
-        user = request.user
-        if user.user_type != 'real_estate_agent':
-            return Response({"detail": "Unauthorized"}, status=403)
-
-        plot_content_type = ContentType.objects.get_for_model(PlotListing)
-
-        # Get only shortlisted items for PlotListing
-        items = ShortlistCartItem.objects.filter(
-            content_type=plot_content_type
-        ).select_related('cart__user')
-
-        response_data = []
-
-        for item in items:
-            plot = item.content_object
-
-            # Safely skip non-PlotListing objects
-            if not isinstance(plot, PlotListing):
-                continue
-
-            if plot.listed_by_agent_id != user.id:
-                continue
-
-            buyer = item.cart.user
-            response_data.append({
-                "buyer_name": f"{buyer.first_name} {buyer.last_name}",
-                "buyer_phone": getattr(buyer, "mobile_number", ""),
-                "buyer_email": buyer.email,
-                "property_title": plot.title,
-                "contacted_on": item.added_at.strftime('%Y-%m-%d')
-            })
+    def get_queryset(self):
+        # Indexed join on the typed plot_listing column; newest interest first.
+        return ShortlistCartItem.objects.filter(
+            plot_listing__listed_by_agent=self.request.user
+        ).order_by('-added_at')
 
-        return Response(response_data, status=200)
+    def list(self, request, *args, **kwargs):
+        if request.user.user_type != 'real_estate_agent':
+            return Response({"detail": "Unauthorized"}, status=403)
+        return super().list(request, *args, **kwargs)
 
 class EmailTokenObtainPairView(TokenObtainPairView):
     serializer_class = EmailTokenObtainPairSerializer
@@ -1945,11 +2121,20 @@ class VerifiedPlotViewSet(viewsets.ModelViewSet):
     serializer_class = VerifiedPlotSerializer
     permission_classes = [IsAdminUserType]
 
+    @cached_response(VERIFIED_PLOTS_NAMESPACE)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
-class BookingViewSetAdmin(viewsets.ModelViewSet):
+    @cached_response(VERIFIED_PLOTS_NAMESPACE)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+
+class BookingViewSetAdmin(StreamingListMixin, PrefetchPlanMixin, viewsets.ModelViewSet):
     queryset = Booking.objects.all().select_related('client', 'plot_listing')
     serializer_class = BookingSerializer
     permission_classes = [IsAdminUserType]
+    pagination_class = KeysetPagination
 
     # def perform_create(self, serializer):
     #     serializer.save(client=self.request.user)
@@ -1983,10 +2168,11 @@ class BookingViewSetAdmin(viewsets.ModelViewSet):
         except Exception as e:
             return Response({'error': str(e)}, status=500)
 
-class AdminUserViewSet(viewsets.ModelViewSet):
+class AdminUserViewSet(StreamingListMixin, viewsets.ModelViewSet):
     queryset = CustomUser.objects.all().order_by('-date_joined')
     serializer_class = UserAdminSerializer
     permission_classes = [IsAdminUserType]
+    pagination_class = KeysetPagination
 
 class ToggleUserStatusView(APIView):
     permission_classes = [IsAdminUserType]
@@ -2007,6 +2193,8 @@ class ToggleUserStatusView(APIView):
 class CommercialPropertyListCreateView(generics.ListCreateAPIView):
     serializer_class = CommercialPropertySerializer
     permission_classes = [IsAdminUserType]
+    filter_backends = [FullTextSearchFilter]
+    search_fields = ['property_name', 'locality', 'city', 'description']
 
     def get_queryset(self):
         return CommercialProperty.objects.all()
@@ -2019,16 +2207,22 @@ class CommercialPropertyDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAdminUserType]
     queryset = CommercialProperty.objects.all()
 
-class AllKYCListView(APIView):
+class AllKYCListView(StreamingListMixin, PrefetchPlanMixin, generics.ListAPIView):
+    queryset = KYCDocument.objects.all().order_by('-upload_date')  # ✅ use upload_date
+    serializer_class = KYCDocumentSerializer
     permission_classes = [IsAdminUserType]
+    pagination_class = KeysetPagination
 
-    def get(self, request):
-        documents = KYCDocument.objects.all().order_by('-upload_date')  # ✅ use upload_date
-        serializer = KYCDocumentSerializer(documents, many=True)
+    def list(self, request, *args, **kwargs):
+        if self.wants_stream(request):
+            return self.stream_list(request)
+        documents = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(documents)
+        serializer = self.get_serializer(page, many=True)
         return Response({
             "count": documents.count(),
             "documents": serializer.data
-        }, status=200)
+        }, status=200, headers=self.paginator.get_link_headers())
    
 class CreateOrderView(APIView):
     permission_classes = [IsAuthenticated]
@@ -2036,11 +2230,11 @@ class CreateOrderView(APIView):
     def post(self, request):
         try:
             data = request.data
-            amount = int(data.get('amount')) * 100  # in paise
+            amount = money.to_paise(data.get('amount'))
             plot_id = data.get('plot_id')
             booking_type = data.get('booking_type', 'full_plot')
             booked_area_sqft = data.get('booked_area_sqft')  # optional, for sqft booking
-  # default to full_plot
+            booked_area_sqft = Decimal(str(booked_area_sqft)) if booked_area_sqft not in (None, '') else None
 
         except Exception:
             return Response({'error': 'Invalid payload'}, status=400)
@@ -2054,169 +2248,33 @@ class CreateOrderView(APIView):
         except PlotListing.DoesNotExist:
             return Response({'error': 'Plot not found'}, status=404)
 
-        client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
-        order = client.order.create({'amount': amount, 'currency': 'INR', 'payment_capture': '1'})
-        Payment.objects.create(
-            user=request.user,
-            plot_id=plot_id,
-            razorpay_order_id=order['id'],
-            amount=amount / 100,
-            status='created'
-        )
-
-        total_price = float(plot.total_area_sqft) * float(plot.price_per_sqft)
-
-        # Create booking
-        booking = Booking.objects.create(
-            plot_listing=plot_id,
-            client=request.user,
-            booking_type=booking_type,
-            booked_area_sqft=booked_area_sqft if booking_type == 'square_feet' else None,
-            total_price=total_price,
-            status='pending'
-        )        
-        return Response({
-            'order_id': order['id'],
-            'amount': amount,
-            'key_id': settings.RAZORPAY_KEY_ID
-        })
+        if booking_type == 'square_feet':
+            if not booked_area_sqft or booked_area_sqft <= 0:
+                return Response({'error': 'booked_area_sqft is required for square_feet bookings'}, status=400)
+            total_price = booked_area_sqft * plot.price_per_sqft
+        else:
+            total_price = plot.total_area_sqft * plot.price_per_sqft
+        total_price = total_price.quantize(money.CENT)
 
-def send_payment_receipt_email(payment, user, plot=None):
-    """
-    Send payment receipt email to user
-    """
-    try:
-        # Generate receipt number
-        receipt_number = f"GAFPL/{user.first_name[:3].upper()}{user.city[:3].upper() if user.city else 'LOC'}/{datetime.now().year}/{payment.id:03d}"
-        
-        # Calculate taxes
-        base_amount = payment.amount
-        service_tax = base_amount * 0.06  # 6% service tax
-        sgst = base_amount * 0.025  # 2.5% SGST
-        cgst = base_amount * 0.025  # 2.5% CGST
-        total_amount = base_amount + service_tax + sgst + cgst
-        
-        # Prepare email context
-        context = {
-            'receipt_number': receipt_number,
-            'date': payment.created_at.strftime('%B %d, %Y'),
-            'client_name': f"{user.first_name} {user.last_name}".strip() or user.username,
-            'payment_mode': 'UPI',  # You can make this dynamic based on payment method
-            'base_amount': f"₹{base_amount:,.2f}",
-            'service_tax': f"₹{service_tax:,.2f}",
-            'sgst': f"₹{sgst:,.2f}",
-            'cgst': f"₹{cgst:,.2f}",
-            'total_amount': f"₹{total_amount:,.2f}",
-            'plot_title': plot.title if plot else 'Plot Purchase',
-            'razorpay_order_id': payment.razorpay_order_id,
-            'razorpay_payment_id': payment.razorpay_payment_id,
-        }
-        
-        # Create email HTML content
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <title>Payment Receipt</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 0; padding: 20px; }}
-                .receipt {{ max-width: 600px; margin: 0 auto; border: 1px solid #ddd; padding: 20px; }}
-                .header {{ text-align: center; border-bottom: 2px solid #333; padding-bottom: 20px; margin-bottom: 20px; }}
-                .company-name {{ font-size: 24px; font-weight: bold; color: #333; }}
-                .company-details {{ font-size: 12px; color: #666; margin-top: 10px; }}
-                .receipt-title {{ font-size: 20px; font-weight: bold; text-align: center; margin: 20px 0; }}
-                .receipt-info {{ margin: 20px 0; }}
-                .receipt-row {{ display: flex; justify-content: space-between; margin: 10px 0; }}
-                .amount-section {{ margin: 20px 0; border-top: 1px solid #ddd; padding-top: 20px; }}
-                .total {{ font-weight: bold; font-size: 18px; border-top: 2px solid #333; padding-top: 10px; }}
-                .footer {{ text-align: center; margin-top: 30px; font-size: 12px; color: #666; }}
-            </style>
-        </head>
-        <body>
-            <div class="receipt">
-                <div class="header">
-                    <div class="company-name">Greenheap Agro Farms Private Limited</div>
-                    <div class="company-details">
-                        Sri,Anant,GF NO: 1B, 11th Sector, 66th Street,<br>
-                        Kalaignar Karunanidhi Nagar, Chennai 600 078<br>
-                        Email: support@cashbackfarms.com | Website: www.cashbackfarms.com | Phone: +91 8190019991<br>
-                        GSTIN: 33AAJCG6869K2ZZ (Tamil Nadu)
-                    </div>
-                </div>
-                
-                <div class="receipt-title">PAYMENT RECEIPT</div>
-                
-                <div class="receipt-info">
-                    <div class="receipt-row">
-                        <strong>Receipt Number:</strong> {context['receipt_number']}
-                    </div>
-                    <div class="receipt-row">
-                        <strong>Date:</strong> {context['date']}
-                    </div>
-                    <div class="receipt-row">
-                        <strong>Received From:</strong> Mr./Ms. {context['client_name']}
-                    </div>
-                    <div class="receipt-row">
-                        <strong>Payment Mode:</strong> {context['payment_mode']}
-                    </div>
-                    <div class="receipt-row">
-                        <strong>Order ID:</strong> {context['razorpay_order_id']}
-                    </div>
-                    <div class="receipt-row">
-                        <strong>Payment ID:</strong> {context['razorpay_payment_id']}
-                    </div>
-                    <div class="receipt-row">
-                        <strong>Description:</strong> {context['plot_title']}
-                    </div>
-                </div>
-                
-                <div class="amount-section">
-                    <div class="receipt-row">
-                        <span>Amount Received (Base):</span>
-                        <span>{context['base_amount']}</span>
-                    </div>
-                    <div class="receipt-row">
-                        <span>Service Tax @ 6%:</span>
-                        <span>{context['service_tax']}</span>
-                    </div>
-                    <div class="receipt-row">
-                        <span>SGST @ 2.5%:</span>
-                        <span>{context['sgst']}</span>
-                    </div>
-                    <div class="receipt-row">
-                        <span>CGST @ 2.5%:</span>
-                        <span>{context['cgst']}</span>
-                    </div>
-                    <div class="receipt-row total">
-                        <span>Total Amount (Inclusive of Taxes):</span>
-                        <span>{context['total_amount']}</span>
-                    </div>
-                </div>
-                
-                <div class="footer">
-                    <p>Thank you for your payment.</p>
-                    <p>For any clarification, please contact our accounts team.</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        
-        # Send email
-        email = EmailMessage(
-            subject=f'Payment Receipt - {receipt_number}',
-            body=html_content,
-            from_email=settings.EMAIL_HOST_USER,
-            to=[user.email],
-        )
-        email.content_subtype = "html"
-        email.send()
-        
-        return True
-    except Exception as e:
-        print(f"Error sending payment receipt email: {e}")
-        return False
+        idempotency_key = request.headers.get('Idempotency-Key')
+        if idempotency_key and len(idempotency_key) > 255:
+            return Response({'error': 'Idempotency-Key is too long'}, status=400)
+        try:
+            status_code, body, replayed = payments.create_plot_order(
+                request.user, plot, amount, booking_type, booked_area_sqft, total_price,
+                idempotency_key=idempotency_key,
+            )
+        except payments.IdempotencyKeyInUse as e:
+            return Response({'error': str(e)}, status=409)
+        except payments.IdempotencyKeyMismatch as e:
+            return Response({'error': str(e)}, status=422)
+        except payments.PaymentGatewayError as e:
+            return Response({'error': f'Payment gateway unavailable: {e}'}, status=502)
+
+        response = Response(body, status=status_code)
+        if replayed:
+            response['Idempotent-Replayed'] = 'true'
+        return response
 
 class VerifyPaymentView(APIView):
     permission_classes = [IsAuthenticated]
@@ -2235,27 +2293,17 @@ class VerifyPaymentView(APIView):
             ).hexdigest()
 
             if hmac.compare_digest(generated_signature, razorpay_signature):
-                # Mark Payment as Paid
-                payment = Payment.objects.get(razorpay_order_id=razorpay_order_id)
-                payment.razorpay_payment_id = razorpay_payment_id
-                payment.razorpay_signature = razorpay_signature
-                payment.status = "paid"
-                payment.save()
-
-                # Get plot details for receipt
-                plot = None
-                try:
-                    plot = PlotListing.objects.get(id=payment.plot_id)
-                except PlotListing.DoesNotExist:
-                    pass
-
-                # Send payment receipt email
-                email_sent = send_payment_receipt_email(payment, payment.user, plot)
-                
+                if not Payment.objects.filter(razorpay_order_id=razorpay_order_id).exists():
+                    return Response({"error": "Payment not found"}, status=404)
+                # Already paid when the webhook got there first; its receipt went out then.
+                paid, lost_holds = payments.mark_paid({razorpay_order_id: razorpay_payment_id})
+
                 return Response({
                     "status": "success",
                     "message": "Payment is success",
-                    "receipt_sent": email_sent
+                    "receipt_sent": bool(paid),
+                    # False when square feet whose hold expired before payment have since been sold.
+                    "sqft_confirmed": lost_holds == 0,
                 })
             else:
                 return Response({"error": "Signature mismatch"}, status=400)
@@ -2263,6 +2311,48 @@ class VerifyPaymentView(APIView):
         except Exception as e:
             return Response({"error": str(e)}, status=500)
 
+
+class PaymentReceiptView(APIView):
+    """
+    The stored receipt PDF of a paid payment, for its payer or an admin.
+    The first request issues it for payments paid before receipts were
+    stored, and a PDF missing from storage is written again. Sends the
+    PDF's ETag and answers a matching If-None-Match with 304.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        payment = Payment.objects.select_related('user', 'receipt').filter(pk=pk, status='paid').first()
+        if payment is None or (payment.user_id != request.user.id and request.user.user_type != 'admin'):
+            return Response({"detail": "No receipt for this payment."}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            receipt = payment.receipt
+        except PaymentReceipt.DoesNotExist:
+            receipt = receipts.issue_receipt(payment, PlotListing.objects.filter(pk=payment.plot_id).first())
+        receipts.ensure_pdf(receipt)
+
+        etag = f'"{receipt.etag}"'
+        if etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(
+                receipt.pdf.open('rb'), content_type='application/pdf',
+                filename=f"{receipt.number.replace('/', '-')}.pdf",
+            )
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, max-age=86400'
+        return response
+
+
+@csrf_exempt
+@require_POST
+def razorpay_webhook(request):
+    """Razorpay webhook: verify and store the event; process_payment_events applies it."""
+    if not webhooks.signature_is_valid(request.body, request.headers.get('X-Razorpay-Signature')):
+        return JsonResponse({'error': 'Invalid signature'}, status=400)
+    webhooks.record_event(request.body, request.headers.get('X-Razorpay-Event-Id'))
+    return JsonResponse({'status': 'ok'})
+
 @login_required
 def payment_history(request):
     payments = Payment.objects.filter(user=request.user).order_by('-created_at')
@@ -2280,65 +2370,131 @@ class PlotStatsView(APIView):
     permission_classes = [IsAdminUserType]
 
     def get(self, request):
-        total = PlotListing.objects.count()
-        booked = PlotListing.objects.filter(is_available_full=False).count()
-        available = total - booked
-        return Response({
-            "total": total,
-            "booked": booked,
-            "available": available
-        })
+        return Response(stats.plot_stats(stats.get_dashboard_totals()))
 
 class UserStatsView(APIView):
     permission_classes = [IsAdminUserType]
 
     def get(self, request):
-        total_users = get_user_model().objects.count()
-        return Response({"total_users": total_users})
+        return Response(stats.user_stats(stats.get_dashboard_totals()))
 
+# GET /api/admin/dashboard/payment-stats/?period=month
 class PaymentStatsView(APIView):
+    """
+    Total revenue from the stats rollup. With ?period=, also the paid
+    payments' amounts, taxes and totals per day, month or year.
+    """
     permission_classes = [IsAdminUserType]
 
     def get(self, request):
-        total_revenue = Payment.objects.filter(status="paid").aggregate(total=Sum("amount"))['total'] or 0
-        return Response({"total_revenue": total_revenue})
+        period = _summary_period(request)
+        data = stats.payment_stats(stats.get_dashboard_totals())
+        if period:
+            data["summary"] = money.summarize_payments(Payment.objects.filter(status='paid'), period)
+        return Response(data)
 
 class MonthlyBookingStatsView(APIView):
     permission_classes = [IsAdminUserType]  # Or IsAdminUserType if custom
 
     def get(self, request):
         filter_range = request.query_params.get('range', 'all')  # '3months', '6months', or 'all'
+        return Response(stats.monthly_booking_stats(filter_range))
 
-        now = datetime.now()
-        if filter_range == '3months':
-            start_date = now - timedelta(days=90)
-        elif filter_range == '6months':
-            start_date = now - timedelta(days=180)
-        else:
-            start_date = datetime(2000, 1, 1)
+# GET /api/admin/dashboard/summary/?range=3months
+class DashboardSummaryView(APIView):
+    """All dashboard cards in one response, read from the stats rollup."""
+    permission_classes = [IsAdminUserType]
 
-        data = Booking.objects.filter(booking_date__gte=start_date)\
-            .annotate(month=TruncMonth('booking_date'))\
-            .values('month')\
-            .annotate(count=Count('id'))\
-            .order_by('month')
+    def get(self, request):
+        totals = stats.get_dashboard_totals()
+        return Response({
+            "plots": stats.plot_stats(totals),
+            "users": stats.user_stats(totals),
+            "payments": stats.payment_stats(totals),
+            "monthly_bookings": stats.monthly_booking_stats(request.query_params.get('range', 'all')),
+        })
+
+class CacheStatsView(APIView):
+    permission_classes = [IsAdminUserType]
+
+    def get(self, request):
+        return Response(get_cache_stats())
 
-        formatted = [
-            {
-                "monthYear": d["month"].strftime("%b %Y"),
-                "count": d["count"]
-            } for d in data
-        ]
+# GET /api/admin/export/payments/?format=csv|parquet&from=2025-01-01&to=2025-01-31
+class AdminExportView(APIView):
+    """
+    Every booking, payment, order or user (optionally between two dates,
+    inclusive) as a streamed CSV or Parquet download; see core/exports.py.
+    """
+    permission_classes = [IsAdminUserType]
 
-        return Response(formatted)
+    def perform_content_negotiation(self, request, force=False):
+        # ?format= names the file type here, not a DRF renderer; errors are JSON.
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, entity):
+        if entity not in exports.EXPORTS:
+            return Response(
+                {"detail": f"Unknown export. Choose one of: {', '.join(exports.EXPORTS)}."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        file_format = request.query_params.get('format', 'csv')
+        if file_format not in exports.FORMATS:
+            raise serializers.ValidationError({"format": f"Must be one of: {', '.join(exports.FORMATS)}."})
+        dates = {}
+        for param in ('from', 'to'):
+            value = request.query_params.get(param)
+            try:
+                dates[param] = date.fromisoformat(value) if value else None
+            except ValueError:
+                raise serializers.ValidationError({param: "Use YYYY-MM-DD."})
+        return exports.stream_export(
+            entity, file_format, dates['from'], dates['to'],
+            gzip=bool(re_accepts_gzip.search(request.headers.get('Accept-Encoding', ''))),
+        )
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(StreamingListMixin, PrefetchPlanMixin, viewsets.ModelViewSet):
     queryset = Payment.objects.all().order_by('-created_at')
     serializer_class = PaymentSerializer
     permission_classes = [IsAdminUserType]
+    pagination_class = KeysetPagination
     filter_backends = [filters.SearchFilter]
     search_fields = ['status', 'razorpay_order_id', 'razorpay_payment_id']
 
+# POST /api/imports/subplots/?dry_run=true  (multipart, file=<.csv or .xlsx>)
+class BulkImportView(APIView):
+    """
+    Create or update plots, sub-plots or materials from an uploaded file,
+    with the same validation as the API; see core/imports.py. Returns the
+    row report: 201 when written, 200 for a dry run, and 400 with the
+    failing rows when nothing was written.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request, entity):
+        spec = imports.IMPORTS.get(entity)
+        if spec is None:
+            return Response(
+                {"detail": f"Unknown import. Choose one of: {', '.join(imports.IMPORTS)}."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        if not spec.can_import(request.user):
+            raise PermissionDenied(f"You cannot import {entity}.")
+        upload = request.FILES.get('file')
+        if upload is None or not upload.name.lower().endswith(('.csv', '.xlsx')):
+            return Response({"file": ["Upload a .csv or .xlsx file."]}, status=status.HTTP_400_BAD_REQUEST)
+        dry_run = request.query_params.get('dry_run', '').lower() in ('1', 'true', 'yes')
+        try:
+            report = imports.run_import(entity, imports.read_rows(upload.file, upload.name), request.user, dry_run)
+        except imports.UnreadableFile as e:
+            return Response({"file": [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+        if report.error_count:
+            code = status.HTTP_400_BAD_REQUEST
+        else:
+            code = status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED
+        return Response(report.as_dict(), status=code)
+
 class SubPlotUnitsByProjectView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -2347,38 +2503,14 @@ class SubPlotUnitsByProjectView(APIView):
         serializer = SubPlotUnitSerializer(subplots, many=True)
         return Response({"data": serializer.data})
     
-class OwnerShortlistView(APIView):
+class OwnerShortlistView(PrefetchPlanMixin, generics.ListAPIView):
+    serializer_class = OwnerShortlistItemSerializer
     permission_classes = [IsAuthenticated]
 
-    def get(self, request):
-        owner = request.user
-        plot_ct = ContentType.objects.get_for_model(PlotListing)
-
-        # Step 1: Get shortlist items of type PlotListing
-        all_items = ShortlistCartItem.objects.filter(content_type=plot_ct).select_related('cart__user')
-
-        # Step 2: Filter items where content_object.owner == current logged-in owner
-        owner_items = [
-            item for item in all_items
-            if hasattr(item.content_object, 'owner') and item.content_object.owner == owner
-        ]
-
-        # Step 3: Serialize the results
-        data = []
-        for item in owner_items:
-            plot = item.content_object
-            user = item.cart.user
-            data.append({
-                "plot_id": plot.id,
-                "plot_title": plot.title,
-                "plot_location": plot.location,
-                "buyer_name": user.get_full_name(),
-                "buyer_email": user.email,
-                "buyer_phone": user.mobile_number,
-                "shortlisted_at": item.added_at,
-            })
-
-        return Response(data)
+    def get_queryset(self):
+        return ShortlistCartItem.objects.filter(
+            plot_listing__owner=self.request.user
+        ).order_by('-added_at')
 
 class OwnerPaymentListView(APIView):
     permission_classes = [IsAuthenticated]
@@ -2394,3 +2526,15 @@ class OwnerPaymentListView(APIView):
         # Step 3: Serialize and return the payments
         serializer = PaymentSerializer(payments, many=True)
         return Response(serializer.data)
+
+# GET /api/owner/payouts/?period=month
+class OwnerPayoutSummaryView(APIView):
+    """Paid payments for the owner's plots: amounts, taxes and totals, per month by default."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        period = _summary_period(request, default='month')
+        paid = Payment.objects.filter(
+            plot_id__in=PlotListing.objects.filter(owner=request.user).values('id'), status='paid',
+        )
+        return Response({"owner": request.user.username, "currency": "INR", **money.summarize_payments(paid, period)})
@@ -28,6 +28,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'corsheaders',
     'rest_framework',
     'rest_framework.authtoken',
@@ -68,16 +69,47 @@ TEMPLATES = [
 WSGI_APPLICATION = 'greenheap.wsgi.application'
 
 # ✅ PostgreSQL Database from Supabase
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': os.getenv('DATABASE_NAME'),
-        'USER': os.getenv('DATABASE_USERNAME'),
-        'PASSWORD': os.getenv('DATABASE_PASSWORD'),
-        'HOST': os.getenv('DATABASE_HOST'),
-        'PORT': os.getenv('DATABASE_PORT', '5432'),
+# DATABASE_ENGINE=sqlite runs against a local SQLite file instead (tests and
+# query budget runs without a Postgres server).
+if os.getenv('DATABASE_ENGINE', 'postgresql') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('DATABASE_NAME') or BASE_DIR / 'db.sqlite3',
+        }
     }
-}
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DATABASE_NAME'),
+            'USER': os.getenv('DATABASE_USERNAME'),
+            'PASSWORD': os.getenv('DATABASE_PASSWORD'),
+            'HOST': os.getenv('DATABASE_HOST'),
+            'PORT': os.getenv('DATABASE_PORT', '5432'),
+            # Probe a reused connection once per request before using it, so
+            # a connection dropped by Postgres/Supabase is replaced silently.
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+    # DATABASE_POOL=true serves connections from a psycopg 3 pool held by each
+    # worker process (Django requires CONN_MAX_AGE=0 in that mode). Otherwise
+    # each thread keeps one persistent connection for CONN_MAX_AGE seconds.
+    # Size the pool per environment: workers x DATABASE_POOL_MAX_SIZE must
+    # stay under the server's max_connections.
+    if os.getenv('DATABASE_POOL', 'false').lower() in ('1', 'true', 'yes'):
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {
+                'min_size': int(os.getenv('DATABASE_POOL_MIN_SIZE', 2)),
+                'max_size': int(os.getenv('DATABASE_POOL_MAX_SIZE', 10)),
+                'timeout': float(os.getenv('DATABASE_POOL_TIMEOUT', 10)),
+                'max_idle': float(os.getenv('DATABASE_POOL_MAX_IDLE', 300)),
+                'max_lifetime': float(os.getenv('DATABASE_POOL_MAX_LIFETIME', 1800)),
+            },
+        }
+    else:
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('CONN_MAX_AGE', 60))
 
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -109,6 +141,10 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Page size of the keyset-paginated admin lists (core.pagination.KeysetPagination).
+# Other list endpoints are not paginated. ?page_size= is capped at 500.
+API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', 100))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
@@ -116,6 +152,40 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
 }
 
+# ✅ Caching
+# CACHE_BACKEND=locmem (default, per process; used by tests), file, or redis
+# (any Redis-compatible server at CACHE_LOCATION; needs the `redis` package).
+# Use file or redis in production so every worker shares one cache.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('CACHE_LOCATION', 'redis://127.0.0.1:6379/1'),
+            'KEY_PREFIX': 'cbf',
+        }
+    }
+elif CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_LOCATION', '/var/tmp/cashbackfarms_cache'),
+            'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 10000))},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'cashbackfarms',
+        }
+    }
+
+# Seconds a cached response of a public/read-mostly endpoint may be served.
+# Entries are also invalidated on every write to the underlying models (see
+# core/signals.py); hit/miss counters are at /api/admin/cache/stats/.
+PUBLIC_CATALOG_CACHE_TIMEOUT = int(os.getenv('PUBLIC_CATALOG_CACHE_TIMEOUT', 300))
+
 # ✅ CORS Settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -124,6 +194,7 @@ CORS_ALLOWED_ORIGINS = [
     "https://cashbackfarms.com",
     "https://www.cashbackfarms.com",
 ]
+CORS_EXPOSE_HEADERS = ['X-Cart-Total', 'Link']
 
 # ✅ AWS S3 Setup
 #AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID')
@@ -148,6 +219,20 @@ DEFAULT_FROM_EMAIL = os.getenv('EMAIL_HOST_USER')
 # ✅ Razorpay
 RAZORPAY_KEY_ID = os.getenv("RAZORPAY_KEY_ID")
 RAZORPAY_KEY_SECRET = os.getenv("RAZORPAY_KEY_SECRET")
+RAZORPAY_WEBHOOK_SECRET = os.getenv("RAZORPAY_WEBHOOK_SECRET")
+
+# ✅ Payment gateway (pooled client in core/payments.py)
+# PAYMENT_GATEWAY=razorpay (default) or fake, which creates orders locally for offline load tests.
+PAYMENT_GATEWAY = os.getenv('PAYMENT_GATEWAY', 'razorpay')
+PAYMENT_HTTP_POOL_SIZE = int(os.getenv('PAYMENT_HTTP_POOL_SIZE', 10))
+PAYMENT_HTTP_TIMEOUT = int(os.getenv('PAYMENT_HTTP_TIMEOUT', 10))
+PAYMENT_FAKE_LATENCY_MS = int(os.getenv('PAYMENT_FAKE_LATENCY_MS', 0))
+# Settlement CSV the fake gateway reports to `manage.py reconcile_payments`.
+PAYMENT_FAKE_SETTLEMENT_FILE = os.getenv('PAYMENT_FAKE_SETTLEMENT_FILE')
+# Seconds after which an Idempotency-Key whose request never finished may be claimed again.
+PAYMENT_IDEMPOTENCY_LOCK_SECONDS = int(os.getenv('PAYMENT_IDEMPOTENCY_LOCK_SECONDS', 60))
+# Webhook events applied per transaction by `manage.py process_payment_events`.
+PAYMENT_EVENT_BATCH_SIZE = int(os.getenv('PAYMENT_EVENT_BATCH_SIZE', 500))
 
 # ✅ Twilio
 TWILIO = {
@@ -156,6 +241,51 @@ TWILIO = {
     'FROM_NUMBER': os.getenv('TWILIO_FROM_NUMBER'),
 }
 
+# ✅ Messaging transports (pooled SMTP / Twilio clients in utils/messaging.py)
+MESSAGING_SMTP_POOL_SIZE = int(os.getenv('MESSAGING_SMTP_POOL_SIZE', 4))
+MESSAGING_SMTP_MAX_IDLE_SECONDS = int(os.getenv('MESSAGING_SMTP_MAX_IDLE_SECONDS', 240))
+MESSAGING_HEALTH_CHECK_SECONDS = int(os.getenv('MESSAGING_HEALTH_CHECK_SECONDS', 30))
+MESSAGING_HTTP_POOL_SIZE = int(os.getenv('MESSAGING_HTTP_POOL_SIZE', 10))
+MESSAGING_HTTP_TIMEOUT = int(os.getenv('MESSAGING_HTTP_TIMEOUT', 10))
+
+# ✅ Notification outbox (delivered by `manage.py run_outbox`)
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', 50))
+OUTBOX_BACKOFF_SECONDS = int(os.getenv('OUTBOX_BACKOFF_SECONDS', 30))
+OUTBOX_BACKOFF_MAX_SECONDS = int(os.getenv('OUTBOX_BACKOFF_MAX_SECONDS', 3600))
+OUTBOX_LEASE_SECONDS = int(os.getenv('OUTBOX_LEASE_SECONDS', 300))
+OUTBOX_CONCURRENCY = {
+    'email': int(os.getenv('OUTBOX_EMAIL_CONCURRENCY', 4)),
+    'sms': int(os.getenv('OUTBOX_SMS_CONCURRENCY', 4)),
+    'whatsapp': int(os.getenv('OUTBOX_WHATSAPP_CONCURRENCY', 2)),
+}
+
+# ✅ Referral commissions (computed by `manage.py compute_referral_commissions`)
+# Percent of the paid amount credited to each upline level, nearest referrer first;
+# a blank entry pays nothing at that level.
+REFERRAL_COMMISSION_PERCENTS = os.getenv('REFERRAL_COMMISSION_PERCENTS', '2,1,0.5').split(',')
+REFERRAL_COMMISSION_BATCH_SIZE = int(os.getenv('REFERRAL_COMMISSION_BATCH_SIZE', 2000))
+
+# ✅ Square-feet holds (expired ones released by `manage.py release_sqft_holds`)
+# Minutes a 'square_feet' booking holds its area while the payment is completed.
+SQFT_HOLD_MINUTES = int(os.getenv('SQFT_HOLD_MINUTES', 15))
+SQFT_HOLD_SWEEP_BATCH_SIZE = int(os.getenv('SQFT_HOLD_SWEEP_BATCH_SIZE', 500))
+
+# ✅ Material stock ledger (expired holds released by `manage.py release_stock_holds`)
+# Counter rows per product; more shards let concurrent orders for one product lock different rows.
+STOCK_SHARD_COUNT = int(os.getenv('STOCK_SHARD_COUNT', 4))
+STOCK_HOLD_MINUTES = int(os.getenv('STOCK_HOLD_MINUTES', 30))
+STOCK_HOLD_SWEEP_BATCH_SIZE = int(os.getenv('STOCK_HOLD_SWEEP_BATCH_SIZE', 500))
+
+# ✅ Admin exports (streamed by core/exports.py)
+# Rows fetched, written and sent per step; also the Parquet row group size.
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 5000))
+
+# ✅ Bulk imports (core/imports.py, `manage.py import_rows`)
+# Rows validated and written per step.
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', 5000))
+# Row errors listed in a report; the rest are only counted.
+IMPORT_MAX_ERRORS = int(os.getenv('IMPORT_MAX_ERRORS', 1000))
+
 # ✅ Supabase
 SUPABASE = {
     'ACCESS_KEY': os.getenv('SUPABASE_ACCESS_KEY'),
@@ -0,0 +1,213 @@
+"""
+Shared transports for outbound email, SMS and WhatsApp.
+
+Opening an SMTP session (TCP + STARTTLS + AUTH) or a TLS connection to
+Twilio costs far more than sending one message, so both are kept open and
+reused across sends:
+
+- SMTP connections come from a small pool. A connection that has been idle
+  for a while is probed with NOOP before reuse and replaced if the server
+  has dropped it; a send that still hits a dropped session is retried once
+  on a fresh connection.
+- Twilio (SMS and WhatsApp) goes through one process-wide client whose
+  requests.Session keeps a keep-alive connection pool and transparently
+  reconnects on connection errors.
+"""
+import logging
+import queue
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from requests.adapters import HTTPAdapter
+from twilio.http.http_client import TwilioHttpClient
+from twilio.rest import Client
+from urllib3.util.retry import Retry
+
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class ConnectionPool:
+    """
+    Thread-safe LIFO pool of open connections. `factory` opens a connection,
+    `is_healthy` probes one that has been idle longer than
+    `health_check_after` seconds and `close` disposes of one. Connections
+    idle longer than `max_idle` are closed instead of reused.
+    """
+
+    def __init__(self, factory, is_healthy, close, max_size, max_idle, health_check_after):
+        self._factory = factory
+        self._is_healthy = is_healthy
+        self._close = close
+        self._max_idle = max_idle
+        self._health_check_after = health_check_after
+        self._idle = queue.LifoQueue(maxsize=max_size)
+
+    def acquire(self):
+        while True:
+            try:
+                conn, released_at = self._idle.get_nowait()
+            except queue.Empty:
+                return self._factory()
+            idle_for = time.monotonic() - released_at
+            if idle_for < self._max_idle and (idle_for < self._health_check_after or self._is_healthy(conn)):
+                return conn
+            self.discard(conn)
+
+    def release(self, conn):
+        try:
+            self._idle.put_nowait((conn, time.monotonic()))
+        except queue.Full:
+            self.discard(conn)
+
+    def discard(self, conn):
+        try:
+            self._close(conn)
+        except Exception:
+            logger.debug("Error closing pooled connection", exc_info=True)
+
+    def close_all(self):
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self.discard(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        except Exception:
+            self.discard(conn)
+            raise
+        self.release(conn)
+
+
+# --- SMTP ---
+
+def _open_smtp_connection():
+    connection = get_connection(fail_silently=False)
+    connection.open()
+    return connection
+
+
+def _smtp_is_healthy(connection):
+    smtp = getattr(connection, 'connection', None)
+    if smtp is None:
+        # Non-SMTP backends (console, locmem) have nothing to probe.
+        return not hasattr(connection, 'connection')
+    try:
+        return smtp.noop()[0] == 250
+    except (smtplib.SMTPException, OSError):
+        return False
+
+
+_smtp_pool = None
+_smtp_pool_lock = threading.Lock()
+
+
+def get_smtp_pool():
+    global _smtp_pool
+    with _smtp_pool_lock:
+        if _smtp_pool is None:
+            _smtp_pool = ConnectionPool(
+                factory=_open_smtp_connection,
+                is_healthy=_smtp_is_healthy,
+                close=lambda connection: connection.close(),
+                max_size=_setting('MESSAGING_SMTP_POOL_SIZE', 4),
+                max_idle=_setting('MESSAGING_SMTP_MAX_IDLE_SECONDS', 240),
+                health_check_after=_setting('MESSAGING_HEALTH_CHECK_SECONDS', 30),
+            )
+        return _smtp_pool
+
+
+def send_email(to, subject, body, from_email=None, is_html=False):
+    """Send one email over a pooled SMTP connection. Raises on failure."""
+    message = EmailMessage(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=[to],
+    )
+    if is_html:
+        message.content_subtype = "html"
+
+    pool = get_smtp_pool()
+    try:
+        with pool.connection() as connection:
+            message.connection = connection
+            return message.send(fail_silently=False)
+    except smtplib.SMTPServerDisconnected:
+        # The server dropped a pooled session between the health check and
+        # the send; the broken connection was discarded, so try a fresh one.
+        with pool.connection() as connection:
+            message.connection = connection
+            return message.send(fail_silently=False)
+
+
+# --- Twilio (SMS and WhatsApp) ---
+
+_twilio_client = None
+_twilio_client_lock = threading.Lock()
+
+
+def get_twilio_client():
+    global _twilio_client
+    with _twilio_client_lock:
+        if _twilio_client is None:
+            http_client = TwilioHttpClient(
+                pool_connections=True,
+                timeout=_setting('MESSAGING_HTTP_TIMEOUT', 10),
+            )
+            # Only connection failures are retried: a POST that reached
+            # Twilio must not be replayed and send the message twice.
+            retries = Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.2)
+            http_client.session.mount('https://', HTTPAdapter(
+                pool_maxsize=_setting('MESSAGING_HTTP_POOL_SIZE', 10),
+                max_retries=retries,
+            ))
+            _twilio_client = Client(
+                settings.TWILIO['ACCOUNT_SID'],
+                settings.TWILIO['AUTH_TOKEN'],
+                http_client=http_client,
+            )
+        return _twilio_client
+
+
+def send_sms(to, body):
+    """Send an SMS through Twilio and return the message SID. Raises on failure."""
+    message = get_twilio_client().messages.create(
+        body=body,
+        from_=settings.TWILIO['FROM_NUMBER'],
+        to=to,
+    )
+    return message.sid
+
+
+def send_whatsapp(to, body):
+    """Send a WhatsApp message through Twilio and return the message SID. Raises on failure."""
+    message = get_twilio_client().messages.create(
+        body=body,
+        from_=f"whatsapp:{settings.TWILIO['FROM_NUMBER']}",
+        to=f"whatsapp:{to}",
+    )
+    return message.sid
+
+
+def close_transports():
+    """Close pooled SMTP connections and drop the Twilio client (e.g. on worker shutdown)."""
+    global _twilio_client
+    if _smtp_pool is not None:
+        _smtp_pool.close_all()
+    with _twilio_client_lock:
+        _twilio_client = None
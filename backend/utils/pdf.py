@@ -0,0 +1,90 @@
+"""
+A minimal PDF writer for plain text documents such as receipts.
+
+It lays out lines of text in the standard Helvetica fonts on A4 pages, so no
+PDF library or font files are needed. The output contains no timestamps or
+random ids: the same lines always produce the same bytes.
+
+Each input line is plain text, with a little markup:
+
+- "# Title" is set large and bold, "## Heading" bold;
+- a tab splits a line into a label and a value, set in a second column;
+- an empty line leaves a gap.
+
+Characters outside Windows-1252 (the fonts' encoding) are printed as "?".
+"""
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+MARGIN = 50
+VALUE_COLUMN = 380
+
+STYLES = {
+    # prefix: (font, size, line height)
+    '# ': ('F2', 16, 26),
+    '## ': ('F2', 11, 18),
+    '': ('F1', 10, 15),
+}
+
+
+def _escape(text):
+    data = text.encode('cp1252', errors='replace')
+    return data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+def _style(line):
+    for prefix in ('# ', '## '):
+        if line.startswith(prefix):
+            return line[len(prefix):], STYLES[prefix]
+    return line, STYLES['']
+
+
+def _pages(lines):
+    """Content streams, one per page."""
+    pages, ops, y = [], [], PAGE_HEIGHT - MARGIN
+    for line in lines:
+        text, (font, size, height) = _style(line.rstrip('\n'))
+        if y - height < MARGIN:
+            pages.append(ops)
+            ops, y = [], PAGE_HEIGHT - MARGIN
+        y -= height
+        if not text.strip():
+            continue
+        label, _, value = text.partition('\t')
+        ops.append(b'BT /%s %d Tf %d %d Td (%s) Tj ET' % (font.encode(), size, MARGIN, y, _escape(label)))
+        if value:
+            ops.append(b'BT /%s %d Tf %d %d Td (%s) Tj ET' % (font.encode(), size, VALUE_COLUMN, y, _escape(value)))
+    pages.append(ops)
+    return [b'\n'.join(page) for page in pages]
+
+
+def render_text_pdf(lines, title=''):
+    """PDF bytes for `lines` (see the module docstring for the markup)."""
+    streams = _pages(lines)
+    page_ids = [5 + 2 * i for i in range(len(streams))]
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+            b' '.join(b'%d 0 R' % page_id for page_id in page_ids), len(streams)),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+    ]
+    for page_id, stream in zip(page_ids, streams):
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+            b'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>'
+            % (PAGE_WIDTH, PAGE_HEIGHT, page_id + 1)
+        )
+        objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream))
+    objects.append(b'<< /Title (%s) /Producer (Greenheap) >>' % _escape(title))
+
+    out = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (
+        len(objects) + 1, len(objects), xref)
+    return bytes(out)
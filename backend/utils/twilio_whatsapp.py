@@ -1,19 +1,9 @@
-from twilio.rest import Client
-from django.conf import settings
+from utils.messaging import send_whatsapp
 
-def send_whatsapp_message(to_number: str, message: str):
-    client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-    
-    from_whatsapp_number = f"whatsapp:{settings.TWILIO_FROM_NUMBER}"
-    to_whatsapp_number = f"whatsapp:{to_number}"
 
+def send_whatsapp_message(to_number: str, message: str):
     try:
-        message = client.messages.create(
-            body=message,
-            from_=from_whatsapp_number,
-            to=to_whatsapp_number
-        )
-        return message.sid
+        return send_whatsapp(to_number, message)
     except Exception as e:
         print("Twilio WhatsApp error:", e)
         return None